@@ -21,8 +21,9 @@ from typing import Dict, Optional, List
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 
-from robust_wikidata_linker import WikidataEntityLinker
+from robust_wikidata_linker import WikidataEntityLinker, canonicalize_cache_key, rekey_entity_cache
 import museum_mappings  # Importa i mappings personalizzati
+from iri_minter import IRIMinter
 from rdflib import Graph, URIRef, Literal, Namespace
 from rdflib.namespace import RDF, RDFS, XSD
 import re
@@ -33,6 +34,9 @@ SCHEMA = Namespace("https://schema.org/")  # HTTPS per Schema.org
 WD = Namespace("http://www.wikidata.org/entity/")
 WDT = Namespace("http://www.wikidata.org/prop/direct/")
 
+# Registro IRI dei literal convertiti: fuori da caches/, che può essere svuotata
+IRI_REGISTRY_FILE = "registries/iri_registry_v2.json"
+
 class AdvancedSemanticEnricherV2:
     """
     Sistema di arricchimento semantico V2: combinazione di entity linking e IRI generici.
@@ -40,19 +44,30 @@ class AdvancedSemanticEnricherV2:
     - IRI generici per attributi tecnici
     """
     
-    def __init__(self, use_wikidata_api=True, cache_file="advanced_enricher_cache.pkl", convert_to_iris=True):
+    def __init__(self, use_wikidata_api=True, cache_file="advanced_enricher_cache.pkl", convert_to_iris=True,
+                 wikidata_linker: Optional[WikidataEntityLinker] = None,
+                 iri_registry_file: Optional[str] = IRI_REGISTRY_FILE):
         """
         use_wikidata_api=True: abilita entity linking per brand, paese, ecc.
         convert_to_iris=True: abilita conversione a IRI generici per altri attributi
+        wikidata_linker: linker già inizializzato (es. nel runner a doppio output, con le
+            risposte Wikidata condivise con la V1); se None ne viene creato uno su cache_file
+        iri_registry_file: registro persistente IRI -> valore (vedi IRIMinter); None per
+            non salvarlo. Non è una cache: cancellarlo cambia gli IRI dei valori in collisione
         """
         self.convert_to_iris = convert_to_iris
-        self.wikidata_linker = WikidataEntityLinker(cache_file=cache_file) if use_wikidata_api else None
+        if wikidata_linker is None and use_wikidata_api:
+            wikidata_linker = WikidataEntityLinker(cache_file=cache_file)
+        self.wikidata_linker = wikidata_linker if use_wikidata_api else None
         self.use_wikidata_api = use_wikidata_api
         
         # Cache dinamico entità risolte (si espande automaticamente)
         self.entity_cache_file = cache_file.replace('.pkl', '_entities.json') if cache_file else 'entity_cache.json'
         self.entity_cache = self._load_entity_cache()
         
+        # IRI dei literal convertiti: memo per (colonna, valore) e registro collisioni persistente
+        self.iri_minter = IRIMinter(EX, iri_registry_file)
+        
         print(f"Cache entità caricato: {len(self.entity_cache)} entità precedentemente risolte")
         print(f"Wikidata API: {'Attiva' if self.use_wikidata_api else 'Disattivata'}")
         if self.convert_to_iris:
@@ -61,25 +76,24 @@ class AdvancedSemanticEnricherV2:
             print("MODALITA': Mantenimento dei literal originali")
     
     def _load_entity_cache(self):
-        """Carica cache dinamico delle entità risolte."""
+        """Carica cache dinamico delle entità risolte (chiavi ricalcolate in forma canonica)."""
         import json
         try:
             if os.path.exists(self.entity_cache_file):
                 with open(self.entity_cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    return rekey_entity_cache(json.load(f))
         except Exception as e:
             print(f"Warning: Impossibile caricare cache entità: {e}")
         return {}
     
     def _check_entity_cache(self, value: str):
         """Controlla se valore è già risolto in cache."""
-        normalized = value.strip().lower()
-        return self.entity_cache.get(normalized)
+        return self.entity_cache.get(canonicalize_cache_key(value))
     
     def _save_to_entity_cache(self, value: str, qid: str, entity_type: str, confidence: float, label: str = None):
         """Salva risultato in cache dinamico (si espande automaticamente)."""
         import json
-        normalized = value.strip().lower()
+        normalized = canonicalize_cache_key(value)
         
         self.entity_cache[normalized] = {
             'qid': qid,
@@ -169,23 +183,9 @@ class AdvancedSemanticEnricherV2:
         Converte un literal in IRI usando format: example.org/{attribute_name}_{normalized_value}
         
         Ogni attributo diventa un nodo che può essere soggetto di ulteriori relazioni.
+        Valori diversi che si normalizzano allo stesso IRI ricevono un suffisso (vedi IRIMinter).
         """
-        # Normalizza il valore per IRI (mantieni underscore e numeri)
-        normalized_value = re.sub(r'[^a-zA-Z0-9\s]', '', value.strip())
-        normalized_value = re.sub(r'\s+', '_', normalized_value).lower()
-        
-        # Se il valore normalizzato è vuoto, usa il primo carattere del valore originale
-        if not normalized_value or normalized_value == '_':
-            normalized_value = re.sub(r'[^a-zA-Z0-9]', '', value[:10].strip())[:5]
-            if not normalized_value:
-                normalized_value = "value"
-        
-        # Normalizza il nome dell'attributo per IRI
-        attr_name = re.sub(r'[^a-zA-Z0-9]', '_', col_name.strip()).lower()
-        
-        # Crea l'IRI
-        iri_path = f"{attr_name}_{normalized_value}"
-        return EX[iri_path]
+        return self.iri_minter.mint(value, col_name)
     
     def _parse_production_years(self, value: str):
         """
@@ -377,6 +377,226 @@ class AdvancedSemanticEnricherV2:
         normalized = re.sub(r'[^a-zA-Z0-9]', '', raw)
         return EX[f"vehicle_{normalized}"]
     
+    def _emit_vehicle_row(self, graph: Graph, row, column_mappings: Dict) -> Optional[Dict[str, int]]:
+        """
+        Genera nel grafo le triple V2 di una riga del CSV (un veicolo).
+        
+        row: pandas.Series o dizionario colonna -> valore
+        
+        Returns:
+            Contatori della riga (triple, literal convertiti, descrizioni) oppure
+            None per righe senza dati significativi
+        """
+        # Skip righe completamente vuote (nessun dato significativo)
+        if pd.isna(row.get('Marca')) and pd.isna(row.get('N. inventario')):
+            return None
+        
+        total_triples = 0
+        literals_converted_to_iris = 0
+        descriptions_kept_as_literal = 0
+        inventory_num = str(row.get('N. inventario', '')).strip()
+        
+        # Crea subject per questo veicolo
+        if not inventory_num or inventory_num == 'nan':
+            subject = self._create_subject_iri_fallback(row)
+        else:
+            subject = self._create_subject_iri(inventory_num)
+        
+        # Aggiungi tipo
+        graph.add((subject, RDF.type, SCHEMA.Vehicle))
+        total_triples += 1
+        
+        # Processa ogni colonna
+        for col_name, value in row.items():
+            # Skip colonne senza mapping o valori vuoti
+            if col_name not in column_mappings:
+                continue
+            
+            if pd.isna(value) or str(value).strip() == '' or str(value).strip() == 'nan':
+                continue
+            
+            value_str = str(value).strip()
+            mapping = column_mappings[col_name]
+            predicate_uri = mapping['predicate']
+            schema_predicates = mapping.get('schema_predicates', [])
+            property_id = mapping.get('property_id', '')
+            
+            # Se predicate_uri è None (proprietà condizionale), gestiamo nei casi speciali
+            if predicate_uri is None and col_name not in ['Anni di produzione', 'Acquisizione']:
+                # Skip se non abbiamo handler speciale
+                continue
+            
+            # ========================================================================
+            # LOGICHE CONDIZIONALI SPECIALI
+            # ========================================================================
+            
+            # CASO SPECIALE 1: Anni di produzione (single year vs range)
+            if col_name == 'Anni di produzione':
+                years_info = self._parse_production_years(value_str)
+                
+                if years_info['type'] == 'single':
+                    # Un solo anno: usa productionDate + P2754
+                    year_iri = self._literal_to_iri(value_str, col_name)
+                    graph.add((subject, WDT['P2754'], year_iri))
+                    graph.add((subject, SCHEMA.productionDate, year_iri))
+                    graph.add((year_iri, RDFS.label, Literal(value_str, datatype=XSD.string)))
+                    graph.add((year_iri, RDF.type, EX['Attribute']))
+                    total_triples += 4
+                    literals_converted_to_iris += 1
+                    continue
+                    
+                elif years_info['type'] == 'range':
+                    # Range di anni: SOLO schema:startDate/endDate con IRI, NO P2754
+                    # Crea IRI per anno inizio
+                    start_iri = self._literal_to_iri(years_info['start'], 'anno')
+                    graph.add((start_iri, RDFS.label, Literal(years_info['start'], datatype=XSD.string)))
+                    graph.add((start_iri, RDF.type, EX['Year']))
+                    
+                    # Crea IRI per anno fine
+                    end_iri = self._literal_to_iri(years_info['end'], 'anno')
+                    graph.add((end_iri, RDFS.label, Literal(years_info['end'], datatype=XSD.string)))
+                    graph.add((end_iri, RDF.type, EX['Year']))
+                    
+                    # Collega con P571/P576 e schema:startDate/endDate
+                    graph.add((subject, WDT['P571'], start_iri))
+                    graph.add((subject, WDT['P576'], end_iri))
+                    graph.add((subject, SCHEMA.startDate, start_iri))
+                    graph.add((subject, SCHEMA.endDate, end_iri))
+                    
+                    total_triples += 8
+                    literals_converted_to_iris += 2
+                    continue
+            
+            # CASO SPECIALE 2: Acquisizione (DONO vs ACQUISTATA)
+            if col_name == 'Acquisizione':
+                acquisition_type = self._get_acquisition_type(value_str)
+                acquisition_iri = self._literal_to_iri(value_str, col_name)
+                
+                # Predicato Wikidata custom
+                graph.add((subject, EX['acquisitionMethod'], acquisition_iri))
+                graph.add((acquisition_iri, RDFS.label, Literal(value_str, datatype=XSD.string)))
+                graph.add((acquisition_iri, RDF.type, EX['Attribute']))
+                total_triples += 3
+                
+                # Predicato Schema.org condizionale
+                if acquisition_type == 'donor':
+                    graph.add((subject, SCHEMA.donor, acquisition_iri))
+                    total_triples += 1
+                elif acquisition_type == 'acquiredFrom':
+                    graph.add((subject, SCHEMA.acquiredFrom, acquisition_iri))
+                    total_triples += 1
+                
+                literals_converted_to_iris += 1
+                continue
+            
+            # ========================================================================
+            # **VERSIONE V2: REGOLE BASATE SU MUSEUM_MAPPINGS (3 TIER)**
+            # ========================================================================
+            
+            # 1. Se il predicato deve rimanere ALWAYS literal (descrizione + museo specifici)
+            if museum_mappings.should_keep_literal(predicate_uri):
+                # Mantieni come literal
+                graph.add((subject, URIRef(predicate_uri), Literal(value_str, datatype=XSD.string)))
+                total_triples += 1
+                descriptions_kept_as_literal += 1
+                
+                # Aggiungi anche predicati Schema.org
+                for schema_pred in schema_predicates:
+                    graph.add((subject, URIRef(schema_pred), Literal(value_str, datatype=XSD.string)))
+                    total_triples += 1
+            
+            # 2. Se il predicato richiede ENTITY LINKING (brand, country, designer, model)
+            elif museum_mappings.should_use_entity_linking(predicate_uri):
+                # CASO SPECIALE: Modello → aggiungi contesto Marca per ricerca Wikidata
+                search_value = value_str
+                if col_name == 'Modello' and 'Marca' in row:
+                    brand = str(row['Marca']).strip()
+                    if brand and not pd.isna(row['Marca']) and brand.lower() != 'nan':
+                        search_value = f"{brand} {value_str}"  # "Ferrari 308 GTB"
+                        print(f"  → Ricerca modello con contesto: '{search_value}'")
+                
+                # Gestisci possibili entità multiple (es. designer "Pininfarina e Bertone")
+                # Per Marca e Modello: sempre un'entità singola.
+                # '/' e '&' fanno parte del nome (es. "Fiat 12/16 HP", "Prinetti & Stucchi").
+                if col_name in ('Modello', 'Marca'):
+                    entities = [search_value]
+                else:
+                    entities = self.split_entities(search_value)
+                
+                for entity_value in entities:
+                    # Prova entity linking con API Wikidata
+                    result = self._process_single_entity(entity_value, predicate_uri)
+                    
+                    if result and result['action'] == 'create_wikidata_iri':
+                        # Usa IRI Wikidata
+                        wikidata_iri = result['iri']
+                        wikidata_label = result['wikidata_label']
+                        rdf_type = result['rdf_type']
+                        
+                        # Triple principale
+                        graph.add((subject, URIRef(predicate_uri), wikidata_iri))
+                        
+                        # Aggiungi tipo e label per l'entità Wikidata
+                        graph.add((wikidata_iri, RDF.type, rdf_type))
+                        graph.add((wikidata_iri, RDFS.label, Literal(wikidata_label, datatype=XSD.string)))
+                        
+                        total_triples += 3
+                        literals_converted_to_iris += 1
+                        
+                        # Aggiungi anche con predicati Schema.org
+                        for schema_pred in schema_predicates:
+                            graph.add((subject, URIRef(schema_pred), wikidata_iri))
+                            total_triples += 1
+                    else:
+                        # Fallback: crea IRI generica se entity linking fallisce
+                        attribute_iri = self._literal_to_iri(entity_value, col_name)
+                        graph.add((subject, URIRef(predicate_uri), attribute_iri))
+                        graph.add((attribute_iri, RDFS.label, Literal(entity_value, datatype=XSD.string)))
+                        graph.add((attribute_iri, RDF.type, EX['Attribute']))
+                        total_triples += 3
+                        literals_converted_to_iris += 1
+                        
+                        # Aggiungi anche con predicati Schema.org
+                        for schema_pred in schema_predicates:
+                            graph.add((subject, URIRef(schema_pred), attribute_iri))
+                            total_triples += 1
+            
+            # 3. Se il predicato ha valori literal che devono diventare IRI GENERICA
+            elif museum_mappings.should_convert_literal_to_iri(predicate_uri):
+                # Converti il valore literal in IRI generica (example.org)
+                attribute_iri = self._literal_to_iri(value_str, col_name)
+                
+                # Triple: subject -> predicate -> attribute_iri
+                graph.add((subject, URIRef(predicate_uri), attribute_iri))
+                
+                # Aggiungi il valore originale come label del nodo attributo
+                graph.add((attribute_iri, RDFS.label, Literal(value_str, datatype=XSD.string)))
+                graph.add((attribute_iri, RDF.type, EX['Attribute']))
+                
+                total_triples += 3
+                literals_converted_to_iris += 1
+                
+                # Aggiungi anche con predicati Schema.org per interoperabilità
+                for schema_pred in schema_predicates:
+                    graph.add((subject, URIRef(schema_pred), attribute_iri))
+                    total_triples += 1
+            
+            else:
+                # 4. Per tutti gli altri: mantieni come literal (comportamento di default)
+                graph.add((subject, URIRef(predicate_uri), Literal(value_str, datatype=XSD.string)))
+                total_triples += 1
+                
+                # Aggiungi anche predicati Schema.org
+                for schema_pred in schema_predicates:
+                    graph.add((subject, URIRef(schema_pred), Literal(value_str, datatype=XSD.string)))
+                    total_triples += 1
+        
+        return {
+            'triples': total_triples,
+            'converted': literals_converted_to_iris,
+            'descriptions': descriptions_kept_as_literal,
+        }
+    
     def process_csv_to_rdf(self, csv_file: str, mapping_file: str, output_file: str) -> bool:
         """
         Processa CSV museo generando RDF con TUTTI I LITERALS TRASFORMATI IN IRI (v2).
@@ -403,267 +623,29 @@ class AdvancedSemanticEnricherV2:
             return False
         
         try:
-            # Carica mappings colonne
-            column_mappings = self._load_column_mappings(mapping_file)
-            if not column_mappings:
-                print("Errore: Nessun mapping caricato!")
-                return False
-            
             # NOTA: mappings.csv è obsoleto e contiene mappings Schema.org errati.
             # Usiamo SOLO museum_column_mapping.csv che è curato e corretto.
-            print("INFO: Uso SOLO museum_column_mapping.csv (mappings.csv obsoleto ignorato)")
+            emitter = V2GraphEmitter(self, mapping_file, output_file)
             
             # Carica CSV
             print("Caricando dati CSV...")
-            df = pd.read_csv(csv_file, encoding='utf-8', header=1)
+            # Colonne come stringhe, come nella lettura di V1 (stesso output anche da dual_output_runner)
+            df = pd.read_csv(csv_file, encoding='utf-8', header=1, dtype=str)
             print(f"Caricate {len(df)} righe, {len(df.columns)} colonne")
             
-            # Crea grafo RDF
-            graph = Graph()
-            
-            # Namespace
-            graph.bind("ex", EX)
-            graph.bind("schema", SCHEMA)
-            graph.bind("wdt", WDT)
-            graph.bind("wd", WD)
-            graph.bind("rdf", RDF)
-            graph.bind("rdfs", RDFS)
-            
-            # Contatori
-            total_triples = 0
-            total_vehicles = 0
-            literals_converted_to_iris = 0
-            descriptions_kept_as_literal = 0
+            if not emitter.begin(list(df.columns)):
+                return False
             
             print("\nGenerando triple RDF...")
             
             # Processa ogni riga (veicolo)
             for idx, row in df.iterrows():
-                # Skip righe completamente vuote (nessun dato significativo)
-                if pd.isna(row.get('Marca')) and pd.isna(row.get('N. inventario')):
-                    continue
-                
-                total_vehicles += 1
-                inventory_num = str(row.get('N. inventario', '')).strip()
-                
-                # Crea subject per questo veicolo
-                if not inventory_num or inventory_num == 'nan':
-                    subject = self._create_subject_iri_fallback(row)
-                else:
-                    subject = self._create_subject_iri(inventory_num)
-                
-                # Aggiungi tipo
-                graph.add((subject, RDF.type, SCHEMA.Vehicle))
-                total_triples += 1
-                
-                # Processa ogni colonna
-                for col_name, value in row.items():
-                    # Skip colonne senza mapping o valori vuoti
-                    if col_name not in column_mappings:
-                        continue
-                    
-                    if pd.isna(value) or str(value).strip() == '' or str(value).strip() == 'nan':
-                        continue
-                    
-                    value_str = str(value).strip()
-                    mapping = column_mappings[col_name]
-                    predicate_uri = mapping['predicate']
-                    schema_predicates = mapping.get('schema_predicates', [])
-                    property_id = mapping.get('property_id', '')
-                    
-                    # Se predicate_uri è None (proprietà condizionale), gestiamo nei casi speciali
-                    if predicate_uri is None and col_name not in ['Anni di produzione', 'Acquisizione']:
-                        # Skip se non abbiamo handler speciale
-                        continue
-                    
-                    # ========================================================================
-                    # LOGICHE CONDIZIONALI SPECIALI
-                    # ========================================================================
-                    
-                    # CASO SPECIALE 1: Anni di produzione (single year vs range)
-                    if col_name == 'Anni di produzione':
-                        years_info = self._parse_production_years(value_str)
-                        
-                        if years_info['type'] == 'single':
-                            # Un solo anno: usa productionDate + P2754
-                            year_iri = self._literal_to_iri(value_str, col_name)
-                            graph.add((subject, WDT['P2754'], year_iri))
-                            graph.add((subject, SCHEMA.productionDate, year_iri))
-                            graph.add((year_iri, RDFS.label, Literal(value_str, datatype=XSD.string)))
-                            graph.add((year_iri, RDF.type, EX['Attribute']))
-                            total_triples += 4
-                            literals_converted_to_iris += 1
-                            continue
-                            
-                        elif years_info['type'] == 'range':
-                            # Range di anni: SOLO schema:startDate/endDate con IRI, NO P2754
-                            # Crea IRI per anno inizio
-                            start_iri = self._literal_to_iri(years_info['start'], 'anno')
-                            graph.add((start_iri, RDFS.label, Literal(years_info['start'], datatype=XSD.string)))
-                            graph.add((start_iri, RDF.type, EX['Year']))
-                            
-                            # Crea IRI per anno fine
-                            end_iri = self._literal_to_iri(years_info['end'], 'anno')
-                            graph.add((end_iri, RDFS.label, Literal(years_info['end'], datatype=XSD.string)))
-                            graph.add((end_iri, RDF.type, EX['Year']))
-                            
-                            # Collega con P571/P576 e schema:startDate/endDate
-                            graph.add((subject, WDT['P571'], start_iri))
-                            graph.add((subject, WDT['P576'], end_iri))
-                            graph.add((subject, SCHEMA.startDate, start_iri))
-                            graph.add((subject, SCHEMA.endDate, end_iri))
-                            
-                            total_triples += 8
-                            literals_converted_to_iris += 2
-                            continue
-                    
-                    # CASO SPECIALE 2: Acquisizione (DONO vs ACQUISTATA)
-                    if col_name == 'Acquisizione':
-                        acquisition_type = self._get_acquisition_type(value_str)
-                        acquisition_iri = self._literal_to_iri(value_str, col_name)
-                        
-                        # Predicato Wikidata custom
-                        graph.add((subject, EX['acquisitionMethod'], acquisition_iri))
-                        graph.add((acquisition_iri, RDFS.label, Literal(value_str, datatype=XSD.string)))
-                        graph.add((acquisition_iri, RDF.type, EX['Attribute']))
-                        total_triples += 3
-                        
-                        # Predicato Schema.org condizionale
-                        if acquisition_type == 'donor':
-                            graph.add((subject, SCHEMA.donor, acquisition_iri))
-                            total_triples += 1
-                        elif acquisition_type == 'acquiredFrom':
-                            graph.add((subject, SCHEMA.acquiredFrom, acquisition_iri))
-                            total_triples += 1
-                        
-                        literals_converted_to_iris += 1
-                        continue
-                    
-                    # ========================================================================
-                    # **VERSIONE V2: REGOLE BASATE SU MUSEUM_MAPPINGS (3 TIER)**
-                    # ========================================================================
-                    
-                    # 1. Se il predicato deve rimanere ALWAYS literal (descrizione + museo specifici)
-                    if museum_mappings.should_keep_literal(predicate_uri):
-                        # Mantieni come literal
-                        graph.add((subject, URIRef(predicate_uri), Literal(value_str, datatype=XSD.string)))
-                        total_triples += 1
-                        descriptions_kept_as_literal += 1
-                        
-                        # Aggiungi anche predicati Schema.org
-                        for schema_pred in schema_predicates:
-                            graph.add((subject, URIRef(schema_pred), Literal(value_str, datatype=XSD.string)))
-                            total_triples += 1
-                    
-                    # 2. Se il predicato richiede ENTITY LINKING (brand, country, designer, model)
-                    elif museum_mappings.should_use_entity_linking(predicate_uri):
-                        # CASO SPECIALE: Modello → aggiungi contesto Marca per ricerca Wikidata
-                        search_value = value_str
-                        if col_name == 'Modello' and 'Marca' in row:
-                            brand = str(row['Marca']).strip()
-                            if brand and not pd.isna(row['Marca']) and brand.lower() != 'nan':
-                                search_value = f"{brand} {value_str}"  # "Ferrari 308 GTB"
-                                print(f"  → Ricerca modello con contesto: '{search_value}'")
-                        
-                        # Gestisci possibili entità multiple (es. designer "Pininfarina e Bertone")
-                        # Per Marca e Modello: sempre un'entità singola.
-                        # '/' e '&' fanno parte del nome (es. "Fiat 12/16 HP", "Prinetti & Stucchi").
-                        if col_name in ('Modello', 'Marca'):
-                            entities = [search_value]
-                        else:
-                            entities = self.split_entities(search_value)
-                        
-                        for entity_value in entities:
-                            # Prova entity linking con API Wikidata
-                            result = self._process_single_entity(entity_value, predicate_uri)
-                            
-                            if result and result['action'] == 'create_wikidata_iri':
-                                # Usa IRI Wikidata
-                                wikidata_iri = result['iri']
-                                wikidata_label = result['wikidata_label']
-                                rdf_type = result['rdf_type']
-                                
-                                # Triple principale
-                                graph.add((subject, URIRef(predicate_uri), wikidata_iri))
-                                
-                                # Aggiungi tipo e label per l'entità Wikidata
-                                graph.add((wikidata_iri, RDF.type, rdf_type))
-                                graph.add((wikidata_iri, RDFS.label, Literal(wikidata_label, datatype=XSD.string)))
-                                
-                                total_triples += 3
-                                literals_converted_to_iris += 1
-                                
-                                # Aggiungi anche con predicati Schema.org
-                                for schema_pred in schema_predicates:
-                                    graph.add((subject, URIRef(schema_pred), wikidata_iri))
-                                    total_triples += 1
-                            else:
-                                # Fallback: crea IRI generica se entity linking fallisce
-                                attribute_iri = self._literal_to_iri(entity_value, col_name)
-                                graph.add((subject, URIRef(predicate_uri), attribute_iri))
-                                graph.add((attribute_iri, RDFS.label, Literal(entity_value, datatype=XSD.string)))
-                                graph.add((attribute_iri, RDF.type, EX['Attribute']))
-                                total_triples += 3
-                                literals_converted_to_iris += 1
-                                
-                                # Aggiungi anche con predicati Schema.org
-                                for schema_pred in schema_predicates:
-                                    graph.add((subject, URIRef(schema_pred), attribute_iri))
-                                    total_triples += 1
-                    
-                    # 3. Se il predicato ha valori literal che devono diventare IRI GENERICA
-                    elif museum_mappings.should_convert_literal_to_iri(predicate_uri):
-                        # Converti il valore literal in IRI generica (example.org)
-                        attribute_iri = self._literal_to_iri(value_str, col_name)
-                        
-                        # Triple: subject -> predicate -> attribute_iri
-                        graph.add((subject, URIRef(predicate_uri), attribute_iri))
-                        
-                        # Aggiungi il valore originale come label del nodo attributo
-                        graph.add((attribute_iri, RDFS.label, Literal(value_str, datatype=XSD.string)))
-                        graph.add((attribute_iri, RDF.type, EX['Attribute']))
-                        
-                        total_triples += 3
-                        literals_converted_to_iris += 1
-                        
-                        # Aggiungi anche con predicati Schema.org per interoperabilità
-                        for schema_pred in schema_predicates:
-                            graph.add((subject, URIRef(schema_pred), attribute_iri))
-                            total_triples += 1
-                    
-                    else:
-                        # 4. Per tutti gli altri: mantieni come literal (comportamento di default)
-                        graph.add((subject, URIRef(predicate_uri), Literal(value_str, datatype=XSD.string)))
-                        total_triples += 1
-                        
-                        # Aggiungi anche predicati Schema.org
-                        for schema_pred in schema_predicates:
-                            graph.add((subject, URIRef(schema_pred), Literal(value_str, datatype=XSD.string)))
-                            total_triples += 1
+                emitter.emit_row(idx, row)
                 
                 if (idx + 1) % 10 == 0:
                     print(f"  Processati {idx + 1}/{len(df)} veicoli...")
             
-            # Salva grafo
-            print("\nSalvando grafo RDF...")
-            output_dir = os.path.dirname(output_file)
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True)
-            graph.serialize(destination=output_file, format='nt', encoding='utf-8')
-            
-            # Risultati
-            print(f"\n" + "=" * 80)
-            print(f"=== RISULTATI GENERAZIONE RDF V2 ===")
-            print("=" * 80)
-            print(f"\nVeicoli processati: {total_vehicles}")
-            print(f"Triple generate: {total_triples}")
-            print(f"\nConversione Attributes:")
-            print(f"  - Literals convertiti in IRI: {literals_converted_to_iris}")
-            print(f"  - Descrizioni mantenute come literal: {descriptions_kept_as_literal}")
-            print(f"\nFile salvato: {output_file}")
-            print("=" * 80 + "\n")
-            
-            return True
+            return emitter.finish()
             
         except Exception as e:
             print(f"Errore durante elaborazione: {str(e)}")
@@ -671,6 +653,82 @@ class AdvancedSemanticEnricherV2:
             traceback.print_exc()
             return False
 
+
+class V2GraphEmitter:
+    """
+    Emitter del grafo V2 (tutti i literal come IRI) alimentato riga per riga.
+    
+    Usato da AdvancedSemanticEnricherV2.process_csv_to_rdf e, come emitter
+    aggiuntivo, dal passaggio unico della V1 (scripts/dual_output_runner.py):
+    chi legge il CSV chiama begin(colonne), emit_row(idx, riga) per ogni riga
+    e finish() per serializzare il grafo.
+    """
+    
+    def __init__(self, enricher: AdvancedSemanticEnricherV2, mapping_file: str, output_file: str):
+        self.enricher = enricher
+        self.mapping_file = mapping_file
+        self.output_file = output_file
+        self.column_mappings = {}
+        self.graph = Graph()
+        
+        # Namespace
+        self.graph.bind("ex", EX)
+        self.graph.bind("schema", SCHEMA)
+        self.graph.bind("wdt", WDT)
+        self.graph.bind("wd", WD)
+        self.graph.bind("rdf", RDF)
+        self.graph.bind("rdfs", RDFS)
+        
+        # Contatori
+        self.total_triples = 0
+        self.total_vehicles = 0
+        self.literals_converted_to_iris = 0
+        self.descriptions_kept_as_literal = 0
+    
+    def begin(self, columns: List[str]) -> bool:
+        """Carica i mapping delle colonne; False se non ce ne sono."""
+        self.column_mappings = self.enricher._load_column_mappings(self.mapping_file)
+        if not self.column_mappings:
+            print("Errore: Nessun mapping caricato!")
+            return False
+        print("INFO: Uso SOLO museum_column_mapping.csv (mappings.csv obsoleto ignorato)")
+        return True
+    
+    def emit_row(self, idx, row):
+        """Aggiunge al grafo le triple V2 di una riga (pandas.Series o dizionario)."""
+        counts = self.enricher._emit_vehicle_row(self.graph, row, self.column_mappings)
+        if counts is None:
+            return
+        self.total_vehicles += 1
+        self.total_triples += counts['triples']
+        self.literals_converted_to_iris += counts['converted']
+        self.descriptions_kept_as_literal += counts['descriptions']
+    
+    def finish(self) -> bool:
+        """Serializza il grafo V2 e stampa i risultati."""
+        print("\nSalvando grafo RDF V2...")
+        output_dir = os.path.dirname(self.output_file)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        self.graph.serialize(destination=self.output_file, format='nt', encoding='utf-8')
+        self.enricher.iri_minter.save()
+        
+        # Risultati
+        print(f"\n" + "=" * 80)
+        print(f"=== RISULTATI GENERAZIONE RDF V2 ===")
+        print("=" * 80)
+        print(f"\nVeicoli processati: {self.total_vehicles}")
+        print(f"Triple generate: {self.total_triples}")
+        print(f"\nConversione Attributes:")
+        print(f"  - Literals convertiti in IRI: {self.literals_converted_to_iris}")
+        print(f"  - Descrizioni mantenute come literal: {self.descriptions_kept_as_literal}")
+        print(f"  - IRI registrati: {len(self.enricher.iri_minter)} "
+              f"(collisioni risolte con suffisso: {self.enricher.iri_minter.collisions})")
+        print(f"\nFile salvato: {self.output_file}")
+        print("=" * 80 + "\n")
+        
+        return True
+
 def main():
     """Funzione principale - esegui versione V2 con entity linking + generic IRIs"""
     print("\n=== GENERAZIONE RDF VERSIONE 2 ===")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Generazione degli IRI per i literal convertiti dalla V2 (example.org/{attributo}_{valore}).
+
+La normalizzazione toglie la punteggiatura, quindi valori diversi possono finire
+sullo stesso IRI ("1.5 l" e "15 l" diventano entrambi ..._15_l). IRIMinter:
+- memorizza l'IRI di ogni coppia (colonna, valore), così i valori ripetuti
+  costano una lookup in un dizionario;
+- tiene un registro IRI -> valore: il primo valore che produce un IRI lo
+  mantiene, i valori diversi che arrivano dopo ricevono un suffisso ricavato
+  dall'hash del valore (controllato a sua volta contro il registro);
+- salva il registro su file JSON, così gli IRI restano stabili tra esecuzioni.
+
+Quale valore di un gruppo in collisione resta senza suffisso dipende dall'ordine
+delle righe nell'esecuzione in cui il gruppo compare per la prima volta; da lì in
+poi l'assegnazione è fissata dal registro, che per questo va conservato (non sta
+tra le cache).
+
+Valori che differiscono solo per maiuscole o spazi restano lo stesso nodo.
+"""
+
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Optional, Tuple
+
+from rdflib import Namespace, URIRef
+
+NON_ALNUM_SPACE_PATTERN = re.compile(r'[^a-zA-Z0-9\s]')
+NON_ALNUM_PATTERN = re.compile(r'[^a-zA-Z0-9]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def value_identity(value: str) -> str:
+    """Forma del valore che identifica il nodo: spazi compattati, minuscole."""
+    return ' '.join(value.split()).lower()
+
+
+class IRIMinter:
+    """Memo (colonna, valore) -> IRI con registro delle collisioni persistente."""
+
+    def __init__(self, namespace: Namespace, registry_file: Optional[str] = None):
+        self.namespace = namespace
+        self.registry_file = registry_file
+        self._memo: Dict[Tuple[str, str], URIRef] = {}
+        self._attr_names: Dict[str, str] = {}
+        # Percorso IRI -> identità "attributo|valore" a cui è stato assegnato
+        self.registry: Dict[str, str] = self._load()
+        self._assigned: Dict[str, str] = {identity: path for path, identity in self.registry.items()}
+        self._dirty = False
+        self.collisions = 0
+
+    def _load(self) -> Dict[str, str]:
+        try:
+            if self.registry_file and os.path.exists(self.registry_file):
+                with open(self.registry_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Warning: Impossibile caricare registro IRI: {e}")
+        return {}
+
+    def save(self):
+        """Salva il registro su disco (solo se modificato)."""
+        if not self._dirty or not self.registry_file:
+            return
+        try:
+            registry_dir = os.path.dirname(self.registry_file)
+            if registry_dir and not os.path.exists(registry_dir):
+                os.makedirs(registry_dir, exist_ok=True)
+            with open(self.registry_file, 'w', encoding='utf-8') as f:
+                json.dump(self.registry, f, ensure_ascii=False, indent=2, sort_keys=True)
+            self._dirty = False
+        except Exception as e:
+            print(f"Warning: Impossibile salvare registro IRI: {e}")
+
+    def _attr_name(self, col_name: str) -> str:
+        attr_name = self._attr_names.get(col_name)
+        if attr_name is None:
+            attr_name = self._attr_names[col_name] = NON_ALNUM_PATTERN.sub('_', col_name.strip()).lower()
+        return attr_name
+
+    @staticmethod
+    def _normalize_value(value: str) -> str:
+        # Normalizza il valore per IRI (mantieni underscore e numeri)
+        normalized_value = WHITESPACE_PATTERN.sub('_', NON_ALNUM_SPACE_PATTERN.sub('', value.strip())).lower()
+
+        # Se il valore normalizzato è vuoto, usa il primo carattere del valore originale
+        if not normalized_value or normalized_value == '_':
+            normalized_value = NON_ALNUM_PATTERN.sub('', value[:10].strip())[:5]
+            if not normalized_value:
+                normalized_value = "value"
+        return normalized_value
+
+    def _free_path(self, iri_path: str, identity: str) -> str:
+        """Primo percorso libero (o già dell'identità) tra iri_path e le sue varianti con suffisso."""
+        owner = self.registry.get(iri_path)
+        if owner is None or owner == identity:
+            return iri_path
+        # Collisione: suffisso dall'hash del valore; se anche quel percorso è occupato
+        # (da un altro suffisso o da un valore che si normalizza così) si rigenera l'hash
+        self.collisions += 1
+        attempt = 0
+        while True:
+            seed = identity if attempt == 0 else f"{identity}#{attempt}"
+            suffixed = f"{iri_path}_{hashlib.blake2b(seed.encode('utf-8'), digest_size=4).hexdigest()}"
+            owner = self.registry.get(suffixed)
+            if owner is None or owner == identity:
+                return suffixed
+            attempt += 1
+
+    def mint(self, value: str, col_name: str) -> URIRef:
+        """IRI del valore per la colonna, stabile e distinto per valori diversi."""
+        key = (col_name, value)
+        iri = self._memo.get(key)
+        if iri is not None:
+            return iri
+
+        attr_name = self._attr_name(col_name)
+        identity = f"{attr_name}|{value_identity(value)}"
+        iri_path = self._assigned.get(identity)
+        if iri_path is None:
+            iri_path = self._free_path(f"{attr_name}_{self._normalize_value(value)}", identity)
+            self.registry[iri_path] = identity
+            self._assigned[identity] = iri_path
+            self._dirty = True
+
+        iri = self._memo[key] = self.namespace[iri_path]
+        return iri
+
+    def __len__(self) -> int:
+        return len(self.registry)
@@ -0,0 +1,135 @@
+"""
+Etichette Wikidata di proprietà (P-code) ed entità (Q-code) con cache su disco.
+
+Le etichette già risolte sono salvate in un file JSON e non vengono più
+richieste: dopo la prima esecuzione i report si generano senza chiamate di rete,
+e con offline=True si usa solo la cache. I codici mancanti sono richiesti a
+wbgetentities a lotti di 50 (limite dell'API), con più lotti in parallelo su una
+sessione HTTP con pool di connessioni e retry sugli errori temporanei.
+
+I codici senza etichetta nella lingua richiesta (o inesistenti) sono registrati
+con etichetta null, così non vengono richiesti di nuovo; gli errori di rete non
+vengono salvati e i codici restano da risolvere all'esecuzione successiva.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+WIKIDATA_API_URL = "https://www.wikidata.org/w/api.php"
+API_BATCH_SIZE = 50           # id massimi per richiesta wbgetentities
+DEFAULT_FETCH_WORKERS = 4     # lotti richiesti in parallelo
+REQUEST_TIMEOUT = 10
+
+
+class LabelResolver:
+    """Risolve P-code e Q-code in etichette, con cache JSON persistente e richieste concorrenti."""
+
+    def __init__(self, cache_file: str, language: str = 'en', offline: bool = False,
+                 max_workers: int = DEFAULT_FETCH_WORKERS, session: Optional[requests.Session] = None):
+        self.cache_file = cache_file
+        self.language = language
+        self.offline = offline
+        self.max_workers = max_workers
+        self.labels: Dict[str, Optional[str]] = self._load()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.session = session or self._create_session()
+        self.cache_hits = 0
+        self.fetched = 0
+        self.failed_batches = 0
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update({
+            'User-Agent': 'WikidataLabelResolver/1.0 (mailto:contact@example.com)'
+        })
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers, max_retries=retry)
+        session.mount('https://', adapter)
+        return session
+
+    def _load(self) -> Dict[str, Optional[str]]:
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Warning: Impossibile caricare cache etichette: {e}")
+        return {}
+
+    def save(self):
+        """Salva la cache su disco (solo se modificata)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                cache_dir = os.path.dirname(self.cache_file)
+                if cache_dir and not os.path.exists(cache_dir):
+                    os.makedirs(cache_dir, exist_ok=True)
+                tmp_file = self.cache_file + '.tmp'
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.labels, f, ensure_ascii=False, indent=2, sort_keys=True)
+                os.replace(tmp_file, self.cache_file)
+                self._dirty = False
+            except Exception as e:
+                print(f"Warning: Impossibile salvare cache etichette: {e}")
+
+    def _fetch_batch(self, batch: List[str]) -> Dict[str, Optional[str]]:
+        """Etichette di un lotto di codici; dizionario vuoto se la richiesta fallisce."""
+        params = {
+            'action': 'wbgetentities',
+            'ids': '|'.join(batch),
+            'props': 'labels',
+            'languages': self.language,
+            'format': 'json'
+        }
+        try:
+            response = self.session.get(WIKIDATA_API_URL, params=params, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+            # Errori dell'API (es. rate limit) arrivano con HTTP 200 e una chiave 'error':
+            # il lotto è fallito, i codici non vanno registrati come privi di etichetta
+            if 'error' in data or 'entities' not in data:
+                raise ValueError(f"risposta API senza entità: {data.get('error', data)}")
+            entities = data['entities']
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"   ATTENZIONE: Errore nel recupero batch: {e}")
+            with self._lock:
+                self.failed_batches += 1
+            return {}
+
+        labels = {}
+        for code in batch:
+            label = entities.get(code, {}).get('labels', {}).get(self.language)
+            labels[code] = label['value'] if label else None
+        return labels
+
+    def resolve(self, codes: Iterable[str]) -> Dict[str, str]:
+        """
+        Etichette dei codici richiesti (solo quelli che ne hanno una).
+
+        I codici non in cache vengono richiesti a Wikidata, salvo in modalità offline.
+        """
+        codes = list(dict.fromkeys(codes))
+        missing = [code for code in codes if code not in self.labels]
+        self.cache_hits += len(codes) - len(missing)
+
+        if missing and not self.offline:
+            batches = [missing[i:i + API_BATCH_SIZE] for i in range(0, len(missing), API_BATCH_SIZE)]
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+                for fetched in pool.map(self._fetch_batch, batches):
+                    if fetched:
+                        with self._lock:
+                            self.labels.update(fetched)
+                            self.fetched += len(fetched)
+                            self._dirty = True
+
+        return {code: self.labels[code] for code in codes if self.labels.get(code)}
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: helper decisionali di museum_mappings, versione originale vs compilata.
+
+Le implementazioni di riferimento qui sotto sono quelle precedenti a MappingClassifier
+(setup ricostruito a ogni chiamata, liste scandite linearmente). Per ogni helper il
+benchmark misura il costo per chiamata di entrambe e verifica che i risultati coincidano.
+
+Uso:
+    python scripts/benchmark_museum_mappings.py [N]    # default 200.000 chiamate per helper
+"""
+
+import os
+import sys
+import random
+import re
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+import museum_mappings
+
+
+# ============================================================================
+# IMPLEMENTAZIONI DI RIFERIMENTO (versione non compilata)
+# ============================================================================
+def reference_is_year_value(value):
+    if not value or not isinstance(value, str):
+        return False
+    value = value.strip()
+    year_patterns = [
+        r'^\d{4}$',
+        r'^\d{4}[-–]\d{4}$',
+        r'^(19|20)\d{2}$',
+        r'^(19|20)\d{2}[-–](19|20)\d{2}$'
+    ]
+    for pattern in year_patterns:
+        if re.match(pattern, value):
+            return True
+    return False
+
+
+def reference_is_long_description(text):
+    if not text or len(text.strip()) < 50:
+        return False
+    description_indicators = [
+        r'\.\s+[A-Z]',
+        lambda t: len(t.strip()) > 200,
+        r'\b(fu|venne|era|divenne|nacque|fondò|produsse|costruì)\b',
+        r'\b(nel|dal|al|tra il|durante|epoca|periodo)\s+\d{4}',
+        r'\b(storia|fondazione|caratteristiche|descrizione)\b',
+        lambda t: t.count(',') > 3,
+        r'(al Museo|esposto|vettura|automobile|modello.*fu|prodotta.*tra)'
+    ]
+    for indicator in description_indicators:
+        if callable(indicator):
+            if indicator(text):
+                return True
+        elif re.search(indicator, text, re.IGNORECASE):
+            return True
+    return False
+
+
+def reference_select_best_type(instance_of_list, predicate_hint=None):
+    if not instance_of_list:
+        return predicate_hint if predicate_hint else 'Q35120'
+    priority_types = dict(museum_mappings.TYPE_PRIORITIES)
+    best_type = None
+    best_score = -1
+    for qid in instance_of_list:
+        score = priority_types.get(qid, 0)
+        if score > best_score:
+            best_score = score
+            best_type = qid
+    return best_type if best_type else (predicate_hint if predicate_hint else 'Q35120')
+
+
+def reference_is_literal_only(predicate_str):
+    return predicate_str in museum_mappings.literal_only_properties
+
+
+def reference_is_multiple_entities_predicate(predicate_str):
+    return predicate_str in museum_mappings.multiple_entities_predicates
+
+
+# ============================================================================
+# INPUT SINTETICI
+# ============================================================================
+def generate_cells(n: int, rng: random.Random) -> list:
+    """Valori di cella nello stile di museo.csv: anni, etichette brevi, descrizioni."""
+    words = ['vettura', 'motore', 'telaio', 'corsa', 'Torino', 'Fiat', 'Lancia', 'nel', 'fu',
+             'carrozzeria', 'prodotta', 'tra', 'esemplare', 'restauro', 'pilota', 'gara']
+    templates = [
+        lambda: str(rng.randint(1880, 2020)),
+        lambda: f"{rng.randint(1880, 1990)}-{rng.randint(1990, 2020)}",
+        lambda: rng.choice(['Italia', 'Francia', 'Benzina', 'Diesel', 'Berlina', 'Spider']),
+        lambda: ' '.join(rng.choice(words) for _ in range(rng.randint(8, 20))),
+        lambda: '. '.join(' '.join(rng.choice(words) for _ in range(12)).capitalize() for _ in range(4)),
+        lambda: ', '.join(rng.choice(words) for _ in range(rng.randint(3, 8))) + ' ' * 40,
+    ]
+    return [rng.choice(templates)() for _ in range(n)]
+
+
+def generate_instance_of(n: int, rng: random.Random) -> list:
+    qids = list(museum_mappings.TYPE_PRIORITIES) + ['Q35120', 'Q4167836', 'Q515', 'Q891723']
+    return [rng.sample(qids, rng.randint(0, 5)) for _ in range(n)]
+
+
+def generate_predicates(n: int, rng: random.Random) -> list:
+    predicates = (museum_mappings.literal_only_properties + museum_mappings.iri_target_properties
+                  + ['http://example.org/Sconosciuto'])
+    return [rng.choice(predicates) for _ in range(n)]
+
+
+def run_case(name: str, reference, compiled, inputs: list):
+    """Misura le due implementazioni sugli stessi input e confronta i risultati."""
+    start = time.perf_counter()
+    expected = [reference(*args) for args in inputs]
+    reference_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [compiled(*args) for args in inputs]
+    compiled_time = time.perf_counter() - start
+
+    mismatches = sum(1 for e, a in zip(expected, actual) if e != a)
+    n = len(inputs)
+    print(f"{name:<36} {reference_time / n * 1e6:>8.2f} µs  {compiled_time / n * 1e6:>8.2f} µs  "
+          f"{reference_time / compiled_time:>6.1f}x  {mismatches:>6}")
+    return mismatches
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    rng = random.Random(42)
+
+    print(f"\nGenerazione di {n:,} input sintetici per helper...")
+    cells = [(value,) for value in generate_cells(n, rng)]
+    types = [(qids, 'Q35120') for qids in generate_instance_of(n, rng)]
+    predicates = [(pred,) for pred in generate_predicates(n, rng)]
+
+    print(f"\n=== RISULTATI BENCHMARK ({n:,} chiamate per helper) ===")
+    print(f"{'helper':<36} {'originale':>11}  {'compilato':>11}  {'speedup':>7}  {'diff':>6}")
+    mismatches = 0
+    mismatches += run_case('is_year_value', reference_is_year_value, museum_mappings.is_year_value, cells)
+    mismatches += run_case('is_long_description', reference_is_long_description,
+                           museum_mappings.is_long_description, cells)
+    mismatches += run_case('select_best_type_from_instance_of', reference_select_best_type,
+                           museum_mappings.select_best_type_from_instance_of, types)
+    mismatches += run_case('literal_only (in lista / frozenset)', reference_is_literal_only,
+                           museum_mappings.MAPPING_CLASSIFIER.is_literal_only, predicates)
+    mismatches += run_case('is_multiple_entities_predicate', reference_is_multiple_entities_predicate,
+                           museum_mappings.is_multiple_entities_predicate, predicates)
+    print(f"\nDifferenze totali: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
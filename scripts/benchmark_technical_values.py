@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: normalizzazione dei valori tecnici per-cella vs vettoriale.
+
+Genera N stringhe sintetiche nello stile delle colonne Potenza / Cilindrata /
+Velocità di museo.csv ("155 CV a 5200 giri/min", "1.5 litri", "120 km/h", ...)
+e confronta normalize_technical_value (una chiamata per cella) con
+normalize_technical_values (intera colonna), verificando che i risultati coincidano.
+
+Uso:
+    python scripts/benchmark_technical_values.py [N]    # default 1.000.000
+"""
+
+import os
+import sys
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from robust_wikidata_linker import WikidataEntityLinker
+
+
+def generate_values(n: int, seed: int = 42) -> pd.Series:
+    """Genera n valori tecnici sintetici con la ripetitività tipica di un catalogo."""
+    rng = random.Random(seed)
+    templates = [
+        lambda: f"{rng.randint(4, 400)} CV a {rng.randrange(1000, 9000, 100)} giri/min",
+        lambda: f"{rng.randint(4, 400)} CV",
+        lambda: f"{rng.randint(4, 400)} HP a {rng.randrange(1000, 9000, 100)} rpm",
+        lambda: f"{rng.randint(10, 300)} kW",
+        lambda: f"{rng.randrange(500, 6000, 50)} cc",
+        lambda: f"{rng.randint(5, 60) / 10} litri",
+        lambda: f"{rng.randint(20, 350)} km/h",
+        lambda: f"{rng.randint(10, 200)} mph",
+        lambda: "non disponibile",
+    ]
+    return pd.Series([rng.choice(templates)() for _ in range(n)])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        linker = WikidataEntityLinker(
+            cache_file=os.path.join(tmp_dir, "benchmark_cache.pkl"),
+            ontology_config_file=os.path.join(root, "data", "wikidata_ontology_config.json"),
+        )
+
+        print(f"\nGenerazione di {n:,} valori sintetici...")
+        values = generate_values(n)
+        print(f"  - {values.nunique():,} stringhe distinte")
+
+        print("\nPercorso per-cella (normalize_technical_value)...")
+        start = time.perf_counter()
+        per_cell = [linker.normalize_technical_value(v) for v in values]
+        per_cell_time = time.perf_counter() - start
+        print(f"  {per_cell_time:.2f} s")
+
+        print("Percorso vettoriale (normalize_technical_values)...")
+        start = time.perf_counter()
+        frame = linker.normalize_technical_values(values)
+        batch_time = time.perf_counter() - start
+        print(f"  {batch_time:.2f} s")
+
+        # Verifica di coerenza tra i due percorsi
+        mismatches = 0
+        for expected, iri, normalized in zip(per_cell, frame['iri'], frame['normalized_value']):
+            if expected is None:
+                mismatches += not pd.isna(iri)
+            elif expected['iri'] != iri or expected['normalized_value'] != normalized:
+                mismatches += 1
+
+        print(f"\n=== RISULTATI BENCHMARK ({n:,} valori) ===")
+        print(f"Per-cella:   {per_cell_time:.2f} s ({per_cell_time / n * 1e6:.2f} µs/valore)")
+        print(f"Vettoriale:  {batch_time:.2f} s ({batch_time / n * 1e6:.2f} µs/valore)")
+        print(f"Speedup:     {per_cell_time / batch_time:.1f}x")
+        print(f"Differenze:  {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
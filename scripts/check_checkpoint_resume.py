@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Verifica della ripresa da checkpoint di process_csv_to_rdf.
+
+Genera un catalogo sintetico le cui descrizioni (TESTO) contengono a capo,
+virgolette e backslash, interrompe l'elaborazione a una riga data con un errore
+simulato, riprende con resume=True e controlla che l'output coincida con quello
+di un'elaborazione completa (senza API Wikidata, quindi deterministica).
+Con --chunksize le tre elaborazioni leggono il CSV a blocchi.
+
+Uso:
+    python scripts/check_checkpoint_resume.py [--rows 25] [--crash-row 6] [--checkpoint-every 3] [--chunksize N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from rdflib import Graph, Literal
+
+from integrated_semantic_enricher import AdvancedSemanticEnricher, checkpoint_paths
+
+MAPPING_ROWS = [
+    "column_name,wikidata_property,property_label,macro_category,schema_org_property",
+    "N. inventario,P217,inventory number,Vettura,",
+    "Marca,P176,manufacturer,Vettura,",
+    "Modello,P1559,model,Vettura,",
+    "Anno,P5444,model year,Vettura,",
+    "TESTO,http://www.w3.org/2000/01/rdf-schema#comment,desc,Museo,",
+]
+
+
+class SimulatedCrash(Exception):
+    pass
+
+
+def description(i: int) -> str:
+    """Testo di catalogo su più righe, con virgolette e backslash."""
+    return f'Vettura {i} detta "la veloce".\nRestaurata nel 19{i % 100:02d}\\bis;\n\tcarrozzeria originale.'
+
+
+def write_catalogue(folder: str, rows: int):
+    csv_file = os.path.join(folder, 'museo.csv')
+    mapping_file = os.path.join(folder, 'museum_column_mapping.csv')
+    with open(csv_file, 'w', encoding='utf-8', newline='') as f:
+        f.write("cat,cat,cat,cat,cat\n")
+        f.write("N. inventario,Marca,Modello,Anno,TESTO\n")
+        for i in range(rows):
+            text = description(i).replace('"', '""')
+            f.write(f'{100 + i}/A,Marca{i % 4},Modello {i},{1900 + i},"{text}"\n')
+    with open(mapping_file, 'w', encoding='utf-8') as f:
+        f.write("\n".join(MAPPING_ROWS) + "\n")
+    return csv_file, mapping_file
+
+
+def run(csv_file: str, mapping_file: str, output_file: str, cache_file: str, checkpoint_every: int,
+        chunksize: int = None, resume: bool = False, crash_inventory: str = None) -> bool:
+    enricher = AdvancedSemanticEnricher(use_wikidata_api=False, cache_file=cache_file)
+    if crash_inventory:
+        create_subject_iri = enricher._create_subject_iri
+
+        def crashing_subject_iri(inventory_number):
+            if inventory_number == crash_inventory:
+                raise SimulatedCrash(f"interruzione simulata alla riga {inventory_number}")
+            return create_subject_iri(inventory_number)
+        enricher._create_subject_iri = crashing_subject_iri
+    return enricher.process_csv_to_rdf(csv_file, mapping_file, output_file, resume=resume,
+                                       checkpoint_every=checkpoint_every, chunksize=chunksize)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica ripresa da checkpoint con descrizioni su più righe")
+    parser.add_argument('--rows', type=int, default=25)
+    parser.add_argument('--crash-row', type=int, default=6)
+    parser.add_argument('--checkpoint-every', type=int, default=3)
+    parser.add_argument('--chunksize', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        csv_file, mapping_file = write_catalogue(folder, args.rows)
+        cache_file = os.path.join(folder, 'cache.pkl')
+        full_output = os.path.join(folder, 'completo.nt')
+        resumed_output = os.path.join(folder, 'ripreso.nt')
+
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            completed = run(csv_file, mapping_file, full_output, cache_file, args.checkpoint_every, args.chunksize)
+            crashed = run(csv_file, mapping_file, resumed_output, cache_file, args.checkpoint_every, args.chunksize,
+                          crash_inventory=f"{100 + args.crash_row}/A")
+            checkpoint_left = os.path.exists(checkpoint_paths(resumed_output)[0])
+            resumed = run(csv_file, mapping_file, resumed_output, cache_file, args.checkpoint_every, args.chunksize,
+                          resume=True)
+
+        if not completed or crashed or not checkpoint_left or not resumed:
+            print(log.getvalue())
+            print(f"ERRORE: completo={completed}, interrotto={crashed}, checkpoint={checkpoint_left}, ripreso={resumed}")
+            sys.exit(1)
+
+        full_graph, resumed_graph = Graph(), Graph()
+        full_graph.parse(full_output, format='nt')
+        resumed_graph.parse(resumed_output, format='nt')
+        descriptions = {str(o) for o in resumed_graph.objects() if isinstance(o, Literal) and '\n' in o}
+
+        print(f"Triple elaborazione completa: {len(full_graph)}")
+        print(f"Triple dopo interruzione alla riga {args.crash_row} e ripresa: {len(resumed_graph)}")
+        print(f"Descrizioni su più righe nell'output ripreso: {len(descriptions)}/{args.rows}")
+        if set(full_graph) != set(resumed_graph) or descriptions != {description(i) for i in range(args.rows)}:
+            print("ERRORE: l'output ripreso non coincide con l'elaborazione completa")
+            sys.exit(1)
+        print("OK: ripresa da checkpoint equivalente all'elaborazione completa")
+
+
+if __name__ == "__main__":
+    main()
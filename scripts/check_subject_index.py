@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Verifica della lettura per soggetto di nt_index con literal "difficili".
+
+Scrive un piccolo grafo con write_subject_sorted_ntriples (come --index), le cui
+descrizioni contengono caratteri che il serializer N-Triples non fa escape ma che
+str.splitlines() tratta come fine riga (U+2028, U+2029, U+0085, U+000B, U+000C, U+001C...),
+costruisce l'indice e controlla che SubjectIndex restituisca per ogni veicolo
+esattamente le sue triple, una per riga.
+
+Uso:
+    python scripts/check_subject_index.py [--vehicles 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDFS
+
+from nt_index import SubjectIndex, build_subject_index, write_subject_sorted_ntriples
+
+EX = Namespace("http://example.org/")
+WDT = Namespace("http://www.wikidata.org/prop/direct/")
+LINE_LIKE_CHARACTERS = '\u2028\u2029\x85\x0b\x0c\x1c\x1d\x1e'
+
+
+def description(i: int) -> str:
+    """Testo con tutti i caratteri che splitlines() considera fine riga (tranne \\n e \\r)."""
+    return f"Vettura {i}" + ''.join(f" parte{n}{char}" for n, char in enumerate(LINE_LIKE_CHARACTERS)) + " fine."
+
+
+def build_graph(vehicles: int) -> Graph:
+    graph = Graph()
+    for i in range(vehicles):
+        subject = EX[f"vehicle_{100 + i}A"]
+        graph.add((subject, WDT.P217, Literal(f"{100 + i}/A")))
+        graph.add((subject, RDFS.comment, Literal(description(i))))
+        graph.add((subject, WDT.P176, URIRef(f"http://www.wikidata.org/entity/Q{i + 1}")))
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verifica SubjectIndex con literal contenenti separatori Unicode")
+    parser.add_argument('--vehicles', type=int, default=20)
+    args = parser.parse_args()
+
+    graph = build_graph(args.vehicles)
+    with tempfile.TemporaryDirectory() as folder:
+        nt_file = os.path.join(folder, 'indicizzato.nt')
+        write_subject_sorted_ntriples(graph, nt_file)
+        build_subject_index(nt_file)
+
+        errors = []
+        with SubjectIndex(nt_file) as index:
+            for i in range(args.vehicles):
+                subject = index.vehicle_subject(f"{100 + i}/A")
+                lines = index.vehicle_triples(f"{100 + i}/A")
+                expected = set(graph.triples((URIRef(subject), None, None)))
+                if len(lines) != len(expected):
+                    errors.append(f"{subject}: {len(lines)} righe per {len(expected)} triple")
+                    continue
+                parsed = Graph()
+                parsed.parse(data='\n'.join(lines), format='nt')
+                if set(parsed) != expected:
+                    errors.append(f"{subject}: triple diverse da quelle del grafo")
+
+    print(f"Veicoli controllati: {args.vehicles} ({len(graph)} triple)")
+    if errors:
+        for error in errors[:10]:
+            print(f"  {error}")
+        print("ERRORE: le righe restituite da SubjectIndex non coincidono con le triple del grafo")
+        sys.exit(1)
+    print("OK: ogni veicolo restituisce le sue triple, una per riga")
+
+
+if __name__ == "__main__":
+    main()
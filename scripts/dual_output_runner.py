@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Generazione in un solo passaggio dei due grafi RDF del museo.
+
+La V1 (scripts/, entity linking) e la V2 (new_scripts/, tutti i literal come IRI)
+leggono lo stesso CSV e cercano in gran parte gli stessi valori su Wikidata.
+Questo runner legge il CSV una volta sola con la V1 e le collega la V2 come
+emitter aggiuntivo (V2GraphEmitter). Le due versioni usano soglie di confidenza
+diverse, quindi ognuna mantiene il proprio linker e la propria cache dei
+risultati, ma i linker condividono response_cache: ogni ricerca e ogni dettaglio
+di entità viene chiesto a Wikidata una sola volta e i due grafi restano identici
+a quelli delle esecuzioni separate.
+
+Uso:
+    python scripts/dual_output_runner.py [--deadline S] [--chunksize N]
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
+
+from integrated_semantic_enricher import AdvancedSemanticEnricher
+from robust_wikidata_linker import WikidataEntityLinker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+V2_MODULE_FILE = os.path.join(ROOT, "new_scripts", "integrated_semantic_enricher.py")
+
+
+def load_v2_module():
+    """
+    Importa l'enricher V2 con un nome distinto da quello della V1.
+
+    Entrambe le versioni importano un modulo museum_mappings con lo stesso nome
+    ma contenuto diverso: durante l'import della V2 quello della V1 viene tolto
+    da sys.modules (così la V2 carica new_scripts/museum_mappings.py) e poi ripristinato.
+    """
+    v1_mappings = sys.modules.pop('museum_mappings', None)
+    try:
+        spec = importlib.util.spec_from_file_location('integrated_semantic_enricher_v2', V2_MODULE_FILE)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[spec.name] = module
+        spec.loader.exec_module(module)
+    finally:
+        if v1_mappings is not None:
+            sys.modules['museum_mappings'] = v1_mappings
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera i grafi RDF V1 e V2 con un solo passaggio sul CSV")
+    parser.add_argument('--deadline', type=float, default=None,
+                        help="secondi massimi di linking per valore (solo V1, vedi backfill)")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="legge il CSV a blocchi di N righe, come stringhe")
+    args = parser.parse_args()
+
+    csv_file = os.path.join(ROOT, "data", "museo.csv")
+    mapping_file = os.path.join(ROOT, "data", "museum_column_mapping.csv")
+    output_file = os.path.join(ROOT, "output", "output_automatic_enriched.nt")
+    output_file_v2 = os.path.join(ROOT, "output", "output_automatic_enriched_v2.nt")
+
+    v2 = load_v2_module()
+
+    enricher = AdvancedSemanticEnricher(use_wikidata_api=True,
+                                        cache_file=os.path.join(ROOT, "caches", "production_cache.pkl"),
+                                        link_deadline=args.deadline)
+    cache_file_v2 = os.path.join(ROOT, "caches", "production_cache_v2.pkl")
+    linker_v2 = WikidataEntityLinker(cache_file=cache_file_v2,
+                                     ontology_config_file=os.path.join(ROOT, "data", "wikidata_ontology_config.json"),
+                                     response_cache=enricher.wikidata_linker.response_cache)
+    enricher_v2 = v2.AdvancedSemanticEnricherV2(use_wikidata_api=True, cache_file=cache_file_v2,
+                                                convert_to_iris=True, wikidata_linker=linker_v2,
+                                                iri_registry_file=os.path.join(ROOT, v2.IRI_REGISTRY_FILE))
+    emitter_v2 = v2.V2GraphEmitter(enricher_v2, mapping_file, output_file_v2)
+
+    success = enricher.process_csv_to_rdf(csv_file, mapping_file, output_file, chunksize=args.chunksize,
+                                          emitters=[emitter_v2])
+
+    if success:
+        print("\nGenerazione RDF V1 + V2 completata con successo!")
+        print(f"Output V1: {output_file}")
+        print(f"Output V2: {output_file_v2}")
+    else:
+        print("\nErrore nella generazione RDF!")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,17 +4,134 @@ Genera report completi su:
 - Proprietà Wikidata utilizzate (P-codes)
 - Entità Wikidata linkate (Q-codes)
 - Statistiche di utilizzo
+
+Il file viene letto in streaming (anche compresso .gz): ogni riga è divisa una
+sola volta in soggetto, predicato e oggetto con un unico pattern precompilato.
+Più file, o parti di un file grande, sono analizzati in parallelo da un pool di
+processi e i contatori vengono sommati alla fine. Per i valori di ogni proprietà
+si tengono solo riassunti a memoria costante (value_sketches.py): campione
+casuale, numero stimato di valori distinti e valori più frequenti.
+
+Uso:
+    python scripts/extract_wikidata_attributes.py [file.nt file2.nt.gz ...] [--workers N]
 """
 
+import argparse
+import gzip
+import os
 import re
 import json
-import requests
 from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import Dict, List, Optional, Tuple
+
+from label_resolver import LabelResolver
+from value_sketches import ValueSummary
+
+# Soggetto, predicato e oggetto di una riga N-Triples (il " ." finale è escluso).
+# Si lavora sui byte: si decodificano solo P-code, Q-code e valori di esempio.
+TRIPLE_PATTERN = re.compile(rb'(\S+)\s+(\S+)\s+(.*\S)\s*\.\s*$')
+ENTITY_MARKER = b'wikidata.org/entity/Q'
+ENTITY_PATTERN = re.compile(rb'wikidata\.org/entity/(Q\d+)')
+PROPERTY_PREFIX = b'<http://www.wikidata.org/prop/direct/'
+# Valori mostrati nel report per proprietà (esempi e più frequenti)
+REPORT_VALUES = 10
+# Dimensione minima di una parte di file assegnata a un processo
+MIN_SHARD_BYTES = 32 * 1024 * 1024
+
+
+def _open_lines(filepath: str):
+    """Apre il file in binario, decomprimendo al volo se è .gz."""
+    if str(filepath).endswith('.gz'):
+        return gzip.open(filepath, 'rb')
+    return open(filepath, 'rb')
+
+
+def _iter_shard_lines(filepath: str, start: int = 0, end: Optional[int] = None):
+    """Righe che iniziano nell'intervallo di byte [start, end) del file (tutto il file se end è None)."""
+    with _open_lines(filepath) as f:
+        if end is None:
+            yield from f
+            return
+        position = start
+        if start > 0:
+            # La riga a cavallo del confine appartiene alla parte precedente
+            f.seek(start - 1)
+            position += len(f.readline()) - 1
+        while position < end:
+            line = f.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line
+
+
+def scan_ntriples(task: Tuple[str, int, Optional[int]]) -> Dict:
+    """
+    Analizza una parte di file N-Triples (path, inizio, fine) in un solo passaggio.
+
+    Returns:
+        Dict con triple, Counter di proprietà ed entità e ValueSummary dei valori per proprietà
+    """
+    filepath, start, end = task
+    properties = Counter()
+    entities = Counter()
+    summaries: Dict[bytes, ValueSummary] = {}
+    triples = 0
+    prefix_length = len(PROPERTY_PREFIX)
+
+    for line in _iter_shard_lines(filepath, start, end):
+        match = TRIPLE_PATTERN.match(line)
+        if match is None:
+            continue  # righe vuote e commenti
+        triples += 1
+        subject, predicate, obj = match.groups()
+
+        if predicate.startswith(PROPERTY_PREFIX):
+            p_code = predicate[prefix_length:-1]
+            properties[p_code] += 1
+            summary = summaries.get(p_code)
+            if summary is None:
+                summary = summaries[p_code] = ValueSummary()
+            summary.add(obj)
+
+        if ENTITY_MARKER in subject:
+            for q_code in ENTITY_PATTERN.findall(subject):
+                entities[q_code] += 1
+        if ENTITY_MARKER in obj:
+            for q_code in ENTITY_PATTERN.findall(obj):
+                entities[q_code] += 1
+
+    return {
+        'triples': triples,
+        'properties': Counter({p.decode('utf-8'): n for p, n in properties.items()}),
+        'entities': Counter({q.decode('utf-8'): n for q, n in entities.items()}),
+        'summaries': {p.decode('utf-8'): summary for p, summary in summaries.items()}
+    }
+
+
+def _clean_value(value: bytes, width: int) -> str:
+    """Valore N-Triples leggibile per il report (senza virgolette e xsd:string), troncato a width."""
+    clean_value = value.decode('utf-8').replace('"^^<http://www.w3.org/2001/XMLSchema#string>', '')
+    clean_value = clean_value.replace('"', '').strip()
+    if len(clean_value) > width:
+        clean_value = clean_value[:width - 3] + "..."
+    return clean_value
+
+
+def _shard_tasks(filepath: str, workers: int) -> List[Tuple[str, int, Optional[int]]]:
+    """Divide un file non compresso in parti di byte per il pool; i .gz restano interi."""
+    size = os.path.getsize(filepath)
+    shards = min(workers, size // MIN_SHARD_BYTES)
+    if str(filepath).endswith('.gz') or shards <= 1:
+        return [(str(filepath), 0, None)]
+    step = size // shards
+    bounds = [i * step for i in range(shards)] + [size]
+    return [(str(filepath), bounds[i], bounds[i + 1]) for i in range(shards)]
 
 class WikidataExtractor:
-    def __init__(self, tesi_folder: str = None):
+    def __init__(self, tesi_folder: str = None, offline: bool = False):
         if tesi_folder is None:
             # Auto-detect: lo script è in scripts/, quindi il progetto è ../
             script_path = Path(__file__).resolve()
@@ -24,10 +141,14 @@ class WikidataExtractor:
             
         self.properties = Counter()  # P-codes
         self.entities = Counter()  # Q-codes
-        self.property_values = defaultdict(list)  # P-code -> list of values
+        self.property_stats: Dict[str, ValueSummary] = {}  # P-code -> riassunto dei valori
         self.entity_labels = {}  # Q-code -> label from cache
         self.property_descriptions = {}
         
+        # Etichette P/Q da Wikidata con cache su disco (offline: solo cache)
+        self.label_resolver = LabelResolver(
+            str(self.tesi_folder / 'caches' / 'wikidata_labels.json'), offline=offline)
+        
         # Carica descrizioni proprietà Wikidata conosciute
         self._load_property_descriptions()
         
@@ -53,48 +174,15 @@ class WikidataExtractor:
         }
     
     def fetch_property_labels_from_wikidata(self, property_codes: List[str]) -> Dict[str, str]:
-        """Recupera le etichette delle proprietà dall'API di Wikidata"""
+        """Recupera le etichette delle proprietà (cache su disco, poi API di Wikidata)"""
         if not property_codes:
             return {}
         
         print(f"\nRecupero etichette per {len(property_codes)} proprietà da Wikidata...")
+        resolved = self.label_resolver.resolve(property_codes)
+        labels = {p_code: resolved.get(p_code, 'Sconosciuta') for p_code in property_codes}
         
-        labels = {}
-        # Wikidata API endpoint
-        url = "https://www.wikidata.org/w/api.php"
-        
-        # Dividi in batch di 50 (limite API)
-        batch_size = 50
-        for i in range(0, len(property_codes), batch_size):
-            batch = property_codes[i:i+batch_size]
-            
-            params = {
-                'action': 'wbgetentities',
-                'ids': '|'.join(batch),
-                'props': 'labels',
-                'languages': 'en',
-                'format': 'json'
-            }
-            
-            try:
-                response = requests.get(url, params=params, timeout=10)
-                response.raise_for_status()
-                data = response.json()
-                
-                if 'entities' in data:
-                    for prop_id, prop_data in data['entities'].items():
-                        if 'labels' in prop_data and 'en' in prop_data['labels']:
-                            labels[prop_id] = prop_data['labels']['en']['value']
-                        else:
-                            labels[prop_id] = 'Sconosciuta'
-                            
-            except requests.exceptions.RequestException as e:
-                print(f"   ATTENZIONE: Errore nel recupero batch: {e}")
-                # Segna come sconosciute
-                for prop_id in batch:
-                    labels[prop_id] = 'Sconosciuta'
-        
-        print(f"   > Recuperate {len([v for v in labels.values() if v != 'Sconosciuta'])} etichette")
+        print(f"   > Recuperate {len(resolved)} etichette")
         return labels
     
     def _ensure_all_property_labels(self):
@@ -104,53 +192,77 @@ class WikidataExtractor:
         if missing:
             fetched = self.fetch_property_labels_from_wikidata(missing)
             self.property_descriptions.update(fetched)
+            self.label_resolver.save()
     
-    def extract_from_nt_file(self, filepath: Path) -> Dict:
-        """Estrae proprietà ed entità da un file .nt"""
-        print(f"\nAnalizzando: {filepath}")
-        
-        local_props = Counter()
-        local_entities = Counter()
-        triples_count = 0
-        
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    if line.strip():
-                        triples_count += 1
-                        
-                        # Estrai proprietà Wikidata (P-codes)
-                        p_codes = re.findall(r'wikidata\.org/prop/direct/(P\d+)', line)
-                        for p_code in p_codes:
-                            local_props[p_code] += 1
-                            self.properties[p_code] += 1
-                            
-                            # Estrai il valore associato
-                            value_match = re.search(r'<http://www\.wikidata\.org/prop/direct/' + p_code + r'>\s+(.+?)\s+\.', line)
-                            if value_match:
-                                value = value_match.group(1)
-                                self.property_values[p_code].append(value)
-                        
-                        # Estrai entità Wikidata (Q-codes)
-                        q_codes = re.findall(r'wikidata\.org/entity/(Q\d+)', line)
-                        for q_code in q_codes:
-                            local_entities[q_code] += 1
-                            self.entities[q_code] += 1
-            
-            print(f"   > {triples_count} triple analizzate")
+    def _merge_scan(self, result: Dict, local_props: Counter, local_entities: Counter):
+        """Somma il risultato di una parte ai contatori globali e a quelli del file."""
+        local_props.update(result['properties'])
+        local_entities.update(result['entities'])
+        self.properties.update(result['properties'])
+        self.entities.update(result['entities'])
+        for p_code, summary in result['summaries'].items():
+            if p_code in self.property_stats:
+                self.property_stats[p_code].merge(summary)
+            else:
+                self.property_stats[p_code] = summary
+
+    def extract_from_nt_files(self, filepaths: List[Path], workers: Optional[int] = None) -> Dict:
+        """
+        Estrae proprietà ed entità da più file .nt (o .nt.gz), in parallelo su un pool di processi.
+
+        I file non compressi più grandi sono divisi in parti di byte; i contatori
+        di ogni parte vengono sommati alla fine.
+        """
+        workers = workers or os.cpu_count() or 1
+        existing = []
+        seen = set()
+        for filepath in filepaths:
+            print(f"\nAnalizzando: {filepath}")
+            if not os.path.exists(filepath):
+                print(f"   ERRORE: File non trovato: {filepath}")
+                continue
+            # Lo stesso file indicato due volte (o con percorsi diversi) si conta una volta sola
+            resolved = os.path.realpath(filepath)
+            if resolved in seen:
+                print(f"   ATTENZIONE: File già analizzato, ignorato: {filepath}")
+                continue
+            seen.add(resolved)
+            existing.append(filepath)
+
+        tasks = [task for filepath in existing for task in _shard_tasks(filepath, workers)]
+        if len(tasks) > 1 and workers > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+                results = list(pool.map(scan_ntriples, tasks))
+        else:
+            results = [scan_ntriples(task) for task in tasks]
+
+        totals = {'triples': 0, 'properties': Counter(), 'entities': Counter()}
+        for filepath in existing:
+            local_props = Counter()
+            local_entities = Counter()
+            triples_count = 0
+            for task, result in zip(tasks, results):
+                if task[0] == str(filepath):
+                    triples_count += result['triples']
+                    self._merge_scan(result, local_props, local_entities)
+
+            print(f"   > {filepath}: {triples_count} triple analizzate")
             print(f"   > {len(local_props)} proprietà uniche trovate")
             print(f"   > {len(local_entities)} entità uniche trovate")
-            
-            return {
-                'triples': triples_count,
-                'properties': dict(local_props),
-                'entities': dict(local_entities)
-            }
-            
-        except FileNotFoundError:
-            print(f"   ERRORE: File non trovato: {filepath}")
-            return {'triples': 0, 'properties': {}, 'entities': {}}
-    
+            totals['triples'] += triples_count
+            totals['properties'].update(local_props)
+            totals['entities'].update(local_entities)
+
+        return {
+            'triples': totals['triples'],
+            'properties': dict(totals['properties']),
+            'entities': dict(totals['entities'])
+        }
+
+    def extract_from_nt_file(self, filepath: Path, workers: Optional[int] = None) -> Dict:
+        """Estrae proprietà ed entità da un file .nt (o .nt.gz)"""
+        return self.extract_from_nt_files([filepath], workers=workers)
+
     def load_entity_labels_from_cache(self):
         """Carica le etichette delle entità dalla cache"""
         cache_file = self.tesi_folder / 'caches' / 'production_cache_entities.json'
@@ -171,21 +283,34 @@ class WikidataExtractor:
             
         except FileNotFoundError:
             print(f"\nATTENZIONE: Cache non trovata: {cache_file}")
+        
+        # Entità linkate ma assenti dalla cache dell'enricher: etichetta da Wikidata
+        missing = [q for q in self.entities if q not in self.entity_labels]
+        if missing:
+            resolved = self.label_resolver.resolve(missing)
+            for q_code, label in resolved.items():
+                self.entity_labels[q_code] = {'label': label, 'original_value': '', 'type': ''}
+            self.label_resolver.save()
+            print(f"Etichette recuperate per {len(resolved)}/{len(missing)} entità non in cache")
     
-    def analyze_output_automatic_enriched(self):
-        """Analizza solo il file output_automatic_enriched.nt"""
+    def analyze_output_automatic_enriched(self, input_files: Optional[List[str]] = None,
+                                          workers: Optional[int] = None):
+        """Analizza output_automatic_enriched.nt (o i file indicati)"""
         print("=" * 80)
         print("ESTRAZIONE ATTRIBUTI WIKIDATA - output_automatic_enriched.nt")
         print("=" * 80)
         
         # Analizza solo il file target
-        output_file = self.tesi_folder / 'output' / 'output_automatic_enriched.nt'
+        output_files = [Path(f) for f in input_files] if input_files else \
+            [self.tesi_folder / 'output' / 'output_automatic_enriched.nt']
         
-        if not output_file.exists():
-            print(f"\nERRORE: Il file non esiste: {output_file}")
+        missing = [f for f in output_files if not f.exists()]
+        if missing:
+            for output_file in missing:
+                print(f"\nERRORE: Il file non esiste: {output_file}")
             return {}
         
-        result = self.extract_from_nt_file(output_file)
+        result = self.extract_from_nt_files(output_files, workers=workers)
         
         # Carica le etichette
         self.load_entity_labels_from_cache()
@@ -213,17 +338,13 @@ class WikidataExtractor:
             print(f"  URL: {url}")
             print(f"  Occorrenze: {count}")
             
-            # Mostra alcuni esempi di valori
-            values = self.property_values.get(p_code, [])
-            unique_values = list(set(values))[:3]
-            if unique_values:
+            # Mostra alcuni esempi di valori (dal campione casuale)
+            summary = self.property_stats.get(p_code)
+            if summary is not None:
+                print(f"  Valori distinti (stima): {summary.distinct_count()}")
                 print(f"  Esempi:")
-                for value in unique_values:
-                    clean_value = value.replace('"^^<http://www.w3.org/2001/XMLSchema#string>', '')
-                    clean_value = clean_value.replace('"', '').strip()
-                    if len(clean_value) > 70:
-                        clean_value = clean_value[:67] + "..."
-                    print(f"    - {clean_value}")
+                for value in summary.examples(3):
+                    print(f"    - {_clean_value(value, 70)}")
             print()
     
     def generate_report(self, output_file: str = None):
@@ -262,23 +383,25 @@ class WikidataExtractor:
             
             for p_code in sorted(self.properties.keys()):
                 description = self.property_descriptions.get(p_code, 'Sconosciuta')
-                values = self.property_values.get(p_code, [])
+                summary = self.property_stats.get(p_code)
                 
                 f.write(f"\n{p_code} - {description}\n")
                 f.write("-" * 100 + "\n")
+                if summary is None:
+                    continue
+                
+                f.write(f"  Occorrenze: {summary.count}, valori distinti (stima): {summary.distinct_count()}\n")
                 
-                # Mostra primi 10 esempi unici
-                unique_values = list(set(values))[:10]
-                for value in unique_values:
-                    # Pulisci il valore per la visualizzazione
-                    clean_value = value.replace('"^^<http://www.w3.org/2001/XMLSchema#string>', '')
-                    clean_value = clean_value.replace('"', '').strip()
-                    if len(clean_value) > 80:
-                        clean_value = clean_value[:77] + "..."
-                    f.write(f"  - {clean_value}\n")
+                # Valori più frequenti (conteggi per eccesso, errore massimo tra parentesi)
+                f.write(f"  Valori più frequenti:\n")
+                for value, count, error in summary.top_values.top(REPORT_VALUES):
+                    margin = f" (±{error})" if error else ""
+                    f.write(f"    {count:>8}{margin:<10} {_clean_value(value, 70)}\n")
                 
-                if len(values) > 10:
-                    f.write(f"  ... e altri {len(values) - 10} valori\n")
+                # Campione casuale di esempi unici
+                f.write(f"  Esempi (campione casuale):\n")
+                for value in summary.examples(REPORT_VALUES):
+                    f.write(f"    - {_clean_value(value, 80)}\n")
             
             # Sezione 3: Entità Wikidata (Q-codes)
             f.write("\n\n" + "=" * 100 + "\n")
@@ -348,6 +471,20 @@ class WikidataExtractor:
         print(f"\nReport salvato in: {report_path.absolute()}")
         return report_path
     
+    def _summary_to_json(self, p_code: str) -> Dict:
+        """Esempi, distinti stimati e valori più frequenti di una proprietà per l'export JSON"""
+        summary = self.property_stats.get(p_code)
+        if summary is None:
+            return {'examples': [], 'distinct_values_estimate': 0, 'top_values': []}
+        return {
+            'examples': [value.decode('utf-8') for value in summary.examples(REPORT_VALUES)],
+            'distinct_values_estimate': summary.distinct_count(),
+            'top_values': [
+                {'value': value.decode('utf-8'), 'count': count, 'max_error': error}
+                for value, count, error in summary.top_values.top(REPORT_VALUES)
+            ]
+        }
+    
     def export_to_json(self, output_file: str = None):
         """Esporta i dati in formato JSON"""
         if output_file is None:
@@ -361,7 +498,7 @@ class WikidataExtractor:
                     'count': count,
                     'description': self.property_descriptions.get(p_code, 'Sconosciuta'),
                     'url': f'https://www.wikidata.org/wiki/Property:{p_code}',
-                    'examples': list(set(self.property_values.get(p_code, [])))[:10]
+                    **self._summary_to_json(p_code)
                 }
                 for p_code, count in self.properties.items()
             },
@@ -392,13 +529,22 @@ class WikidataExtractor:
 
 def main():
     """Funzione principale"""
+    parser = argparse.ArgumentParser(description="Estrazione attributi Wikidata da file N-Triples")
+    parser.add_argument('input_files', nargs='*',
+                        help="file .nt o .nt.gz da analizzare (default: output/output_automatic_enriched.nt)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processi di analisi (default: CPU disponibili)")
+    parser.add_argument('--offline', action='store_true',
+                        help="etichette solo dalla cache su disco, senza chiamate a Wikidata")
+    args = parser.parse_args()
+
     print("\nAvvio estrazione attributi Wikidata...\n")
     
     # Crea l'estrattore (auto-detect del path del progetto)
-    extractor = WikidataExtractor()
+    extractor = WikidataExtractor(offline=args.offline)
     
-    # Analizza solo output_automatic_enriched.nt
-    result = extractor.analyze_output_automatic_enriched()
+    # Analizza output_automatic_enriched.nt o i file indicati
+    result = extractor.analyze_output_automatic_enriched(args.input_files, workers=args.workers)
     
     if result.get('triples', 0) == 0:
         print("\nNessun dato estratto. Uscita.")
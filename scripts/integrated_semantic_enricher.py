@@ -21,16 +21,29 @@ import sys
 import os
 import csv
 import json
+import time
+import argparse
+import threading
 import pandas as pd
 import glob
-from typing import Dict, Optional, List
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, List, Tuple
 # Aggiungi la directory scripts al path per importare il linker E i mappings
 sys.path.insert(0, os.path.join(os.path.dirname(__file__)))
 
-from robust_wikidata_linker import WikidataEntityLinker
+from robust_wikidata_linker import (
+    WikidataEntityLinker, VEHICLE_CACHE_PREFIX, MISS_DEADLINE, MISS_ERROR, canonicalize_cache_key, legacy_cache_key,
+    rekey_entity_cache
+)
 import museum_mappings  # Importa i mappings personalizzati
+from negative_cache import NegativeResultCache, DEFAULT_NEGATIVE_TTL
+from triple_store import export_graph, load_ntriples
+from nt_index import write_subject_sorted_ntriples, build_subject_index, index_path
+from nt_sort import is_sorted_ntriples, external_sort_ntriples
 from rdflib import Graph, URIRef, Literal, Namespace
 from rdflib.namespace import RDF, RDFS, XSD
+from rdflib.util import from_n3
 import re
 
 # Namespace
@@ -39,6 +52,40 @@ SCHEMA = Namespace("https://schema.org/")  # HTTPS per Schema.org
 WD = Namespace("http://www.wikidata.org/entity/")
 WDT = Namespace("http://www.wikidata.org/prop/direct/")
 
+# Predicato fittizio con cui le ricerche Marca + Modello vengono registrate nella cache negativa
+VEHICLE_SEARCH_PREDICATE = 'vehicle'
+
+# Concorrenza massima verso l'API Wikidata durante il prewarm delle cache
+PREWARM_MAX_WORKERS = 4
+PREWARM_NETWORK_ERROR = 'errore di rete (da ritentare)'
+
+
+# Righe (veicoli) elaborate tra due checkpoint di process_csv_to_rdf
+CHECKPOINT_EVERY = 10
+
+# Origine delle voci di cache caricate da disco (report di riuso tra collezioni in batch)
+PERSISTENT_CACHE_ORIGIN = 'cache persistente'
+
+# Colonne lette anche senza mapping: servono per subject, fallback IRI e ricerca veicolo
+CATALOGUE_KEY_COLUMNS = ('N. inventario', 'Marca', 'Modello', 'Anno')
+
+# Connettori tra più entità nello stesso valore: virgole, " e ", "&", ";", "/", "per", a capo
+ENTITY_SEPARATOR_PATTERN = re.compile(r'\s*(?:,| e | & |;|/|\bper\b|\n)\s*')
+
+# Parole chiave di donazione come alternanza regex (stesse di museum_mappings.is_donation)
+DONATION_PATTERN = '|'.join(re.escape(k) for k in museum_mappings.MappingClassifier.DONATION_KEYWORDS)
+
+
+def backfill_queue_path(output_file: str) -> str:
+    """File della coda di backfill associata a un output RDF (valori rinviati per scadenza)."""
+    return os.path.splitext(output_file)[0] + '_backfill.json'
+
+
+def checkpoint_paths(output_file: str) -> Tuple[str, str]:
+    """File di checkpoint (stato JSON) e triple parziali (N-Triples in append) di un output RDF."""
+    base = os.path.splitext(output_file)[0]
+    return base + '_checkpoint.json', base + '_partial.nt'
+
 class AdvancedSemanticEnricher:
     """
     Sistema avanzato di arricchimento semantico che combina:
@@ -47,7 +94,8 @@ class AdvancedSemanticEnricher:
     - IRI personalizzati
     """
     
-    def __init__(self, use_wikidata_api=True, cache_file="advanced_enricher_cache.pkl"):
+    def __init__(self, use_wikidata_api=True, cache_file="advanced_enricher_cache.pkl",
+                 negative_cache_ttl=DEFAULT_NEGATIVE_TTL, link_deadline=None):
         # Percorsi assoluti basati sulla posizione dello script
         _root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         if not os.path.isabs(cache_file):
@@ -58,17 +106,37 @@ class AdvancedSemanticEnricher:
         
         # Cache dinamico entità risolte (si espande automaticamente)
         self.entity_cache_file = cache_file.replace('.pkl', '_entities.json') if cache_file else 'entity_cache.json'
+        self._legacy_entity_keys = set()
+        self.canonical_cache_hits = 0
+        self._entity_cache_lock = threading.Lock()  # scritture concorrenti durante il prewarm
         self.entity_cache = self._load_entity_cache()
         
+        # Cache negativa dei valori non risolti (con motivo e TTL in secondi)
+        negative_cache_file = cache_file.replace('.pkl', '_negative.json') if cache_file else 'negative_cache.json'
+        self.negative_cache = NegativeResultCache(negative_cache_file, ttl=negative_cache_ttl)
+        self.negative_cache_hits = 0
+        
+        # Tempo massimo (secondi) per il linking di un singolo valore; None = nessun limite.
+        # I valori che scadono restano literal e finiscono nella coda di backfill.
+        self.link_deadline = link_deadline
+        self._cell_deferred = False
+        
+        # Namespace dei subject (veicoli); in batch ogni collezione usa il proprio
+        self.namespace = EX
+        # Collezione in elaborazione e origine delle voci di cache (chiave -> collezione)
+        self.current_collection = None
+        self._cache_origin = {}
+        self.cache_hit_origins = Counter()
+        
         print(f"Cache entità caricato: {len(self.entity_cache)} entità precedentemente risolte")
+        print(f"Cache negativa caricata: {len(self.negative_cache)} valori non risolti")
     
     def split_entities(self, value: str):
         """
         Divide valori con più entità (persone, designer, etc.) separati da connettori.
         """
-        import re
         # divide su virgole, " e ", "&", ";", "/", "per", e A CAPO
-        parts = re.split(r'\s*(?:,| e | & |;|/|\bper\b|\n)\s*', value)
+        parts = ENTITY_SEPARATOR_PATTERN.split(value)
         # pulisce spazi vuoti e rimuove parti troppo corte o generiche
         entities = []
         for p in parts:
@@ -101,29 +169,9 @@ class AdvancedSemanticEnricher:
         
         # 2. Entity linking automatico SOLO per proprietà che devono essere IRI (guidato da mappings)
         if self._should_create_iri_by_mapping(predicate_str):
-            
-            # NUOVO: Gestione multiple entità (persone, designer, etc.)
-            if museum_mappings.is_multiple_entities_predicate(predicate_str):
-                entities = self.split_entities(value)
-                if len(entities) > 1:
-                    # Multiple entità trovate - processale separatamente
-                    entity_results = []
-                    for entity_name in entities:
-                        entity_result = self._process_single_entity(entity_name, predicate_str)
-                        if entity_result:
-                            entity_results.append(entity_result)
-                    
-                    if entity_results:
-                        return {
-                            'action': 'create_multiple_entities', 
-                            'original_value': value,
-                            'entities': entity_results
-                        }
-            
-            # Processo singola entità (logica originale)
-            single_result = self._process_single_entity(value, predicate_str)
-            if single_result:
-                return single_result
+            linked = self._link_value(value, predicate_str)
+            if linked:
+                return linked
         
         # 3. NON creare custom IRI - se non trovato su Wikidata, resta literal
         # Gli unici custom IRI sono i veicoli (subject)
@@ -131,6 +179,34 @@ class AdvancedSemanticEnricher:
         # 4. Mantieni originale
         return {'action': 'keep_original', 'value': value}
     
+    def _link_value(self, value: str, predicate_str: str, multi_candidate: bool = True) -> Optional[Dict]:
+        """
+        Entity linking di un valore già classificato come collegabile.
+        
+        multi_candidate: False se il valore non contiene separatori di entità
+        (precalcolato da _classify_columns), così split_entities viene saltato.
+        """
+        # NUOVO: Gestione multiple entità (persone, designer, etc.)
+        if multi_candidate and museum_mappings.is_multiple_entities_predicate(predicate_str):
+            entities = self.split_entities(value)
+            if len(entities) > 1:
+                # Multiple entità trovate - processale separatamente
+                entity_results = []
+                for entity_name in entities:
+                    entity_result = self._process_single_entity(entity_name, predicate_str)
+                    if entity_result:
+                        entity_results.append(entity_result)
+                
+                if entity_results:
+                    return {
+                        'action': 'create_multiple_entities', 
+                        'original_value': value,
+                        'entities': entity_results
+                    }
+        
+        # Processo singola entità (logica originale)
+        return self._process_single_entity(value, predicate_str)
+    
     def _process_single_entity(self, value: str, predicate_str: str):
         """
         Processa singola entità - logica estratta dal metodo principale.
@@ -148,6 +224,10 @@ class AdvancedSemanticEnricher:
                 'confidence': cached_result.get('confidence', 1.0)
             }
         
+        # Valore già noto come non risolvibile: salta la cascata finché la voce non scade
+        if self._is_known_miss(value, predicate_str):
+            return None
+        
         # Se non in cache, usa API Wikidata
         if self.wikidata_linker:
             # Determina tipo suggerito dai mappings
@@ -155,7 +235,8 @@ class AdvancedSemanticEnricher:
             
             # Chiama API con confidence più alta per evitare falsi positivi
             # PASSA il predicate_str per validazione ontologica stretta
-            api_result = self.wikidata_linker.find_best_entity(value, min_confidence=0.6, predicate_context=predicate_str)
+            api_result = self.wikidata_linker.find_best_entity(value, min_confidence=0.6, predicate_context=predicate_str,
+                                                               deadline=self._new_deadline())
             if api_result:
                 
                 # Seleziona il tipo più appropriato da instance_of invece di usare solo il suggerito
@@ -178,39 +259,92 @@ class AdvancedSemanticEnricher:
                     'source': 'wikidata_api_new',
                     'confidence': api_result['confidence']
                 }
+            
+            self._record_miss(value, predicate_str)
         
         return None
     
+    def _new_deadline(self) -> Optional[float]:
+        """Istante limite (time.monotonic()) per il linking di un valore, se configurato."""
+        return time.monotonic() + self.link_deadline if self.link_deadline else None
+    
+    def _record_miss(self, value: str, predicate_str: str):
+        """
+        Registra un lookup fallito: i miss veri vanno nella cache negativa, quelli
+        interrotti per scadenza o per errori di rete (timeout, HTTP 429, ...) non
+        vengono mai salvati e marcano la cella corrente come da rinviare al backfill.
+        """
+        reason = self.wikidata_linker.last_miss_reason
+        if reason in (MISS_DEADLINE, MISS_ERROR):
+            self._cell_deferred = True
+        else:
+            self.negative_cache.add(value, predicate_str, reason)
+    
+    def _is_known_miss(self, value: str, predicate_str: str) -> bool:
+        """
+        Controlla la cache negativa. Se la voce è scaduta la rimuove (anche dalla
+        cache del linker) così il valore viene ritentato con una ricerca completa.
+        """
+        entry = self.negative_cache.get(value, predicate_str)
+        if entry is None:
+            return False
+        if not self.negative_cache.is_expired(entry):
+            self.negative_cache_hits += 1
+            return True
+        self.negative_cache.discard(value, predicate_str)
+        if self.wikidata_linker:
+            self.wikidata_linker.forget_miss(value, None if predicate_str == VEHICLE_SEARCH_PREDICATE else predicate_str)
+        return False
+    
     def _load_entity_cache(self):
-        """Carica cache dinamico delle entità risolte."""
+        """Carica cache dinamico delle entità risolte (chiavi ricalcolate in forma canonica)."""
         import json
         try:
             if os.path.exists(self.entity_cache_file):
                 with open(self.entity_cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                    cache = json.load(f)
+                self._legacy_entity_keys = {legacy_cache_key(entry.get('original_value', key))
+                                            for key, entry in cache.items()}
+                self._legacy_entity_keys.update(cache)
+                return rekey_entity_cache(cache)
         except Exception as e:
             print(f"Warning: Impossibile caricare cache entità: {e}")
         return {}
     
+    def _lookup_entity_cache(self, cache_key: str, legacy_key: str):
+        """Lookup sulla chiave canonica, contando i lookup risparmiati rispetto alla vecchia chiave."""
+        cached = self.entity_cache.get(cache_key)
+        if cached:
+            self.cache_hit_origins[self._cache_origin.get(cache_key, PERSISTENT_CACHE_ORIGIN)] += 1
+        if cached and legacy_key not in self._legacy_entity_keys:
+            self.canonical_cache_hits += 1
+            self._legacy_entity_keys.add(legacy_key)
+        return cached
+    
     def _check_entity_cache(self, value: str):
         """Controlla se valore è già risolto in cache."""
-        normalized = value.strip().lower()
-        return self.entity_cache.get(normalized)
+        return self._lookup_entity_cache(canonicalize_cache_key(value), legacy_cache_key(value))
     
     def _save_to_entity_cache(self, value: str, qid: str, entity_type: str, confidence: float, label: str = None):
         """Salva risultato in cache dinamico (si espande automaticamente)."""
-        import json
-        normalized = value.strip().lower()
-        
-        self.entity_cache[normalized] = {
-            'qid': qid,
-            'type': entity_type,
-            'confidence': confidence,
-            'original_value': value,
-            'label': label if label else value  # Salva label Wikidata o fallback a value
-        }
+        normalized = canonicalize_cache_key(value)
         
-        # Salva su disco immediatamente
+        with self._entity_cache_lock:
+            self._legacy_entity_keys.add(legacy_cache_key(value))
+            self._cache_origin[normalized] = self.current_collection
+            self.entity_cache[normalized] = {
+                'qid': qid,
+                'type': entity_type,
+                'confidence': confidence,
+                'original_value': value,
+                'label': label if label else value  # Salva label Wikidata o fallback a value
+            }
+            
+            # Salva su disco immediatamente
+            self._write_entity_cache()
+    
+    def _write_entity_cache(self, label: str = "entità"):
+        """Scrive la cache entità su disco (chiamare con _entity_cache_lock acquisito)."""
         try:
             # Crea la directory se non esiste
             cache_dir = os.path.dirname(self.entity_cache_file)
@@ -220,7 +354,7 @@ class AdvancedSemanticEnricher:
             with open(self.entity_cache_file, 'w', encoding='utf-8') as f:
                 json.dump(self.entity_cache, f, ensure_ascii=False, indent=2)
         except Exception as e:
-            print(f"Warning: Impossibile salvare cache entità: {e}")
+            print(f"Warning: Impossibile salvare cache {label}: {e}")
     
     def _should_create_custom_iri(self, value: str, predicate_str: str) -> bool:
         """
@@ -246,13 +380,13 @@ class AdvancedSemanticEnricher:
         """
         Usa i mappings del museo per determinare se mantenere literal.
         """
-        return predicate_str in museum_mappings.literal_only_properties
+        return museum_mappings.MAPPING_CLASSIFIER.is_literal_only(predicate_str)
     
     def _should_create_iri_by_mapping(self, predicate_str: str) -> bool:
         """
         Usa i mappings del museo per determinare se creare IRI.
         """
-        return predicate_str in museum_mappings.iri_target_properties
+        return museum_mappings.MAPPING_CLASSIFIER.is_iri_target(predicate_str)
     
 
     
@@ -285,9 +419,10 @@ class AdvancedSemanticEnricher:
         combined_query = f"{marca} {modello}"
         
         # Cache check
-        cache_key = f"vehicle:{combined_query.lower().strip()}"
-        if cache_key in self.entity_cache:
-            cached = self.entity_cache[cache_key]
+        cache_key = VEHICLE_CACHE_PREFIX + canonicalize_cache_key(combined_query)
+        legacy_key = VEHICLE_CACHE_PREFIX + legacy_cache_key(combined_query)
+        cached = self._lookup_entity_cache(cache_key, legacy_key)
+        if cached:
             return {
                 'qid': cached['qid'],
                 'label': cached.get('label', combined_query),
@@ -299,28 +434,29 @@ class AdvancedSemanticEnricher:
         if not self.wikidata_linker:
             return None
         
+        if self._is_known_miss(combined_query, VEHICLE_SEARCH_PREDICATE):
+            return None
+        
         print(f"  [VEHICLE SEARCH] Cercando veicolo: '{combined_query}'")
-        result = self.wikidata_linker.find_best_entity(combined_query, min_confidence=0.65)
+        result = self.wikidata_linker.find_best_entity(combined_query, min_confidence=0.65, deadline=self._new_deadline())
         
         if result and result.get('qid'):
-            # Salva in cache
-            self.entity_cache[cache_key] = {
-                'qid': result['qid'],
-                'label': result.get('label', combined_query),
-                'confidence': result['confidence'],
-                'original_value': combined_query
-            }
-            
-            # Salva su disco
-            try:
-                with open(self.entity_cache_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.entity_cache, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                print(f"Warning: Impossibile salvare cache veicoli: {e}")
+            # Salva in cache e su disco
+            with self._entity_cache_lock:
+                self._legacy_entity_keys.add(legacy_key)
+                self._cache_origin[cache_key] = self.current_collection
+                self.entity_cache[cache_key] = {
+                    'qid': result['qid'],
+                    'label': result.get('label', combined_query),
+                    'confidence': result['confidence'],
+                    'original_value': combined_query
+                }
+                self._write_entity_cache(label="veicoli")
             
             print(f"  [VEHICLE FOUND] {result['qid']} - {result.get('label', result['qid'])} (score: {result['confidence']:.3f})")
             return result
         
+        self._record_miss(combined_query, VEHICLE_SEARCH_PREDICATE)
         return None
     
     def _load_column_mappings(self, mapping_file: str) -> Dict[str, Dict]:
@@ -481,7 +617,7 @@ class AdvancedSemanticEnricher:
     def _create_subject_iri(self, inventory_number: str) -> URIRef:
         """Crea IRI per subject (veicolo) basato su numero inventario."""
         normalized = re.sub(r'[^a-zA-Z0-9]', '', inventory_number.strip())
-        return EX[f"vehicle_{normalized}"]
+        return self.namespace[f"vehicle_{normalized}"]
 
     def _create_subject_iri_fallback(self, row) -> URIRef:
         """Crea IRI fallback per veicoli senza numero inventario, usando Marca+Modello o Marca+Anno."""
@@ -495,12 +631,562 @@ class AdvancedSemanticEnricher:
         else:
             raw = marca or "unknown"
         normalized = re.sub(r'[^a-zA-Z0-9]', '', raw)
-        return EX[f"vehicle_{normalized}"]
+        return self.namespace[f"vehicle_{normalized}"]
+    
+    def _load_all_mappings(self, csv_file: str, mapping_file: str) -> Dict[str, Dict]:
+        """Carica i mappings colonne e, se presente, i mappings Schema.org da mappings.csv."""
+        # Carica mappings colonne
+        column_mappings = self._load_column_mappings(mapping_file)
+        if not column_mappings:
+            return {}
+        
+        # Carica mappings Schema.org aggiuntivi da mappings.csv
+        mappings_csv = os.path.join(os.path.dirname(csv_file), 'mappings.csv')
+        if os.path.exists(mappings_csv):
+            column_mappings = self._load_schema_mappings(mappings_csv, column_mappings)
+        else:
+            print("Warning: File mappings.csv non trovato, skip mappings Schema.org")
+        return column_mappings
+    
+    def _catalogue_columns(self, csv_file: str, column_mappings: Dict, pruned: bool) -> List[str]:
+        """
+        Intestazioni del CSV (la prima riga contiene categorie, la seconda le vere intestazioni).
+        Con pruned=True solo le colonne con mapping più CATALOGUE_KEY_COLUMNS, in ordine di file.
+        """
+        columns = list(pd.read_csv(csv_file, encoding='utf-8', header=1, nrows=0).columns)
+        if pruned:
+            columns = [c for c in columns if c in column_mappings or c in CATALOGUE_KEY_COLUMNS]
+        return columns
+    
+    def _iter_catalogue(self, csv_file: str, columns: List[str], chunksize: Optional[int] = None):
+        """
+        Legge il catalogo come sequenza di DataFrame, con le colonne sempre come
+        stringhe: i valori non dipendono dall'inferenza di tipo (un "Anno" numerico
+        con celle vuote resterebbe altrimenti "1950.0"), né dalla modalità di lettura.
+        
+        Senza chunksize carica l'intero file; con chunksize legge a blocchi di N
+        righe solo le colonne indicate, così la memoria resta costante.
+        L'indice delle righe prosegue tra un blocco e l'altro.
+        """
+        if not chunksize:
+            # Usa la seconda riga come header
+            yield pd.read_csv(csv_file, encoding='utf-8', header=1, dtype=str)
+            return
+        yield from pd.read_csv(csv_file, encoding='utf-8', header=1, usecols=columns,
+                               dtype=str, chunksize=chunksize)
+    
+    def _compile_column_step(self, col_name: str, predicate_uri: str, schema_predicates: List[str]) -> Dict:
+        """Passo del piano per una colonna: predicati già come URIRef e azione decisa dai mappings."""
+        return {
+            'column': col_name,
+            'predicate': predicate_uri,
+            'predicate_ref': URIRef(predicate_uri),
+            'schema_predicates': schema_predicates,
+            'schema_refs': [URIRef(pred) for pred in schema_predicates],
+            # Stessa decisione di enrich_single_value: linking solo per predicati IRI target
+            'link': not self._should_keep_literal_by_mapping(predicate_uri) and self._should_create_iri_by_mapping(predicate_uri),
+            'special': None,
+        }
+    
+    def _compile_column_plan(self, columns: List[str], column_mappings: Dict) -> List[Dict]:
+        """
+        Compila una volta per run il piano di esecuzione per colonna: tutto ciò che
+        dipende solo dalla colonna (predicati, azione, casi speciali) non viene più
+        ricalcolato per ogni cella.
+        
+        Returns:
+            Lista di passi (solo colonne con mapping) con la posizione della colonna
+            nelle tuple di DataFrame.itertuples(index=False)
+        """
+        plan = []
+        brand_position = columns.index('Marca') if 'Marca' in columns else None
+        for position, col_name in enumerate(columns):
+            if col_name not in column_mappings:
+                continue
+            mapping = column_mappings[col_name]
+            schema_predicates = mapping.get('schema_predicates', []) + mapping.get('extra_predicates', [])
+            
+            # SPECIAL CASE: Aggiungi productionDate per "Anni di produzione"
+            if col_name == 'Anni di produzione' and 'https://schema.org/productionDate' not in schema_predicates:
+                schema_predicates.append('https://schema.org/productionDate')
+            
+            step = self._compile_column_step(col_name, mapping['predicate'], schema_predicates)
+            step['position'] = position
+            
+            # SPECIAL CASE: Acquisizione con "Dono" -> usa predicato DONOR
+            if col_name == 'Acquisizione':
+                donor_predicates = museum_mappings.get_donor_predicates()
+                step['special'] = 'donation'
+                step['donor_step'] = self._compile_column_step(col_name, donor_predicates['wikidata'],
+                                                               [donor_predicates['schema']])
+            
+            # CASO SPECIALE: Modello → aggiungi contesto Marca per ricerca Wikidata più precisa
+            # Es. "12/16 HP" → "Fiat 12/16 HP" (senza brand, Wikidata restituisce risultati peggiori)
+            # NON splittare: '/' e '&' fanno parte del nome storico del veicolo.
+            elif col_name == 'Modello' and brand_position is not None:
+                step['special'] = 'brand_context'
+                step['brand_position'] = brand_position
+            
+            plan.append(step)
+        return plan
+    
+    def _prepare_cell(self, step: Dict, values: Tuple) -> Optional[Tuple[Dict, str]]:
+        """
+        Prepara una cella per l'arricchimento applicando il caso speciale della colonna.
+        
+        Returns:
+            Tupla (passo del piano effettivo, valore) oppure None per valori vuoti
+        """
+        value = values[step['position']]
+        if pd.isna(value):
+            return None
+        value_str = str(value).strip()
+        if value_str == '' or value_str == 'nan':
+            return None
+        
+        if step['special'] == 'donation':
+            if museum_mappings.is_donation(value_str):
+                step = step['donor_step']
+        elif step['special'] == 'brand_context':
+            brand_value = values[step['brand_position']]
+            if not pd.isna(brand_value):
+                brand = str(brand_value).strip()
+                if brand and brand.lower() != 'nan':
+                    value_str = f"{brand} {value_str}"
+        
+        return step, value_str
+    
+    def _classify_columns(self, df: pd.DataFrame, plan: List[Dict]) -> List[Dict[str, list]]:
+        """
+        Pre-passo vettoriale: per ogni passo del piano prepara i valori della colonna
+        (strip, contesto Marca) e calcola in blocco con operazioni stringa pandas le
+        maschere che il ciclo sulle righe usa al posto dei controlli per cella:
+        valore vuoto/'nan', donazione, anno, descrizione lunga, candidato multi-entità.
+        
+        Returns:
+            Lista allineata al piano di dizionari colonna -> lista per riga
+        """
+        classifier = museum_mappings.MAPPING_CLASSIFIER
+        classes = []
+        for step in plan:
+            raw = df.iloc[:, step['position']]
+            stripped = raw.astype(str).str.strip()
+            empty = raw.isna() | stripped.eq('') | stripped.eq('nan')
+            values = stripped
+            
+            if step['special'] == 'brand_context':
+                brand_raw = df.iloc[:, step['brand_position']]
+                brand = brand_raw.astype(str).str.strip()
+                has_brand = brand_raw.notna() & brand.ne('') & brand.str.lower().ne('nan')
+                values = stripped.where(~has_brand, brand + ' ' + stripped)
+            
+            if step['special'] == 'donation':
+                donation = stripped.str.lower().str.contains(DONATION_PATTERN, regex=True)
+            else:
+                donation = pd.Series(False, index=raw.index)
+            
+            linkable_steps = [step, step.get('donor_step', step)]
+            if any(candidate['link'] for candidate in linkable_steps):
+                lengths = values.str.len()
+                year = values.str.match(museum_mappings.YEAR_VALUE_PATTERN)
+                long_description = (lengths >= 50) & (
+                    (lengths > 200) | (values.str.count(',') > 3) | values.str.contains(classifier.description_pattern)
+                )
+                multi_candidate = values.str.contains(ENTITY_SEPARATOR_PATTERN)
+            else:
+                # Colonna sempre literal: le maschere di linking non servono
+                year = long_description = multi_candidate = pd.Series(False, index=raw.index)
+            
+            classes.append({
+                'empty': empty.tolist(),
+                'value': values.tolist(),
+                'donation': (donation & ~empty).tolist(),
+                'literal': (year | long_description).tolist(),
+                'multi_candidate': multi_candidate.tolist(),
+            })
+        return classes
+    
+    def _linkable_values(self, value: str, predicate_str: str) -> List[str]:
+        """
+        Valori che enrich_single_value passerebbe a _process_single_entity per questa cella
+        (stessi controlli: descrizioni lunghe, anni, literal-only, IRI target, entità multiple).
+        """
+        if not value or not isinstance(value, str):
+            return []
+        if museum_mappings.is_long_description(value) or museum_mappings.is_year_value(value):
+            return []
+        if self._should_keep_literal_by_mapping(predicate_str) or not self._should_create_iri_by_mapping(predicate_str):
+            return []
+        
+        values = []
+        if museum_mappings.is_multiple_entities_predicate(predicate_str):
+            entities = self.split_entities(value)
+            if len(entities) > 1:
+                values.extend(entities)
+        # Il valore intero viene cercato se nessuna delle parti viene risolta
+        values.append(value)
+        return values
+    
+    def _collect_prewarm_queries(self, csv_file: str, column_mappings: Dict,
+                                 chunksize: Optional[int] = None) -> List[Tuple[Tuple, int]]:
+        """
+        Estrae dal CSV tutte le ricerche che process_csv_to_rdf farebbe, ordinate per frequenza.
+        
+        Returns:
+            Lista di (query, occorrenze) dove query è ('entity', valore, predicato)
+            oppure ('vehicle', marca, modello)
+        """
+        counts = Counter()
+        first_seen = {}  # chiave canonica → query con la prima forma superficiale incontrata
+        
+        def add(query_key, query):
+            first_seen.setdefault(query_key, query)
+            counts[query_key] += 1
+        
+        columns = self._catalogue_columns(csv_file, column_mappings, pruned=bool(chunksize))
+        plan = [step for step in self._compile_column_plan(columns, column_mappings)
+                if step['link'] or step['special'] == 'donation']
+        marca_pos, modello_pos, inventory_pos = (columns.index(c) if c in columns else None
+                                                 for c in ('Marca', 'Modello', 'N. inventario'))
+        
+        rows = (values for chunk in self._iter_catalogue(csv_file, columns, chunksize)
+                for values in chunk.itertuples(index=False, name=None))
+        for values in rows:
+            marca = values[marca_pos] if marca_pos is not None else None
+            if pd.isna(marca) and (inventory_pos is None or pd.isna(values[inventory_pos])):
+                continue
+            
+            for step in plan:
+                cell = self._prepare_cell(step, values)
+                if cell is None or not cell[0]['link']:
+                    continue
+                step_used, value_str = cell
+                predicate_uri = step_used['predicate']
+                for linkable in self._linkable_values(value_str, predicate_uri):
+                    add(('entity', canonicalize_cache_key(linkable), predicate_uri),
+                        ('entity', linkable, predicate_uri))
+            
+            modello = values[modello_pos] if modello_pos is not None else None
+            if marca and modello and not pd.isna(marca) and not pd.isna(modello):
+                marca, modello = str(marca).strip(), str(modello).strip()
+                add(('vehicle', canonicalize_cache_key(f"{marca} {modello}")), ('vehicle', marca, modello))
+        
+        return [(first_seen[key], count) for key, count in counts.most_common()]
+    
+    def prewarm_caches(self, csv_file: str, mapping_file: str, max_workers: int = PREWARM_MAX_WORKERS,
+                       chunksize: Optional[int] = None) -> bool:
+        """
+        Risolve in anticipo tutti i valori collegabili del CSV nelle cache persistenti
+        (entità, veicoli, cache negativa e cache del linker), in parallelo e in ordine
+        di frequenza. Il successivo process_csv_to_rdf non richiede chiamate di rete.
+        
+        Sugli HTTP 429 i worker si fermano e ripetono la richiesta (vedi
+        WikidataEntityLinker._api_get); i valori che falliscono comunque per errori
+        di rete non entrano nella cache negativa e vengono ritentati al prossimo prewarm.
+        """
+        print("=== PREWARM CACHE ENTITY LINKING ===")
+        print(f"Input CSV: {csv_file}")
+        print(f"Mappings: {mapping_file}")
+        print(f"Worker concorrenti: {max_workers}")
+        print()
+        
+        if not self.wikidata_linker:
+            print("Errore: prewarm richiede l'API Wikidata attiva!")
+            return False
+        
+        for path in (csv_file, mapping_file):
+            if not os.path.exists(path):
+                print(f"Errore: File {path} non trovato!")
+                return False
+        
+        column_mappings = self._load_all_mappings(csv_file, mapping_file)
+        if not column_mappings:
+            print("Errore: Nessun mapping caricato!")
+            return False
+        
+        queries = self._collect_prewarm_queries(csv_file, column_mappings, chunksize=chunksize)
+        total = len(queries)
+        print(f"Valori collegabili unici da risolvere: {total}")
+        
+        def resolve(query):
+            self.wikidata_linker.last_miss_reason = None
+            if query[0] == 'vehicle':
+                found = self._search_vehicle_entity(query[1], query[2]) is not None
+            else:
+                found = self._process_single_entity(query[1], query[2]) is not None
+            if found:
+                return 'OK'
+            if self.wikidata_linker.last_miss_reason == MISS_ERROR:
+                return PREWARM_NETWORK_ERROR
+            return 'non risolto'
+        
+        start = time.time()
+        resolved = 0
+        network_errors = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = {executor.submit(resolve, query): (query, count) for query, count in queries}
+            for done, future in enumerate(as_completed(futures), 1):
+                query, count = futures[future]
+                try:
+                    outcome = future.result()
+                    resolved += outcome == 'OK'
+                    network_errors += outcome == PREWARM_NETWORK_ERROR
+                except Exception as e:
+                    outcome = f"errore: {e}"
+                elapsed = time.time() - start
+                eta = elapsed / done * (total - done)
+                label = f"{query[1]} {query[2]}" if query[0] == 'vehicle' else query[1]
+                print(f"  [PREWARM {done}/{total} {done / total:.0%} | ETA {eta:.0f}s] {label!r} x{count} -> {outcome}")
+        
+        self.negative_cache.save()
+        self.wikidata_linker._save_cache()
+        
+        print(f"\n=== PREWARM COMPLETATO in {time.time() - start:.1f}s ===")
+        print(f"Valori risolti: {resolved}/{total}")
+        if network_errors:
+            print(f"Valori non risolti per errori di rete (da ritentare): {network_errors}")
+        print(f"Attese per HTTP 429: {self.wikidata_linker.rate_limit_waits}")
+        print(f"Cache entità: {len(self.entity_cache)} voci")
+        print(f"Cache negativa: {len(self.negative_cache)} voci {self.negative_cache.reason_counts()}")
+        print("=" * 60)
+        return True
+    
+    def _enrichment_triples(self, subject: URIRef, predicate_ref: URIRef, schema_refs: List[URIRef],
+                            value_str: str, enrichment: Dict) -> List[Tuple]:
+        """Triple RDF per una cella arricchita (literal, entità singola o entità multiple)."""
+        triples = []
+        
+        if enrichment['action'] == 'keep_original':
+            # Mantieni come literal - genera triple con tutti i predicati
+            # (anche predicati Schema.org per interoperabilità)
+            literal = Literal(value_str, datatype=XSD.string)
+            triples.append((subject, predicate_ref, literal))
+            for schema_ref in schema_refs:
+                triples.append((subject, schema_ref, literal))
+            return triples
+        
+        # Multiple entità (persone, piloti, etc.) oppure singola entità o IRI
+        for entity_data in enrichment.get('entities', [enrichment]):
+            # Triple con predicato Wikidata
+            triples.append((subject, predicate_ref, entity_data['iri']))
+            triples.append((entity_data['iri'], RDF.type, entity_data['rdf_type']))
+            # Usa label da Wikidata se disponibile, altrimenti valore originale
+            label_value = entity_data.get('wikidata_label', entity_data['original_value'])
+            triples.append((entity_data['iri'], RDFS.label, Literal(label_value, datatype=XSD.string)))
+            
+            # Aggiungi anche predicati Schema.org
+            for schema_ref in schema_refs:
+                triples.append((subject, schema_ref, entity_data['iri']))
+        return triples
+    
+    def _vehicle_link_triples(self, subject: URIRef, vehicle_entity: Dict) -> List[Tuple]:
+        """Triple che collegano il veicolo del museo alla sua entità Wikidata."""
+        vehicle_uri = URIRef(f"http://www.wikidata.org/entity/{vehicle_entity['qid']}")
+        return [
+            (subject, SCHEMA.sameAs, vehicle_uri),
+            (subject, URIRef("http://www.wikidata.org/prop/direct/P31"), vehicle_uri),  # instance of
+        ]
+    
+    def _save_backfill_queue(self, output_file: str, backfill_queue: List[Dict], store_file: Optional[str] = None):
+        """
+        Salva la coda di backfill accanto all'output (rimuove quella vecchia se vuota),
+        con il triple store scritto insieme all'output, che il backfill dovrà aggiornare.
+        """
+        queue_file = backfill_queue_path(output_file)
+        try:
+            if not backfill_queue:
+                if os.path.exists(queue_file):
+                    os.remove(queue_file)
+                return
+            queue_dir = os.path.dirname(queue_file)
+            if queue_dir:
+                os.makedirs(queue_dir, exist_ok=True)
+            with open(queue_file, 'w', encoding='utf-8') as f:
+                json.dump({'output_file': output_file, 'store_file': store_file, 'entries': backfill_queue},
+                          f, ensure_ascii=False, indent=2)
+            print(f"Coda di backfill: {len(backfill_queue)} valori rinviati -> {queue_file}")
+        except Exception as e:
+            print(f"Warning: Impossibile salvare coda di backfill: {e}")
+    
+    def backfill_output(self, output_file: str) -> bool:
+        """
+        Risolve senza limite di tempo i valori rinviati da process_csv_to_rdf e
+        aggiorna l'output: i literal di ripiego vengono sostituiti dalle triple
+        dell'entità trovata e i veicoli ricevono i collegamenti sameAs/P31.
+        Se la generazione aveva scritto anche un triple store (--store), viene
+        riscritto dal grafo aggiornato.
+        """
+        print("=== BACKFILL ENTITY LINKING ===")
+        queue_file = backfill_queue_path(output_file)
+        if not os.path.exists(queue_file):
+            print(f"Nessuna coda di backfill per {output_file}")
+            return True
+        if not os.path.exists(output_file):
+            print(f"Errore: File {output_file} non trovato!")
+            return False
+        
+        with open(queue_file, 'r', encoding='utf-8') as f:
+            queue = json.load(f)
+        entries = queue['entries']
+        store_file = queue.get('store_file')
+        print(f"Valori da risolvere: {len(entries)}")
+        
+        # Il backfill deve esplorare ogni valore fino in fondo
+        saved_deadline, self.link_deadline = self.link_deadline, None
+        try:
+            graph = Graph()
+            graph.parse(output_file, format='nt')
+            removed = added = 0
+            still_pending = []
+            
+            for entry in entries:
+                subject = URIRef(entry['subject'])
+                self._cell_deferred = False
+                if entry['kind'] == 'vehicle':
+                    vehicle_entity = self._search_vehicle_entity(entry['marca'], entry['modello'])
+                    new_triples = self._vehicle_link_triples(subject, vehicle_entity) if vehicle_entity and vehicle_entity.get('qid') else []
+                else:
+                    enrichment = self.enrich_single_value(entry['value'], entry['predicate'])
+                    new_triples = self._enrichment_triples(subject, URIRef(entry['predicate']),
+                                                           [URIRef(pred) for pred in entry['schema_predicates']],
+                                                           entry['value'], enrichment)
+                if self._cell_deferred:
+                    # Errori di rete anche senza scadenza: il valore resta in coda
+                    still_pending.append(entry)
+                    continue
+                
+                # Rimuovi le triple di ripiego che il risultato completo non conferma
+                for terms in entry.get('emitted', []):
+                    triple = tuple(from_n3(term) for term in terms)
+                    if triple not in new_triples and triple in graph:
+                        graph.remove(triple)
+                        removed += 1
+                for triple in new_triples:
+                    if triple not in graph:
+                        graph.add(triple)
+                        added += 1
+            
+            indexed = os.path.exists(index_path(output_file))
+            if indexed or is_sorted_ntriples(output_file):
+                # Output generato con --canonical o --index: resta ordinato, l'indice viene ricostruito
+                write_subject_sorted_ntriples(graph, output_file)
+                if indexed:
+                    build_subject_index(output_file)
+            else:
+                graph.serialize(destination=output_file, format='nt', encoding='utf-8')
+            if store_file:
+                print(f"Triple store aggiornato: {export_graph(graph, store_file)} triple in {store_file}")
+            self._save_backfill_queue(output_file, still_pending, store_file)
+        finally:
+            self.link_deadline = saved_deadline
+            self.negative_cache.save()
+            if self.wikidata_linker:
+                self.wikidata_linker._save_cache()
+        
+        print(f"Triple di ripiego rimosse: {removed}")
+        print(f"Triple aggiunte: {added}")
+        if still_pending:
+            print(f"Valori ancora in coda (errori di rete): {len(still_pending)}")
+        print(f"File aggiornato: {output_file}")
+        print("=" * 60)
+        return True
+    
+    def _append_partial_triples(self, partial_file: str, triples: List[Tuple], sync: bool = False) -> int:
+        """Accoda le triple al file parziale in N-Triples; restituisce la nuova dimensione del file."""
+        # Serializer N-Triples di rdflib su un grafo del solo lotto: Literal.n3() userebbe
+        # le triple virgolette per i testi su più righe, che il parser 'nt' della ripresa rifiuta
+        batch = Graph()
+        for triple in triples:
+            batch.add(triple)
+        with open(partial_file, 'ab') as f:
+            f.write(batch.serialize(format='nt', encoding='utf-8'))
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+            return f.tell()
     
-    def process_csv_to_rdf(self, csv_file: str, mapping_file: str, output_file: str) -> bool:
+    def _write_checkpoint(self, output_file: str, pending_triples: List[Tuple], state: Dict):
+        """
+        Accoda le triple nuove al file parziale e poi registra lo stato. L'offset del
+        file parziale salvato nello stato delimita le triple confermate: quelle scritte
+        dopo l'ultimo checkpoint riuscito vengono scartate alla ripresa.
+        """
+        checkpoint_file, partial_file = checkpoint_paths(output_file)
+        state['partial_size'] = self._append_partial_triples(partial_file, pending_triples, sync=True)
+        
+        # Anche le cache devono riflettere il lavoro già confermato
+        self.negative_cache.save()
+        if self.wikidata_linker:
+            self.wikidata_linker._save_cache()
+        
+        tmp_file = checkpoint_file + '.tmp'
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_file, checkpoint_file)
+    
+    def _load_checkpoint(self, output_file: str, csv_file: str, graph: Optional[Graph]) -> Optional[Dict]:
+        """
+        Carica l'ultimo checkpoint valido per questo CSV e ripristina nel grafo le
+        triple già generate (con graph=None, lettura a blocchi, restano solo nel file
+        parziale). Restituisce lo stato salvato o None se non c'è nulla da riprendere.
+        """
+        checkpoint_file, partial_file = checkpoint_paths(output_file)
+        if not os.path.exists(checkpoint_file):
+            print("Nessun checkpoint trovato: elaborazione dall'inizio")
+            return None
+        
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state['csv_file'] != os.path.abspath(csv_file) or state['csv_size'] != os.path.getsize(csv_file):
+            print("Warning: Checkpoint relativo a un altro CSV, elaborazione dall'inizio")
+            return None
+        
+        # Scarta le triple accodate dopo l'ultimo checkpoint confermato
+        with open(partial_file, 'r+', encoding='utf-8') as f:
+            f.truncate(state['partial_size'])
+        if graph is None:
+            print(f"Ripresa dal checkpoint: riga {state['row'] + 1}, {state['partial_size']} byte di triple già scritti")
+            return state
+        graph.parse(partial_file, format='nt')
+        print(f"Ripresa dal checkpoint: riga {state['row'] + 1}, {len(graph)} triple ripristinate")
+        return state
+    
+    def process_csv_to_rdf(self, csv_file: str, mapping_file: str, output_file: str, resume: bool = False,
+                           checkpoint_every: int = CHECKPOINT_EVERY, chunksize: Optional[int] = None,
+                           emitters: Optional[List] = None, store_file: Optional[str] = None,
+                           index: bool = False, canonical: bool = False) -> bool:
         """
         Processa CSV museo generando RDF con entity linking e arricchimento semantico.
+        
+        Ogni checkpoint_every righe salva un checkpoint (ultima riga elaborata, triple
+        parziali, contatori); con resume=True riprende dall'ultimo checkpoint e produce
+        lo stesso output di un'elaborazione completa.
+        
+        Con chunksize il CSV viene letto a blocchi di N righe, solo nelle colonne
+        necessarie (vedi _iter_catalogue), e le triple non passano da un grafo in
+        memoria: vengono accodate al file parziale a ogni checkpoint e l'output finale
+        è ottenuto ordinando e deduplicando quel file con il merge sort esterno di
+        nt_sort (quindi è sempre in forma canonica). La memoria non dipende dalla
+        dimensione del catalogo.
+        
+        emitters: emitter aggiuntivi alimentati nello stesso passaggio sul CSV
+        (es. il grafo V2, vedi dual_output_runner.py). Ognuno espone
+        begin(colonne) -> bool, emit_row(idx, riga) e finish() -> bool; le righe
+        sono dizionari colonna -> valore.
+        
+        store_file: oltre all'N-Triples scrive il grafo in un triple store SQLite
+        indicizzato, interrogabile con triple_store.py senza riparsare il file.
+        
+        canonical=True scrive l'N-Triples in forma canonica: righe ordinate per
+        soggetto, predicato e oggetto, con merge sort esterno (vedi nt_sort.py).
+        index=True implica canonical e aggiunge l'indice dei byte per soggetto e
+        numero di inventario (vedi nt_index.py).
         """
+        emitters = emitters or []
+        if emitters and resume:
+            # Il checkpoint copre solo il grafo V1: gli altri grafi vanno rigenerati da capo
+            print("Warning: --resume non supportato con emitter aggiuntivi, elaborazione completa")
+            resume = False
         
         print("=== GENERAZIONE RDF CON ENTITY LINKING ===")
         print(f"Input CSV: {csv_file}")
@@ -518,34 +1204,31 @@ class AdvancedSemanticEnricher:
             return False
         
         try:
-            # Carica mappings colonne
-            column_mappings = self._load_column_mappings(mapping_file)
+            column_mappings = self._load_all_mappings(csv_file, mapping_file)
             if not column_mappings:
                 print("Errore: Nessun mapping caricato!")
                 return False
             
-            # Carica mappings Schema.org aggiuntivi da mappings.csv
-            mappings_csv = os.path.join(os.path.dirname(csv_file), 'mappings.csv')
-            if os.path.exists(mappings_csv):
-                column_mappings = self._load_schema_mappings(mappings_csv, column_mappings)
+            # Colonne del CSV (la prima riga contiene categorie, la seconda le vere intestazioni)
+            # (gli emitter aggiuntivi hanno mapping propri: nessuna potatura)
+            columns = self._catalogue_columns(csv_file, column_mappings, pruned=bool(chunksize) and not emitters)
+            if chunksize:
+                print(f"Lettura CSV a blocchi di {chunksize} righe, {len(columns)} colonne")
             else:
-                print("Warning: File mappings.csv non trovato, skip mappings Schema.org")
+                print("Caricando dati CSV...")
             
-            # Carica CSV (la prima riga contiene categorie, la seconda le vere intestazioni)
-            print("Caricando dati CSV...")
-            df = pd.read_csv(csv_file, encoding='utf-8', header=1)  # Usa la seconda riga come header
-            print(f"Caricate {len(df)} righe, {len(df.columns)} colonne")
-            
-            # Crea grafo RDF
-            graph = Graph()
+            # Crea grafo RDF (solo senza chunksize: a blocchi le triple vanno su disco)
+            streaming = bool(chunksize)
+            graph = None if streaming else Graph()
             
             # Namespace
-            graph.bind("ex", EX)
-            graph.bind("schema", SCHEMA)
-            graph.bind("wdt", WDT)
-            graph.bind("wd", WD)
-            graph.bind("rdf", RDF)
-            graph.bind("rdfs", RDFS)
+            if graph is not None:
+                graph.bind("ex", EX)
+                graph.bind("schema", SCHEMA)
+                graph.bind("wdt", WDT)
+                graph.bind("wd", WD)
+                graph.bind("rdf", RDF)
+                graph.bind("rdfs", RDFS)
             
             # Contatori
             total_triples = 0
@@ -555,153 +1238,214 @@ class AdvancedSemanticEnricher:
             technical_values = 0
             custom_iris = 0
             literals_kept = 0
+            backfill_queue = []  # celle e veicoli rinviati per scadenza del linking
+            
+            # Checkpoint: triple aggiunte dall'ultimo salvataggio e ultima riga completata
+            checkpoint_file, partial_file = checkpoint_paths(output_file)
+            pending_triples = []
+            start_row = 0
+            state = self._load_checkpoint(output_file, csv_file, graph) if resume else None
+            if state:
+                start_row = state['row'] + 1
+                counters = state['counters']
+                total_triples = counters['total_triples']
+                total_vehicles = counters['total_vehicles']
+                dynamic_cache_hits = counters['dynamic_cache_hits']
+                api_new_entities = counters['api_new_entities']
+                technical_values = counters['technical_values']
+                custom_iris = counters['custom_iris']
+                literals_kept = counters['literals_kept']
+                backfill_queue = state['backfill_queue']
+                self.negative_cache_hits = state['negative_cache_hits']
+                self.canonical_cache_hits = state['canonical_cache_hits']
+            else:
+                output_dir = os.path.dirname(output_file)
+                if output_dir:
+                    os.makedirs(output_dir, exist_ok=True)
+                open(partial_file, 'w', encoding='utf-8').close()
+            
+            def emit(triple):
+                if graph is not None:
+                    graph.add(triple)
+                pending_triples.append(triple)
+            
+            # Piano per colonna compilato una volta: il ciclo sulle righe lavora su tuple
+            plan = self._compile_column_plan(columns, column_mappings)
+            marca_pos, modello_pos, inventory_pos = (columns.index(c) if c in columns else None
+                                                     for c in ('Marca', 'Modello', 'N. inventario'))
+            keep_original = {'action': 'keep_original'}
+            
+            for emitter in emitters:
+                if not emitter.begin(columns):
+                    return False
             
             print("Generando triple RDF...")
             
-            # Processa ogni riga (veicolo)
-            for idx, row in df.iterrows():
+            # Processa ogni riga (veicolo), blocco per blocco; le maschere di classificazione
+            # sono calcolate per blocco
+            def catalogue_rows():
+                for chunk in self._iter_catalogue(csv_file, columns, chunksize):
+                    if not chunksize:
+                        print(f"Caricate {len(chunk)} righe, {len(chunk.columns)} colonne")
+                    if chunk.empty or chunk.index[-1] < start_row:
+                        continue  # CSV senza righe o blocco interamente già elaborato prima del checkpoint
+                    classes = self._classify_columns(chunk, plan)
+                    for row_i, (idx, *values) in enumerate(chunk.itertuples(index=True, name=None)):
+                        yield row_i, idx, values, classes
+            
+            for row_i, idx, values, classes in catalogue_rows():
+                if idx < start_row:
+                    continue  # già elaborata prima del checkpoint
+                
+                # Checkpoint periodico (le righe fino a idx - 1 sono complete)
+                if idx > start_row and idx % checkpoint_every == 0:
+                    self._write_checkpoint(output_file, pending_triples, {
+                        'csv_file': os.path.abspath(csv_file),
+                        'csv_size': os.path.getsize(csv_file),
+                        'row': idx - 1,
+                        'counters': {
+                            'total_triples': total_triples,
+                            'total_vehicles': total_vehicles,
+                            'dynamic_cache_hits': dynamic_cache_hits,
+                            'api_new_entities': api_new_entities,
+                            'technical_values': technical_values,
+                            'custom_iris': custom_iris,
+                            'literals_kept': literals_kept,
+                        },
+                        'backfill_queue': backfill_queue,
+                        'negative_cache_hits': self.negative_cache_hits,
+                        'canonical_cache_hits': self.canonical_cache_hits,
+                    })
+                    pending_triples.clear()
+                
+                marca = values[marca_pos] if marca_pos is not None else None
+                modello = values[modello_pos] if modello_pos is not None else None
+                inventory_value = values[inventory_pos] if inventory_pos is not None else None
+                
                 # Skip righe completamente vuote (nessun dato significativo)
-                if pd.isna(row.get('Marca')) and pd.isna(row.get('N. inventario')):
+                if pd.isna(marca) and pd.isna(inventory_value):
                     continue
                 
                 total_vehicles += 1
-                inventory_num = str(row.get('N. inventario', '')).strip()
+                if emitters:
+                    row = dict(zip(columns, values))
+                    for emitter in emitters:
+                        emitter.emit_row(idx, row)
+                inventory_num = str(inventory_value if inventory_pos is not None else '').strip()
                 
                 # Crea subject per questo veicolo
                 if not inventory_num or inventory_num == 'nan':
-                    subject = self._create_subject_iri_fallback(row)
+                    subject = self._create_subject_iri_fallback(dict(zip(columns, values)))
                 else:
                     subject = self._create_subject_iri(inventory_num)
                 
                 # Aggiungi tipo: questo è un veicolo
-                graph.add((subject, RDF.type, SCHEMA.Vehicle))
+                emit((subject, RDF.type, SCHEMA.Vehicle))
                 total_triples += 1
                 
-                # Processa ogni colonna
-                for col_name, value in row.items():
-                    # Skip colonne senza mapping o valori vuoti
-                    if col_name not in column_mappings:
-                        continue
-                    
-                    if pd.isna(value) or str(value).strip() == '' or str(value).strip() == 'nan':
+                # Processa ogni colonna con mapping secondo il piano e le maschere precalcolate
+                for step, flags in zip(plan, classes):
+                    # Skip valori vuoti
+                    if flags['empty'][row_i]:
                         continue
+                    value_str = flags['value'][row_i]
+                    if flags['donation'][row_i]:
+                        step = step['donor_step']
                     
-                    value_str = str(value).strip()
-                    mapping = column_mappings[col_name]
-                    predicate_uri = mapping['predicate']
-                    schema_predicates = mapping.get('schema_predicates', []) + mapping.get('extra_predicates', [])
-                    
-                    # SPECIAL CASE: Acquisizione con "Dono" -> usa predicato DONOR
-                    if col_name == 'Acquisizione' and museum_mappings.is_donation(value_str):
-                        donor_predicates = museum_mappings.get_donor_predicates()
-                        predicate_uri = donor_predicates['wikidata']
-                        schema_predicates = [donor_predicates['schema']]
-                    
-                    # SPECIAL CASE: Aggiungi productionDate per "Anni di produzione"
-                    if col_name == 'Anni di produzione':
-                        if 'https://schema.org/productionDate' not in schema_predicates:
-                            schema_predicates.append('https://schema.org/productionDate')
+                    # Arricchisci il valore (usa predicato Wikidata per decidere): colonne
+                    # literal, anni e descrizioni lunghe restano literal senza linking
+                    self._cell_deferred = False
+                    if step['link'] and not flags['literal'][row_i]:
+                        enrichment = self._link_value(value_str, step['predicate'],
+                                                      multi_candidate=flags['multi_candidate'][row_i]) or keep_original
+                    else:
+                        enrichment = keep_original
                     
-                    # CASO SPECIALE: Modello → aggiungi contesto Marca per ricerca Wikidata più precisa
-                    # Es. "12/16 HP" → "Fiat 12/16 HP" (senza brand, Wikidata restituisce risultati peggiori)
-                    # NON splittare: '/' e '&' fanno parte del nome storico del veicolo.
-                    if col_name == 'Modello' and 'Marca' in row:
-                        brand = str(row['Marca']).strip()
-                        if brand and not pd.isna(row['Marca']) and brand.lower() != 'nan':
-                            value_str = f"{brand} {value_str}"
+                    cell_triples = self._enrichment_triples(subject, step['predicate_ref'], step['schema_refs'], value_str, enrichment)
+                    for triple in cell_triples:
+                        emit(triple)
+                        total_triples += 1
                     
-                    # Arricchisci il valore (usa predicato Wikidata per decidere)
-                    enrichment = self.enrich_single_value(value_str, predicate_uri)
+                    if self._cell_deferred:
+                        # Triple di ripiego del veicolo, da sostituire quando il backfill risolve il valore
+                        emitted = [[term.n3() for term in triple] for triple in cell_triples if triple[0] == subject]
+                        backfill_queue.append({'kind': 'cell', 'subject': str(subject), 'value': value_str,
+                                               'predicate': step['predicate'], 'schema_predicates': step['schema_predicates'],
+                                               'emitted': emitted})
                     
+                    # Conteggi per tipo
                     if enrichment['action'] == 'keep_original':
-                        # Mantieni come literal - genera triple con tutti i predicati
-                        graph.add((subject, URIRef(predicate_uri), Literal(value_str, datatype=XSD.string)))
-                        total_triples += 1
                         literals_kept += 1
-                        
-                        # Aggiungi anche predicati Schema.org per interoperabilità
-                        for schema_pred in schema_predicates:
-                            graph.add((subject, URIRef(schema_pred), Literal(value_str, datatype=XSD.string)))
-                            total_triples += 1
-                    
-                    elif enrichment['action'] == 'create_multiple_entities':
-                        # Multiple entità (persone, piloti, etc.)
-                        for entity_data in enrichment['entities']:
-                            # Triple con predicato Wikidata
-                            graph.add((subject, URIRef(predicate_uri), entity_data['iri']))
-                            graph.add((entity_data['iri'], RDF.type, entity_data['rdf_type']))
-                            # Usa label da Wikidata se disponibile, altrimenti valore originale
-                            label_value = entity_data.get('wikidata_label', entity_data['original_value'])
-                            graph.add((entity_data['iri'], RDFS.label, Literal(label_value, datatype=XSD.string)))
-                            total_triples += 3
-                            
-                            # Aggiungi anche predicati Schema.org
-                            for schema_pred in schema_predicates:
-                                graph.add((subject, URIRef(schema_pred), entity_data['iri']))
-                                total_triples += 1
-                            
-                            # Conteggi
-                            if entity_data['action'] == 'create_wikidata_iri':
-                                if entity_data['source'] == 'dynamic_cache':
-                                    dynamic_cache_hits += 1
-                                else:
-                                    api_new_entities += 1
-                    
-                    else:
-                        # Singola entità o IRI
-                        # Triple con predicato Wikidata
-                        graph.add((subject, URIRef(predicate_uri), enrichment['iri']))
-                        graph.add((enrichment['iri'], RDF.type, enrichment['rdf_type']))
-                        # Usa label da Wikidata se disponibile, altrimenti valore originale
-                        label_value = enrichment.get('wikidata_label', enrichment['original_value'])
-                        graph.add((enrichment['iri'], RDFS.label, Literal(label_value, datatype=XSD.string)))
-                        total_triples += 3
-                        
-                        # Aggiungi anche predicati Schema.org per interoperabilità
-                        for schema_pred in schema_predicates:
-                            graph.add((subject, URIRef(schema_pred), enrichment['iri']))
-                            total_triples += 1
-                        
-                        # Conteggi per tipo
-                        if enrichment['action'] == 'create_technical_iri':
+                    for entity_data in enrichment.get('entities', [enrichment]):
+                        if entity_data['action'] == 'create_technical_iri':
                             technical_values += 1
-                        elif enrichment['action'] == 'create_wikidata_iri':
-                            if enrichment['source'] == 'dynamic_cache':
+                        elif entity_data['action'] == 'create_wikidata_iri':
+                            if entity_data['source'] == 'dynamic_cache':
                                 dynamic_cache_hits += 1
                             else:
                                 api_new_entities += 1
-                        elif enrichment['action'] == 'create_custom_iri':
+                        elif entity_data['action'] == 'create_custom_iri':
                             custom_iris += 1
                 
                 # DOPO aver processato tutte le colonne, cerca il veicolo completo su Wikidata
-                marca = row.get('Marca')
-                modello = row.get('Modello')
                 if marca and modello and not pd.isna(marca) and not pd.isna(modello):
+                    self._cell_deferred = False
                     vehicle_entity = self._search_vehicle_entity(str(marca).strip(), str(modello).strip())
                     if vehicle_entity and vehicle_entity.get('qid'):
-                        vehicle_uri = URIRef(f"http://www.wikidata.org/entity/{vehicle_entity['qid']}")
                         # Aggiungi triple che collegano il veicolo all'entità Wikidata
-                        graph.add((subject, SCHEMA.sameAs, vehicle_uri))
-                        graph.add((subject, URIRef("http://www.wikidata.org/prop/direct/P31"), vehicle_uri))  # instance of
-                        total_triples += 2
+                        for triple in self._vehicle_link_triples(subject, vehicle_entity):
+                            emit(triple)
+                            total_triples += 1
                         api_new_entities += 1
+                    elif self._cell_deferred:
+                        backfill_queue.append({'kind': 'vehicle', 'subject': str(subject),
+                                               'marca': str(marca).strip(), 'modello': str(modello).strip()})
                 
                 if (idx + 1) % 10 == 0:
-                    print(f"  Processati {idx + 1}/{len(df)} veicoli...")
+                    print(f"  Processati {idx + 1} veicoli...")
+            
+            self.negative_cache.save()
+            self._save_backfill_queue(output_file, backfill_queue, store_file)
             
             # Salva grafo
             print("Salvando grafo RDF...")
             output_dir = os.path.dirname(output_file)
             if output_dir:
                 os.makedirs(output_dir, exist_ok=True)
-            graph.serialize(destination=output_file, format='nt', encoding='utf-8')
+            unique_triples = None
+            if streaming:
+                # Ultime triple in coda al file parziale, poi ordinamento e deduplica su disco
+                self._append_partial_triples(partial_file, pending_triples)
+                pending_triples.clear()
+                unique_triples = external_sort_ntriples(partial_file, output_file)
+            elif canonical or index:
+                write_subject_sorted_ntriples(graph, output_file)
+            else:
+                graph.serialize(destination=output_file, format='nt', encoding='utf-8')
+            if index:
+                subject_index = build_subject_index(output_file)
+                print(f"Indice per soggetto: {len(subject_index['subjects'])} soggetti in {index_path(output_file)}")
+            if store_file:
+                if graph is not None:
+                    stored = export_graph(graph, store_file)
+                else:
+                    if os.path.exists(store_file):
+                        os.remove(store_file)
+                    stored = load_ntriples(output_file, store_file)
+                print(f"Triple store: {stored} triple in {store_file}")
+            
+            # Output completo: checkpoint non più necessari
+            for path in (checkpoint_file, partial_file):
+                if os.path.exists(path):
+                    os.remove(path)
 
             # Conteggio triple uniche effettive (rdflib mantiene un set di triple)
-            try:
-                unique_triples = len(graph)
-            except Exception:
-                # Fallback: se per qualche motivo len(graph) non è disponibile
-                unique_triples = None
+            if graph is not None:
+                try:
+                    unique_triples = len(graph)
+                except Exception:
+                    # Fallback: se per qualche motivo len(graph) non è disponibile
+                    unique_triples = None
             
             # Risultati
             print(f"\n=== RISULTATI GENERAZIONE RDF ===\n")
@@ -715,11 +1459,17 @@ class AdvancedSemanticEnricher:
             print(f"  - Entità Wikidata (nuove da API): {api_new_entities}")
             print(f"  - Valori tecnici normalizzati: {technical_values}")
             print(f"  - IRI personalizzati: {custom_iris}")
+            linker_canonical_hits = self.wikidata_linker.canonical_cache_hits if self.wikidata_linker else 0
+            print(f"  - Valori saltati (cache negativa): {self.negative_cache_hits}")
+            print(f"  - Valori rinviati al backfill (deadline): {len(backfill_queue)}")
+            print(f"  - Lookup risparmiati da chiavi canoniche: {self.canonical_cache_hits + linker_canonical_hits} "
+                  f"(cache entità: {self.canonical_cache_hits}, cache linker: {linker_canonical_hits})")
             print(f"\nFile salvato: {output_file}")
             print(f"Cache entità espanso: {len(self.entity_cache)} entità totali")
+            print(f"Cache negativa: {len(self.negative_cache)} valori non risolti {self.negative_cache.reason_counts()}")
             print("=" * 60)
             
-            return True
+            return all([emitter.finish() for emitter in emitters])
             
         except Exception as e:
             print(f"Errore durante elaborazione: {str(e)}")
@@ -727,10 +1477,159 @@ class AdvancedSemanticEnricher:
             traceback.print_exc()
             return False
 
+    def process_batch(self, manifest_file: str) -> bool:
+        """
+        Elabora più cataloghi museali in un solo processo, con un unico linker e
+        cache già calde tra una collezione e l'altra.
+        
+        Il manifest è un JSON con una lista "collections"; ogni voce ha name, csv,
+        mapping, output e opzionalmente namespace (subject dei veicoli) e graph
+        (IRI del named graph). Se il manifest indica "nquads_output", tutte le
+        collezioni vengono riunite in un file N-Quads, ciascuna nel proprio named graph.
+        """
+        print("=== BATCH MULTI-COLLEZIONE ===")
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except Exception as e:
+            print(f"Errore caricamento manifest {manifest_file}: {e}")
+            return False
+        
+        # I percorsi relativi del manifest sono relativi al file stesso
+        base_dir = os.path.dirname(os.path.abspath(manifest_file))
+        
+        def resolve(path: str) -> str:
+            return path if os.path.isabs(path) else os.path.join(base_dir, path)
+        
+        collections = manifest.get('collections', [])
+        print(f"Collezioni: {len(collections)}")
+        
+        report = []
+        outputs = []
+        success = True
+        for entry in collections:
+            name = entry['name']
+            print(f"\n--- Collezione: {name} ---")
+            self.current_collection = name
+            self.namespace = Namespace(entry.get('namespace', str(EX)))
+            self.cache_hit_origins = Counter()
+            negative_hits_before = self.negative_cache_hits
+            
+            output_file = resolve(entry['output'])
+            ok = self.process_csv_to_rdf(resolve(entry['csv']), resolve(entry['mapping']), output_file)
+            success = success and ok
+            if ok:
+                outputs.append((entry.get('graph', f"{self.namespace}graph/{name}"), output_file))
+            
+            hits = self.cache_hit_origins
+            report.append({
+                'name': name,
+                'ok': ok,
+                'persistent': hits[PERSISTENT_CACHE_ORIGIN],
+                'same': hits[name],
+                'cross': sum(count for origin, count in hits.items() if origin not in (name, PERSISTENT_CACHE_ORIGIN)),
+                'negative': self.negative_cache_hits - negative_hits_before,
+            })
+        
+        self.current_collection = None
+        self.namespace = EX
+        
+        nquads_output = manifest.get('nquads_output')
+        if nquads_output and outputs:
+            nquads_output = resolve(nquads_output)
+            os.makedirs(os.path.dirname(nquads_output), exist_ok=True)
+            with open(nquads_output, 'w', encoding='utf-8') as out:
+                for graph_iri, output_file in outputs:
+                    # Ogni riga N-Triples "s p o ." diventa "s p o <g> ."
+                    with open(output_file, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            line = line.rstrip()
+                            if line.endswith(' .'):
+                                out.write(f"{line[:-2]} <{graph_iri}> .\n")
+            print(f"\nN-Quads con {len(outputs)} named graph: {nquads_output}")
+        
+        print("\n=== RIUSO CACHE TRA COLLEZIONI ===")
+        print(f"{'collezione':<24} {'esito':<6} {'persistente':>11} {'stessa':>7} {'altre coll.':>11} {'cache neg.':>10}")
+        for row in report:
+            print(f"{row['name']:<24} {'OK' if row['ok'] else 'ERRORE':<6} {row['persistent']:>11} "
+                  f"{row['same']:>7} {row['cross']:>11} {row['negative']:>10}")
+        print(f"Lookup risolti da collezioni precedenti: {sum(row['cross'] for row in report)}")
+        print("=" * 60)
+        return success
+
 def main():
-    """Funzione principale per uso autonomo - generazione RDF da CSV."""
-    # Chiedi se cancellare le cache
-    clear_cache = input("Vuoi cancellare le cache prima di iniziare? (s/n): ").strip().lower()
+    """
+    Funzione principale per uso autonomo.
+    
+    Comandi:
+        generate (default)  generazione RDF da CSV
+        prewarm             risolve in anticipo tutti i valori del CSV nelle cache persistenti
+        backfill            risolve i valori rinviati per scadenza (--deadline) e aggiorna l'output
+        batch               elabora i cataloghi elencati in un manifest JSON (--manifest)
+    """
+    parser = argparse.ArgumentParser(description="Generazione RDF con entity linking Wikidata")
+    parser.add_argument('command', nargs='?', choices=['generate', 'prewarm', 'backfill', 'batch'], default='generate',
+                        help="generate: genera il grafo RDF; prewarm: popola le cache senza generare RDF; "
+                             "backfill: completa il linking dei valori rinviati da generate --deadline; "
+                             "batch: elabora più cataloghi con linker e cache condivisi")
+    parser.add_argument('--manifest', default=None,
+                        help="batch: manifest JSON delle collezioni (csv, mapping, namespace, output)")
+    parser.add_argument('--workers', type=int, default=PREWARM_MAX_WORKERS,
+                        help=f"richieste concorrenti verso Wikidata per prewarm (default {PREWARM_MAX_WORKERS})")
+    parser.add_argument('--deadline', type=float, default=None,
+                        help="secondi massimi di linking per valore in generate; i valori scaduti restano "
+                             "literal e vengono completati dal comando backfill")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="legge il CSV a blocchi di N righe (solo colonne mappate) e scrive le triple "
+                             "su disco invece che in memoria, per cataloghi molto grandi")
+    parser.add_argument('--resume', action='store_true',
+                        help="generate: riprende dall'ultimo checkpoint di un'elaborazione interrotta")
+    parser.add_argument('--canonical', action='store_true',
+                        help="generate: output N-Triples canonico, ordinato e senza duplicati (vedi nt_sort.py)")
+    parser.add_argument('--index', action='store_true',
+                        help="generate: output ordinato per soggetto con indice dei byte (vedi nt_index.py)")
+    parser.add_argument('--store', default=None,
+                        help="generate: scrive anche un triple store SQLite indicizzato (vedi triple_store.py); "
+                             "il comando backfill lo aggiorna insieme all'output")
+    args = parser.parse_args()
+    
+    # Percorsi assoluti basati sulla posizione dello script (scripts/ -> root/)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cache_file_path = os.path.join(root, "caches", "production_cache.pkl")
+    
+    # File di input e output
+    csv_file = os.path.join(root, "data", "museo.csv")
+    mapping_file = os.path.join(root, "data", "museum_column_mapping.csv")
+    output_file = os.path.join(root, "output", "output_automatic_enriched.nt")
+    
+    if args.command == 'prewarm':
+        enricher = AdvancedSemanticEnricher(use_wikidata_api=True, cache_file=cache_file_path)
+        if enricher.prewarm_caches(csv_file, mapping_file, max_workers=args.workers, chunksize=args.chunksize):
+            print("\nPrewarm completato: la generazione RDF userà solo le cache.")
+        else:
+            print("\nErrore durante il prewarm delle cache!")
+        return
+    
+    if args.command == 'batch':
+        if not args.manifest:
+            parser.error("il comando batch richiede --manifest")
+        enricher = AdvancedSemanticEnricher(use_wikidata_api=True, cache_file=cache_file_path)
+        if enricher.process_batch(args.manifest):
+            print("\nBatch completato con successo!")
+        else:
+            print("\nErrore in almeno una collezione del batch!")
+        return
+    
+    if args.command == 'backfill':
+        enricher = AdvancedSemanticEnricher(use_wikidata_api=True, cache_file=cache_file_path)
+        if enricher.backfill_output(output_file):
+            print("\nBackfill completato con successo!")
+        else:
+            print("\nErrore durante il backfill!")
+        return
+    
+    # Chiedi se cancellare le cache (non in ripresa: il checkpoint presuppone le cache esistenti)
+    clear_cache = 'n' if args.resume else input("Vuoi cancellare le cache prima di iniziare? (s/n): ").strip().lower()
     
     if clear_cache in ['s', 'si', 'sì', 'y', 'yes']:
         cache_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "caches")
@@ -751,18 +1650,12 @@ def main():
     else:
         print("Cache mantenuta.\n")
     
-    # Percorsi assoluti basati sulla posizione dello script (scripts/ -> root/)
-    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    cache_file_path = os.path.join(root, "caches", "production_cache.pkl")
-    
-    enricher = AdvancedSemanticEnricher(use_wikidata_api=True, cache_file=cache_file_path)
-    
-    # File di input e output
-    csv_file = os.path.join(root, "data", "museo.csv")
-    mapping_file = os.path.join(root, "data", "museum_column_mapping.csv")
-    output_file = os.path.join(root, "output", "output_automatic_enriched.nt")
+    enricher = AdvancedSemanticEnricher(use_wikidata_api=True, cache_file=cache_file_path,
+                                        link_deadline=args.deadline)
     
-    success = enricher.process_csv_to_rdf(csv_file, mapping_file, output_file)
+    success = enricher.process_csv_to_rdf(csv_file, mapping_file, output_file, resume=args.resume,
+                                          chunksize=args.chunksize, store_file=args.store, index=args.index,
+                                          canonical=args.canonical)
     
     if success:
         print("\nGenerazione RDF completata con successo!")
@@ -771,4 +1664,4 @@ def main():
         print("\nErrore nella generazione RDF!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Export del grafo in un documento JSON-LD per veicolo.
+
+Ogni veicolo (soggetto con rdf:type schema:Vehicle, IRI vehicle_{inventario})
+diventa un file vehicle_{inventario}.jsonld con le sue triple più etichette e
+tipi delle entità collegate (entità Wikidata, nodi attributo della V2), così le
+pagine dei veicoli possono essere servite come file statici.
+
+I documenti sono in forma compatta e fanno riferimento a un unico contesto
+condiviso (context.jsonld) calcolato una volta. La scrittura è distribuita su un
+pool di processi; con --bundle i file vengono anche raccolti in un archivio tar.gz.
+
+Uso:
+    python scripts/jsonld_export.py [--input output/output_automatic_enriched_v2.nt]
+                                    [--output-dir output/jsonld] [--workers N] [--bundle]
+"""
+
+import argparse
+import json
+import os
+import tarfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import RDF, RDFS, XSD
+
+from triple_store import QUERY_PREFIXES
+
+SCHEMA_VEHICLE = URIRef("https://schema.org/Vehicle")
+CONTEXT_FILE = "context.jsonld"
+# Proprietà delle entità collegate incluse nel documento del veicolo
+LINKED_PROPERTIES = (RDFS.label, RDF.type)
+# Veicoli per task inviato ai processi del pool
+EXPORT_CHUNKSIZE = 16
+
+# Contesto condiviso dal processo (impostato da _init_worker)
+_prefixes: List[Tuple[str, str]] = []
+
+
+def build_context() -> Dict:
+    """Contesto JSON-LD condiviso: i prefissi usati dalla pipeline."""
+    return {"@context": {prefix: str(namespace) for prefix, namespace in QUERY_PREFIXES.items()}}
+
+
+def _init_worker(context: Dict):
+    global _prefixes
+    # Namespace più lunghi prima, così vince il prefisso più specifico
+    _prefixes = sorted(((prefix, uri) for prefix, uri in context["@context"].items()),
+                       key=lambda item: len(item[1]), reverse=True)
+
+
+def _compact_iri(iri: str) -> str:
+    for prefix, namespace in _prefixes:
+        if iri.startswith(namespace) and len(iri) > len(namespace):
+            return f"{prefix}:{iri[len(namespace):]}"
+    return iri
+
+
+def _encode_object(term) -> Tuple:
+    """Oggetto di una tripla in forma serializzabile per i processi del pool."""
+    if isinstance(term, Literal):
+        return ('literal', str(term), str(term.datatype) if term.datatype else None, term.language)
+    return ('iri', str(term))
+
+
+def _json_value(encoded: Tuple):
+    if encoded[0] == 'iri':
+        return {"@id": _compact_iri(encoded[1])}
+    _, value, datatype, language = encoded
+    if language:
+        return {"@value": value, "@language": language}
+    if datatype is None or datatype == str(XSD.string):
+        return value  # in JSON-LD una stringa semplice è già xsd:string
+    return {"@value": value, "@type": _compact_iri(datatype)}
+
+
+def _node_object(subject: str, properties: List[Tuple[str, Tuple]]) -> Dict:
+    node = {"@id": _compact_iri(subject)}
+    for predicate, encoded in properties:
+        if predicate == str(RDF.type) and encoded[0] == 'iri':
+            node.setdefault("@type", []).append(_compact_iri(encoded[1]))
+        else:
+            node.setdefault(_compact_iri(predicate), []).append(_json_value(encoded))
+    # Valori singoli senza lista, chiavi e valori ordinati (file riproducibili)
+    for key, values in node.items():
+        if isinstance(values, list):
+            values.sort(key=lambda v: json.dumps(v, sort_keys=True, ensure_ascii=False))
+            if len(values) == 1:
+                node[key] = values[0]
+    return node
+
+
+def write_vehicle_document(task: Tuple[str, List, List, str]) -> str:
+    """Scrive il documento JSON-LD di un veicolo; restituisce il percorso del file."""
+    vehicle, properties, linked_nodes, output_dir = task
+    graph = [_node_object(vehicle, properties)]
+    graph.extend(_node_object(node, node_properties) for node, node_properties in linked_nodes)
+    document = {"@context": CONTEXT_FILE, "@graph": graph}
+    path = os.path.join(output_dir, vehicle.rsplit('/', 1)[-1] + ".jsonld")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return path
+
+
+def collect_vehicle_tasks(graph: Graph, output_dir: str) -> List[Tuple[str, List, List, str]]:
+    """Raggruppa le triple per veicolo, con etichette e tipi delle entità collegate (un salto)."""
+    tasks = []
+    for vehicle in sorted(set(graph.subjects(RDF.type, SCHEMA_VEHICLE))):
+        properties = []
+        linked = set()
+        for predicate, obj in graph.predicate_objects(vehicle):
+            properties.append((str(predicate), _encode_object(obj)))
+            if isinstance(obj, URIRef) and obj != vehicle:
+                linked.add(obj)
+        linked_nodes = []
+        for node in sorted(linked):
+            node_properties = [(str(predicate), _encode_object(obj))
+                               for predicate in LINKED_PROPERTIES for obj in graph.objects(node, predicate)]
+            if node_properties:
+                linked_nodes.append((str(node), node_properties))
+        tasks.append((str(vehicle), properties, linked_nodes, output_dir))
+    return tasks
+
+
+def export_vehicle_documents(input_file: str, output_dir: str, workers: Optional[int] = None,
+                             bundle_file: Optional[str] = None) -> int:
+    """
+    Esporta un documento JSON-LD per veicolo in output_dir.
+
+    Returns:
+        Numero di documenti scritti
+    """
+    start = time.perf_counter()
+    graph = Graph()
+    graph.parse(input_file, format='nt')
+    print(f"Grafo caricato: {len(graph)} triple da {input_file}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    context = build_context()
+    with open(os.path.join(output_dir, CONTEXT_FILE), 'w', encoding='utf-8') as f:
+        json.dump(context, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    tasks = collect_vehicle_tasks(graph, output_dir)
+    print(f"Veicoli da esportare: {len(tasks)}")
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(context,)) as pool:
+        paths = list(pool.map(write_vehicle_document, tasks, chunksize=EXPORT_CHUNKSIZE))
+
+    if bundle_file:
+        with tarfile.open(bundle_file, 'w:gz') as bundle:
+            bundle.add(os.path.join(output_dir, CONTEXT_FILE), arcname=CONTEXT_FILE)
+            for path in paths:
+                bundle.add(path, arcname=os.path.basename(path))
+        print(f"Archivio: {bundle_file} ({os.path.getsize(bundle_file) / 1024:.1f} KB)")
+
+    print(f"Documenti JSON-LD scritti: {len(paths)} in {output_dir} ({time.perf_counter() - start:.2f}s)")
+    return len(paths)
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Export di un documento JSON-LD per veicolo")
+    parser.add_argument('--input', default=os.path.join(root, "output", "output_automatic_enriched_v2.nt"),
+                        help="grafo N-Triples da esportare")
+    parser.add_argument('--output-dir', default=os.path.join(root, "output", "jsonld"))
+    parser.add_argument('--workers', type=int, default=None, help="processi di scrittura (default: CPU disponibili)")
+    parser.add_argument('--bundle', action='store_true',
+                        help="raccoglie anche i documenti in <output-dir>.tar.gz")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Errore: File {args.input} non trovato!")
+        return
+
+    bundle_file = args.output_dir.rstrip(os.sep) + ".tar.gz" if args.bundle else None
+    export_vehicle_documents(args.input, args.output_dir, workers=args.workers, bundle_file=bundle_file)
+
+
+if __name__ == "__main__":
+    main()
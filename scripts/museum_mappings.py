@@ -189,23 +189,12 @@ multiple_entities_predicates = [
 # ============================================================================
 import re
 
+# Anno singolo (1990) o range (1990-1995 / 1990–1995)
+YEAR_VALUE_PATTERN = re.compile(r'^\d{4}(?:[-–]\d{4})?$')
+
 def is_year_value(value: str) -> bool:
     """Determina se un valore è un anno o range di anni."""
-    if not value or not isinstance(value, str):
-        return False
-    
-    value = value.strip()
-    year_patterns = [
-        r'^\d{4}$',                              # 1990
-        r'^\d{4}[-–]\d{4}$',                     # 1990-1995
-        r'^(19|20)\d{2}$',                       # 1900-2099
-        r'^(19|20)\d{2}[-–](19|20)\d{2}$'        # 1990-1995 con range completo
-    ]
-    
-    for pattern in year_patterns:
-        if re.match(pattern, value):
-            return True
-    return False
+    return MAPPING_CLASSIFIER.is_year_value(value)
 
 # ============================================================================
 # TIPI DI ENTITÀ WIKIDATA PER PREDICATI
@@ -254,43 +243,25 @@ custom_iri_prefixes = {
 # ============================================================================
 # LOGICA PER DESCRIZIONI LUNGHE
 # ============================================================================
+# Indicatori regex di descrizioni lunghe vs labels brevi (uniti in un'unica alternanza)
+DESCRIPTION_INDICATOR_PATTERNS = [
+    # Presenza di frasi complete (contiene punti)
+    r'\.\s+[A-Z]',  # Punto seguito da spazio e maiuscola (nuova frase)
+    
+    # Pattern tipici di descrizioni storiche/narrative
+    r'\b(?:fu|venne|era|divenne|nacque|fondò|produsse|costruì)\b',
+    r'\b(?:nel|dal|al|tra il|durante|epoca|periodo)\s+\d{4}',
+    r'\b(?:storia|fondazione|caratteristiche|descrizione)\b',
+    
+    # Pattern narrativi specifici del museo
+    r'(?:al Museo|esposto|vettura|automobile|modello.*fu|prodotta.*tra)'
+]
+
 def is_long_description(text: str) -> bool:
     """
     Determina se il testo è una descrizione lunga che dovrebbe usare rdfs:comment.
     """
-    if not text or len(text.strip()) < 50:
-        return False
-        
-    # Indicatori di descrizioni lunghe vs labels brevi
-    description_indicators = [
-        # Presenza di frasi complete (contiene punti)
-        r'\.\s+[A-Z]',  # Punto seguito da spazio e maiuscola (nuova frase)
-        
-        # Testo molto lungo (>200 caratteri)
-        lambda t: len(t.strip()) > 200,
-        
-        # Pattern tipici di descrizioni storiche/narrative
-        r'\b(fu|venne|era|divenne|nacque|fondò|produsse|costruì)\b',
-        r'\b(nel|dal|al|tra il|durante|epoca|periodo)\s+\d{4}',
-        r'\b(storia|fondazione|caratteristiche|descrizione)\b',
-        
-        # Presenza di più di 3 virgole (elenchi dettagliati)
-        lambda t: t.count(',') > 3,
-        
-        # Pattern narrativi specifici del museo
-        r'(al Museo|esposto|vettura|automobile|modello.*fu|prodotta.*tra)'
-    ]
-    
-    # Controlla pattern regex
-    for indicator in description_indicators:
-        if callable(indicator):
-            if indicator(text):
-                return True
-        else:
-            if re.search(indicator, text, re.IGNORECASE):
-                return True
-    
-    return False
+    return MAPPING_CLASSIFIER.is_long_description(text)
 
 def generate_appropriate_label(description: str, predicate_str: str) -> str:
     """
@@ -336,6 +307,32 @@ def get_entity_type_for_predicate(predicate_str: str) -> str:
     """
     return entity_type_mappings.get(predicate_str, entity_type_mappings['default'])
 
+# Priorità per categorie di tipi P31 (select_best_type_from_instance_of)
+TYPE_PRIORITIES = {
+    # Brand/Manufacturer automotive (massima priorità)
+    'Q786820': 100,   # car manufacturer
+    'Q167270': 95,    # brand
+    'Q4830453': 90,    # business
+    'Q43229': 85,     # organization
+    
+    # Country (alta priorità)
+    'Q6256': 100,     # country
+    'Q3024240': 95,   # historical country
+    'Q7275': 90,      # state
+    
+    # Person
+    'Q5': 100,        # human
+    
+    # Vehicle types
+    'Q1420': 90,      # automobile
+    'Q752870': 85,    # motor vehicle
+    'Q936518': 80,    # car model
+    
+    # Event/Competition
+    'Q18669875': 100, # competition event
+    'Q18649705': 95,  # competition
+}
+
 def select_best_type_from_instance_of(instance_of_list: list, predicate_hint: str = None) -> str:
     """
     Seleziona il tipo più appropriato da una lista di tipi P31 (instance_of).
@@ -347,70 +344,19 @@ def select_best_type_from_instance_of(instance_of_list: list, predicate_hint: st
     Returns:
         Il QID del tipo più appropriato
     """
-    if not instance_of_list:
-        return predicate_hint if predicate_hint else 'Q35120'
-    
-    # Definizione di priorità per categorie di tipi
-    priority_types = {
-        # Brand/Manufacturer automotive (massima priorità)
-        'Q786820': 100,   # car manufacturer
-        'Q167270': 95,    # brand
-        'Q4830453': 90,    # business
-        'Q43229': 85,     # organization
-        
-        # Country (alta priorità)
-        'Q6256': 100,     # country
-        'Q3024240': 95,   # historical country
-        'Q7275': 90,      # state
-        
-        # Person
-        'Q5': 100,        # human
-        
-        # Vehicle types
-        'Q1420': 90,      # automobile
-        'Q752870': 85,    # motor vehicle
-        'Q936518': 80,    # car model
-        
-        # Event/Competition
-        'Q18669875': 100, # competition event
-        'Q18649705': 95,  # competition
-    }
-    
-    # Trova il tipo con la priorità più alta
-    best_type = None
-    best_score = -1
-    
-    for qid in instance_of_list:
-        score = priority_types.get(qid, 0)
-        if score > best_score:
-            best_score = score
-            best_type = qid
-    
-    # Se non troviamo nessun tipo prioritario, usa il primo della lista
-    # (è quello più comune/generale in Wikidata)
-    if best_type is None and instance_of_list:
-        best_type = instance_of_list[0]
-    
-    # Fallback al suggerimento dal predicato o default generico
-    return best_type if best_type else (predicate_hint if predicate_hint else 'Q35120')
+    return MAPPING_CLASSIFIER.select_best_type(instance_of_list, predicate_hint)
 
 def is_multiple_entities_predicate(predicate_str: str) -> bool:
     """
     Determina se un predicato può contenere multiple entità (persone, designer, etc.).
     """
-    return predicate_str in multiple_entities_predicates
+    return MAPPING_CLASSIFIER.is_multiple_entities_predicate(predicate_str)
 
 def is_donation(value: str) -> bool:
     """
     Determina se un valore di acquisizione è una donazione.
     """
-    if not value or not isinstance(value, str):
-        return False
-    
-    value_lower = value.lower()
-    donation_keywords = ['dono', 'donazione', 'donato', 'gift', 'donated', 'donation']
-    
-    return any(keyword in value_lower for keyword in donation_keywords)
+    return MAPPING_CLASSIFIER.is_donation(value)
 
 def get_donor_predicates():
     """
@@ -419,4 +365,80 @@ def get_donor_predicates():
     return {
         'wikidata': 'http://www.wikidata.org/prop/direct/P1028',  # donated by
         'schema': 'https://schema.org/sponsor'  # sponsor/donatore
-    }
\ No newline at end of file
+    }
+
+
+# ============================================================================
+# CLASSIFICATORE COMPILATO
+# ============================================================================
+class MappingClassifier:
+    """
+    Versione compilata delle regole di questo modulo, costruita una volta all'import:
+    insiemi di predicati come frozenset, pattern regex precompilati e tabella di
+    priorità dei tipi già pronta. Le funzioni del modulo sono wrapper sottili
+    su MAPPING_CLASSIFIER e mantengono le firme di sempre.
+    """
+    
+    # Parole chiave che indicano una donazione (is_donation)
+    DONATION_KEYWORDS = ('dono', 'donazione', 'donato', 'gift', 'donated', 'donation')
+    
+    def __init__(self):
+        self.literal_only = frozenset(literal_only_properties)
+        self.iri_target = frozenset(iri_target_properties)
+        self.multiple_entities = frozenset(multiple_entities_predicates)
+        self.type_priorities = dict(TYPE_PRIORITIES)
+        self.description_pattern = re.compile('|'.join(f'(?:{p})' for p in DESCRIPTION_INDICATOR_PATTERNS), re.IGNORECASE)
+    
+    def is_literal_only(self, predicate_str: str) -> bool:
+        """Il predicato deve restare literal (literal_only_properties)."""
+        return predicate_str in self.literal_only
+    
+    def is_iri_target(self, predicate_str: str) -> bool:
+        """Il predicato punta a entità concettuali da collegare (iri_target_properties)."""
+        return predicate_str in self.iri_target
+    
+    def is_multiple_entities_predicate(self, predicate_str: str) -> bool:
+        return predicate_str in self.multiple_entities
+    
+    def is_year_value(self, value: str) -> bool:
+        if not value or not isinstance(value, str):
+            return False
+        return YEAR_VALUE_PATTERN.match(value.strip()) is not None
+    
+    def is_long_description(self, text: str) -> bool:
+        if not text:
+            return False
+        length = len(text.strip())
+        if length < 50:
+            return False
+        # Controlli economici prima della regex: testo molto lungo o più di 3 virgole
+        if length > 200 or text.count(',') > 3:
+            return True
+        return self.description_pattern.search(text) is not None
+    
+    def is_donation(self, value: str) -> bool:
+        if not value or not isinstance(value, str):
+            return False
+        value_lower = value.lower()
+        return any(keyword in value_lower for keyword in self.DONATION_KEYWORDS)
+    
+    def select_best_type(self, instance_of_list: list, predicate_hint: str = None) -> str:
+        if not instance_of_list:
+            return predicate_hint if predicate_hint else 'Q35120'
+        
+        # Il tipo con priorità più alta; a parità (anche nessun tipo prioritario)
+        # vince il primo della lista, che è quello più comune/generale in Wikidata
+        priority = self.type_priorities.get
+        best_type = None
+        best_score = -1
+        for qid in instance_of_list:
+            score = priority(qid, 0)
+            if score > best_score:
+                best_score = score
+                best_type = qid
+        
+        # Fallback al suggerimento dal predicato o default generico
+        return best_type if best_type else (predicate_hint if predicate_hint else 'Q35120')
+
+
+MAPPING_CLASSIFIER = MappingClassifier()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Cache negativa per i valori che Wikidata non riesce a risolvere.
+
+I valori senza match (carrozzieri poco noti, piloti minori, ...) vengono
+registrati con un codice motivo e un timestamp: finché la voce non scade (TTL)
+l'enricher li salta senza ripercorrere la cascata di varianti di find_best_entity.
+Un Bloom filter davanti al dizionario rende immediato il caso più frequente,
+cioè "valore mai fallito".
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+from robust_wikidata_linker import canonicalize_cache_key, MISS_UNKNOWN
+
+DEFAULT_NEGATIVE_TTL = 7 * 24 * 3600  # 7 giorni
+
+
+class BloomFilter:
+    """Bloom filter minimale su bytearray con k hash derivati da blake2b."""
+
+    def __init__(self, capacity: int = 1024, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        # Dimensionamento standard: m = -n ln(p) / (ln 2)^2, k = m/n ln 2
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str) -> Iterable[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class NegativeResultCache:
+    """
+    Cache persistente dei lookup falliti, con codice motivo e TTL.
+
+    Le chiavi combinano la forma canonica del valore e il predicato, perché lo
+    stesso valore può non risolversi per un predicato ma sì per un altro.
+    """
+
+    def __init__(self, cache_file: str, ttl: float = DEFAULT_NEGATIVE_TTL):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.entries: Dict[str, Dict] = self._load()
+        self._dirty = False
+        self._lock = threading.Lock()  # add/save concorrenti durante il prewarm
+        self._rebuild_bloom()
+
+    def _key(self, value: str, predicate_str: Optional[str]) -> str:
+        return f"{canonicalize_cache_key(value)}|{predicate_str or ''}"
+
+    def _rebuild_bloom(self):
+        self._bloom = BloomFilter(capacity=max(1024, 2 * len(self.entries)))
+        for key in self.entries:
+            self._bloom.add(key)
+
+    def _load(self) -> Dict[str, Dict]:
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Warning: Impossibile caricare cache negativa: {e}")
+        return {}
+
+    def save(self):
+        """Salva la cache su disco (solo se modificata)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                cache_dir = os.path.dirname(self.cache_file)
+                if cache_dir and not os.path.exists(cache_dir):
+                    os.makedirs(cache_dir, exist_ok=True)
+                with open(self.cache_file, 'w', encoding='utf-8') as f:
+                    json.dump(self.entries, f, ensure_ascii=False, indent=2)
+                self._dirty = False
+            except Exception as e:
+                print(f"Warning: Impossibile salvare cache negativa: {e}")
+
+    def get(self, value: str, predicate_str: Optional[str]) -> Optional[Dict]:
+        """
+        Restituisce la voce di miss per il valore (anche se scaduta), o None.
+        Usare is_expired() per decidere se ritentare il lookup.
+        """
+        key = self._key(value, predicate_str)
+        if key not in self._bloom:
+            return None
+        return self.entries.get(key)
+
+    def is_expired(self, entry: Dict) -> bool:
+        """True se la voce ha superato il TTL e il valore va ritentato."""
+        return time.time() - entry['timestamp'] > self.ttl
+
+    def add(self, value: str, predicate_str: Optional[str], reason: Optional[str]):
+        """Registra un lookup fallito."""
+        key = self._key(value, predicate_str)
+        with self._lock:
+            self.entries[key] = {
+                'value': value,
+                'predicate': predicate_str,
+                'reason': reason or MISS_UNKNOWN,
+                'timestamp': time.time(),
+            }
+            self._dirty = True
+            if self._bloom.count >= self._bloom.capacity:
+                self._rebuild_bloom()
+            else:
+                self._bloom.add(key)
+
+    def discard(self, value: str, predicate_str: Optional[str]):
+        """Rimuove un valore (es. risolto in seguito)."""
+        with self._lock:
+            if self.entries.pop(self._key(value, predicate_str), None) is not None:
+                self._dirty = True
+
+    def reason_counts(self) -> Dict[str, int]:
+        """Conteggio delle voci per codice motivo."""
+        counts: Dict[str, int] = {}
+        for entry in self.entries.values():
+            counts[entry['reason']] = counts.get(entry['reason'], 0) + 1
+        return counts
+
+    def __len__(self) -> int:
+        return len(self.entries)
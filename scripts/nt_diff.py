@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Diff in streaming tra due versioni del grafo in N-Triples canonico (vedi nt_sort.py).
+
+I due file ordinati vengono letti in parallelo in un solo passaggio di merge:
+righe uguali avanzano entrambe, la minore è rimossa (solo nella vecchia
+versione) o aggiunta (solo nella nuova). La memoria non dipende dalla
+dimensione dei file: le triple di una coppia (soggetto, predicato) sono
+contigue, quindi basta tenere il gruppo corrente per riconoscere i cambi di
+valore ("wdt:P176 di ex:vehicle_X: wd:Q1 -> wd:Q2"). Allo stesso modo le
+triple di un soggetto sono contigue: i soggetti più modificati si tengono in un
+heap di --limit elementi, senza un contatore per ogni soggetto.
+
+Uso:
+    python scripts/nt_diff.py vecchio.nt nuovo.nt [--limit 20] [--changes-file modifiche.tsv]
+"""
+
+import argparse
+import heapq
+import os
+import time
+from collections import Counter
+from typing import Iterator, List, Optional, Tuple
+
+from triple_store import QUERY_PREFIXES
+
+DEFAULT_LIMIT = 20
+
+# Namespace più lunghi prima, così vince il prefisso più specifico
+_PREFIXES = sorted(((prefix, str(namespace)) for prefix, namespace in QUERY_PREFIXES.items()),
+                   key=lambda item: len(item[1]), reverse=True)
+
+
+def compact_term(term: str) -> str:
+    """IRI N-Triples (<...>) abbreviato con i prefissi della pipeline; literal invariati."""
+    if term.startswith('<') and term.endswith('>'):
+        iri = term[1:-1]
+        for prefix, namespace in _PREFIXES:
+            if iri.startswith(namespace):
+                return f"{prefix}:{iri[len(namespace):]}"
+    return term
+
+
+def _split_triple(line: bytes) -> Tuple[str, str, str]:
+    subject, _, rest = line.decode('utf-8').partition(' ')
+    predicate, _, obj = rest.partition(' ')
+    return subject, predicate, obj.rstrip()[:-1].rstrip()  # toglie il " ." finale
+
+
+def _sorted_lines(path: str) -> Iterator[bytes]:
+    """Righe di triple del file, verificando che siano in ordine canonico."""
+    previous = b''
+    with open(path, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(b'#'):
+                continue
+            if line < previous:
+                raise ValueError(f"{path} non è in forma canonica: ordinarlo con nt_sort.py")
+            if line != previous:
+                yield line
+                previous = line
+
+
+class GraphDiff:
+    """Contatori del diff e cambi di valore per (soggetto, predicato)."""
+
+    def __init__(self, changes_file: Optional[str] = None, limit: int = DEFAULT_LIMIT):
+        self.limit = limit
+        self.added = 0
+        self.removed = 0
+        self.unchanged = 0
+        self.added_by_predicate = Counter()
+        self.removed_by_predicate = Counter()
+        self.changed_by_predicate = Counter()
+        self.subjects_touched = 0
+        # Min-heap (triple cambiate, soggetto) dei limit soggetti più modificati
+        self.top_subjects: List[Tuple[int, str]] = []
+        self._subject = None
+        self._subject_count = 0
+        self.changes = 0
+        self.examples: List[str] = []
+        self._changes_out = open(changes_file, 'w', encoding='utf-8') if changes_file else None
+        # Gruppo (soggetto, predicato) corrente con gli oggetti rimossi e aggiunti
+        self._group = None
+        self._group_removed: List[str] = []
+        self._group_added: List[str] = []
+
+    def _flush_group(self):
+        if self._group is None:
+            return
+        subject, predicate = self._group
+        if self._group_removed and self._group_added:
+            # Stesso predicato con valori diversi: cambio a livello di entità
+            self.changes += 1
+            self.changed_by_predicate[predicate] += 1
+            old = ' | '.join(compact_term(o) for o in self._group_removed)
+            new = ' | '.join(compact_term(o) for o in self._group_added)
+            if self._changes_out:
+                self._changes_out.write(f"{compact_term(subject)}\t{compact_term(predicate)}\t{old}\t{new}\n")
+            if len(self.examples) < self.limit:
+                self.examples.append(f"{compact_term(predicate)} di {compact_term(subject)}: {old} -> {new}")
+        self._group_removed = []
+        self._group_added = []
+
+    def _flush_subject(self):
+        if self._subject is None:
+            return
+        self.subjects_touched += 1
+        entry = (self._subject_count, self._subject)
+        if len(self.top_subjects) < self.limit:
+            heapq.heappush(self.top_subjects, entry)
+        elif self.top_subjects and entry[0] > self.top_subjects[0][0]:
+            # A parità di triple resta il soggetto arrivato prima (ordine canonico)
+            heapq.heapreplace(self.top_subjects, entry)
+        self._subject_count = 0
+
+    def _record(self, line: bytes, added: bool):
+        subject, predicate, obj = _split_triple(line)
+        if (subject, predicate) != self._group:
+            self._flush_group()
+            self._group = (subject, predicate)
+        if subject != self._subject:
+            self._flush_subject()
+            self._subject = subject
+        self._subject_count += 1
+        if added:
+            self.added += 1
+            self.added_by_predicate[predicate] += 1
+            self._group_added.append(obj)
+        else:
+            self.removed += 1
+            self.removed_by_predicate[predicate] += 1
+            self._group_removed.append(obj)
+
+    def run(self, old_file: str, new_file: str) -> 'GraphDiff':
+        """Merge in un solo passaggio dei due file canonici."""
+        old_lines, new_lines = _sorted_lines(old_file), _sorted_lines(new_file)
+        old_line, new_line = next(old_lines, None), next(new_lines, None)
+        while old_line is not None or new_line is not None:
+            if new_line is None or (old_line is not None and old_line < new_line):
+                self._record(old_line, added=False)
+                old_line = next(old_lines, None)
+            elif old_line is None or new_line < old_line:
+                self._record(new_line, added=True)
+                new_line = next(new_lines, None)
+            else:
+                self.unchanged += 1
+                old_line, new_line = next(old_lines, None), next(new_lines, None)
+        self._flush_group()
+        self._flush_subject()
+        if self._changes_out:
+            self._changes_out.close()
+        return self
+
+    def print_report(self, old_file: str, new_file: str):
+        print(f"\n=== DIFF {old_file} -> {new_file} ===")
+        print(f"Triple invariate: {self.unchanged}")
+        print(f"Triple aggiunte: {self.added}")
+        print(f"Triple rimosse: {self.removed}")
+        print(f"Valori cambiati (soggetto, predicato): {self.changes}")
+
+        predicates = self.added_by_predicate + self.removed_by_predicate
+        if predicates:
+            print(f"\nPer predicato (aggiunte / rimosse / cambi):")
+            for predicate, _ in predicates.most_common(self.limit):
+                print(f"  {compact_term(predicate):<45} +{self.added_by_predicate[predicate]:<7} "
+                      f"-{self.removed_by_predicate[predicate]:<7} ~{self.changed_by_predicate[predicate]}")
+
+        if self.subjects_touched:
+            print(f"\nSoggetti più modificati ({self.subjects_touched} in totale):")
+            for count, subject in sorted(self.top_subjects, key=lambda item: (-item[0], item[1])):
+                print(f"  {compact_term(subject):<45} {count} triple")
+
+        if self.examples:
+            print(f"\nCambi di valore (primi {len(self.examples)}):")
+            for example in self.examples:
+                print(f"  {example}")
+        print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff in streaming tra due N-Triples canonici")
+    parser.add_argument('old_file')
+    parser.add_argument('new_file')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help="righe per sezione del report")
+    parser.add_argument('--changes-file', default=None,
+                        help="scrive tutti i cambi di valore (soggetto, predicato, vecchio, nuovo) in TSV")
+    args = parser.parse_args()
+
+    for path in (args.old_file, args.new_file):
+        if not os.path.exists(path):
+            print(f"Errore: File {path} non trovato!")
+            return
+
+    start = time.perf_counter()
+    try:
+        diff = GraphDiff(changes_file=args.changes_file, limit=args.limit).run(args.old_file, args.new_file)
+    except ValueError as e:
+        print(f"Errore: {e}")
+        return
+    diff.print_report(args.old_file, args.new_file)
+    print(f"Tempo: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
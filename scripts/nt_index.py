@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Indice per soggetto di un file N-Triples ordinato, con lettura ad accesso diretto.
+
+In un file N-Triples ordinato le triple di uno stesso soggetto sono contigue:
+l'indice (file .idx.json accanto all'output) associa a ogni soggetto l'intervallo
+di byte delle sue righe e a ogni numero di inventario (wdt:P217) il soggetto del
+veicolo. SubjectIndex mappa il file con mmap e restituisce le triple di un
+veicolo con una lookup nel dizionario e una sola lettura, senza caricare il
+grafo in rdflib.
+
+Uso:
+    python scripts/nt_index.py build output/output_automatic_enriched.nt
+    python scripts/nt_index.py get output/output_automatic_enriched.nt --inventory 101/A
+    python scripts/nt_index.py get output/output_automatic_enriched.nt http://example.org/vehicle_101A
+"""
+
+import argparse
+import json
+import mmap
+import os
+import re
+from typing import Dict, List, Optional
+
+from rdflib import Graph
+from rdflib.util import from_n3
+
+from nt_sort import external_sort_ntriples
+
+INDEX_SUFFIX = ".idx.json"
+INVENTORY_PREDICATE = b"<http://www.wikidata.org/prop/direct/P217>"
+VEHICLE_IRI_PREFIX = "http://example.org/vehicle_"
+
+
+def index_path(nt_file: str) -> str:
+    """Percorso dell'indice per un file N-Triples (<file>.idx.json)."""
+    return nt_file + INDEX_SUFFIX
+
+
+def write_subject_sorted_ntriples(graph: Graph, output_file: str) -> int:
+    """
+    Serializza il grafo in N-Triples canonico: righe ordinate (triple contigue per
+    soggetto) con il merge sort esterno di nt_sort. Restituisce le triple scritte.
+    """
+    graph.serialize(destination=output_file, format='nt', encoding='utf-8')
+    return external_sort_ntriples(output_file, output_file)
+
+
+def _term_key(token: bytes) -> str:
+    """Chiave del soggetto: IRI senza parentesi angolari, blank node così com'è (_:x)."""
+    text = token.decode('utf-8')
+    return text[1:-1] if text.startswith('<') else text
+
+
+def build_subject_index(nt_file: str, index_file: Optional[str] = None) -> Dict:
+    """
+    Costruisce l'indice soggetto -> [inizio, fine) in byte di un file raggruppato per soggetto.
+
+    Raises:
+        ValueError: se le triple di un soggetto non sono contigue
+    """
+    subjects: Dict[str, List[int]] = {}
+    inventory: Dict[str, str] = {}
+    current_token, current, start, offset = None, None, 0, 0
+    with open(nt_file, 'rb') as f:
+        for line in f:
+            if line.strip():
+                token, _, rest = line.partition(b' ')
+                if token != current_token:
+                    if current is not None:
+                        subjects[current] = [start, offset]
+                    current_token, current, start = token, _term_key(token), offset
+                    if current in subjects:
+                        raise ValueError(f"{nt_file} non è ordinato per soggetto ({current})")
+                predicate, _, obj = rest.partition(b' ')
+                if predicate == INVENTORY_PREDICATE:
+                    inventory[str(from_n3(obj.rstrip().rstrip(b'.').rstrip().decode('utf-8')))] = current
+            offset += len(line)
+    if current is not None:
+        subjects[current] = [start, offset]
+
+    stat = os.stat(nt_file)
+    index = {
+        'file_size': stat.st_size,
+        'file_mtime_ns': stat.st_mtime_ns,
+        'subjects': subjects,
+        'inventory': inventory,
+    }
+    with open(index_file or index_path(nt_file), 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    return index
+
+
+class SubjectIndex:
+    """Lettura delle triple per soggetto da un N-Triples indicizzato, tramite mmap."""
+
+    def __init__(self, nt_file: str, index_file: Optional[str] = None):
+        with open(index_file or index_path(nt_file), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        stat = os.stat(nt_file)
+        if (stat.st_size, stat.st_mtime_ns) != (index['file_size'], index['file_mtime_ns']):
+            raise ValueError(f"Indice non aggiornato per {nt_file}: ricostruirlo con 'nt_index.py build'")
+        self.subjects: Dict[str, List[int]] = index['subjects']
+        self.inventory: Dict[str, str] = index['inventory']
+        self._file = open(nt_file, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if stat.st_size else None
+
+    def subject_triples(self, subject: str) -> List[str]:
+        """Righe N-Triples del soggetto (IRI senza parentesi angolari); lista vuota se assente."""
+        byte_range = self.subjects.get(subject)
+        if byte_range is None:
+            return []
+        start, end = byte_range
+        # Solo '\n' termina una riga: str.splitlines() spezzerebbe anche sui caratteri
+        # (U+2028, \x85, \x0b, \x1c...) che il serializer N-Triples lascia nei literal
+        return [line.decode('utf-8').rstrip('\r') for line in self._mmap[start:end].split(b'\n') if line]
+
+    def vehicle_subject(self, inventory_number: str) -> str:
+        """IRI del veicolo: dal P217 indicizzato o, in mancanza, come _create_subject_iri."""
+        subject = self.inventory.get(inventory_number)
+        if subject is None:
+            subject = VEHICLE_IRI_PREFIX + re.sub(r'[^a-zA-Z0-9]', '', inventory_number.strip())
+        return subject
+
+    def vehicle_triples(self, inventory_number: str) -> List[str]:
+        """Righe N-Triples del veicolo con il numero di inventario indicato."""
+        return self.subject_triples(self.vehicle_subject(inventory_number))
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.subjects)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indice per soggetto di un file N-Triples ordinato")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="costruisce l'indice (<file>.idx.json)")
+    build_parser.add_argument('nt_file')
+    get_parser = subparsers.add_parser('get', help="stampa le triple di un soggetto o di un veicolo")
+    get_parser.add_argument('nt_file')
+    get_parser.add_argument('subject', nargs='?', help="IRI del soggetto")
+    get_parser.add_argument('--inventory', help="numero di inventario del veicolo (es. 101/A)")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        try:
+            index = build_subject_index(args.nt_file)
+        except ValueError as e:
+            print(f"Errore: {e}. Generare l'output con --index oppure ordinarlo prima.")
+            return
+        print(f"Indice: {len(index['subjects'])} soggetti, {len(index['inventory'])} numeri di inventario "
+              f"-> {index_path(args.nt_file)}")
+        return
+
+    if not args.subject and not args.inventory:
+        parser.error("indicare un soggetto oppure --inventory")
+    with SubjectIndex(args.nt_file) as index:
+        subject = args.subject.strip('<>') if args.subject else index.vehicle_subject(args.inventory)
+        for line in index.subject_triples(subject):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
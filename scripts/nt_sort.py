@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Ordinamento canonico di file N-Triples con merge sort esterno a memoria limitata.
+
+rdflib serializza le triple in ordine di hash, quindi due versioni dello stesso
+grafo non sono confrontabili riga per riga. Qui le righe vengono ordinate per
+byte (cioè per soggetto, predicato e oggetto nella loro forma N-Triples) e
+deduplicate: lo stesso grafo produce sempre lo stesso file.
+
+Il file viene letto a blocchi di al massimo max_run_bytes, ogni blocco ordinato in
+memoria e scritto come run temporaneo; i run sono poi fusi con heapq.merge (a
+gruppi di MAX_MERGE_FANIN file aperti), quindi la memoria resta limitata anche per
+output molto più grandi della RAM.
+
+Uso:
+    python scripts/nt_sort.py output/output_automatic_enriched.nt output/output_sorted.nt [--max-run-mb 64]
+"""
+
+import argparse
+import heapq
+import os
+import shutil
+import tempfile
+import time
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_MAX_RUN_BYTES = 64 * 1024 * 1024
+MAX_MERGE_FANIN = 64
+
+
+def _canonical_lines(input_file: str) -> Iterator[bytes]:
+    """Righe di triple del file, senza righe vuote o commenti e con terminatore uniforme."""
+    with open(input_file, 'rb') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith(b'#'):
+                yield line + b'\n'
+
+
+def _write_run(lines: List[bytes], tmp_dir: str, run_number: int) -> str:
+    path = os.path.join(tmp_dir, f"run_{run_number:06d}.nt")
+    lines.sort()
+    with open(path, 'wb') as f:
+        f.writelines(lines)
+    return path
+
+
+def _merge_unique(sources: Iterable[Iterable[bytes]], output_file: str) -> int:
+    """Fonde sorgenti già ordinate in output_file eliminando i duplicati; restituisce le righe scritte."""
+    written = 0
+    previous = None
+    with open(output_file, 'wb') as out:
+        for line in heapq.merge(*sources):
+            if line != previous:
+                out.write(line)
+                written += 1
+                previous = line
+    return written
+
+
+def _merge_runs(run_files: List[str], output_file: str) -> int:
+    handles = [open(path, 'rb') for path in run_files]
+    try:
+        return _merge_unique(handles, output_file)
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def is_sorted_ntriples(input_file: str) -> bool:
+    """True se le triple del file sono già in ordine canonico (ordinate e senza duplicati)."""
+    previous = None
+    for line in _canonical_lines(input_file):
+        if previous is not None and line <= previous:
+            return False
+        previous = line
+    return True
+
+
+def external_sort_ntriples(input_file: str, output_file: str, max_run_bytes: int = DEFAULT_MAX_RUN_BYTES,
+                           tmp_dir: Optional[str] = None) -> int:
+    """
+    Scrive in output_file le triple di input_file ordinate e senza duplicati.
+
+    input_file e output_file possono coincidere.
+
+    Returns:
+        Numero di triple scritte
+    """
+    work_dir = tempfile.mkdtemp(prefix="nt_sort_", dir=tmp_dir or os.path.dirname(os.path.abspath(output_file)))
+    try:
+        # Fase 1: run ordinati di dimensione limitata
+        runs, lines, run_bytes = [], [], 0
+        for line in _canonical_lines(input_file):
+            lines.append(line)
+            run_bytes += len(line)
+            if run_bytes >= max_run_bytes:
+                runs.append(_write_run(lines, work_dir, len(runs)))
+                lines, run_bytes = [], 0
+
+        merged_file = os.path.join(work_dir, "merged.nt")
+        if not runs:
+            # Tutto in un solo blocco: niente file intermedi
+            lines.sort()
+            written = _merge_unique([lines], merged_file)
+        else:
+            if lines:
+                runs.append(_write_run(lines, work_dir, len(runs)))
+            lines = []
+
+            # Fase 2: fusione a più passate se i run superano i file aperti consentiti
+            pass_number = 0
+            while len(runs) > MAX_MERGE_FANIN:
+                merged_runs = []
+                for i in range(0, len(runs), MAX_MERGE_FANIN):
+                    group = runs[i:i + MAX_MERGE_FANIN]
+                    path = os.path.join(work_dir, f"pass{pass_number}_{i // MAX_MERGE_FANIN:06d}.nt")
+                    _merge_runs(group, path)
+                    for run in group:
+                        os.remove(run)
+                    merged_runs.append(path)
+                runs = merged_runs
+                pass_number += 1
+            written = _merge_runs(runs, merged_file)
+
+        os.replace(merged_file, output_file)
+        return written
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ordinamento canonico di un file N-Triples (merge sort esterno)")
+    parser.add_argument('input_file')
+    parser.add_argument('output_file', nargs='?', help="default: sovrascrive input_file")
+    parser.add_argument('--max-run-mb', type=float, default=DEFAULT_MAX_RUN_BYTES / (1024 * 1024),
+                        help="memoria massima per run ordinato in MB (default 64)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input_file):
+        print(f"Errore: File {args.input_file} non trovato!")
+        return
+
+    start = time.perf_counter()
+    output_file = args.output_file or args.input_file
+    written = external_sort_ntriples(args.input_file, output_file, max_run_bytes=int(args.max_run_mb * 1024 * 1024))
+    print(f"Triple ordinate: {written} in {output_file} ({time.perf_counter() - start:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,14 @@ import json
 import re
 import time
 import os
+import threading
+import unicodedata
 from difflib import SequenceMatcher
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Iterable, FrozenSet
 import pickle
+import numpy as np
+import pandas as pd
+from collections import deque
 from urllib.parse import quote
 from rdflib import Namespace
 
@@ -63,6 +68,87 @@ MANUFACTURER_BOOST_KEYWORDS = frozenset([
     'motoring', 'marque',
 ])
 
+# Parole chiave che indicano una descrizione legata ai veicoli (bonus in _calculate_total_score)
+VEHICLE_DESCRIPTION_KEYWORDS = frozenset([
+    'auto', 'car', 'vehicle', 'veicolo', 'automobile', 'marca', 'brand',
+])
+
+
+class KeywordClassMatcher:
+    """
+    Matcher multi-pattern (automa Aho-Corasick) per classi di parole chiave.
+    
+    L'automa viene costruito una sola volta dai set di keyword; `match` scorre
+    il testo in un unico passaggio e restituisce tutte le classi con almeno una
+    keyword contenuta come sottostringa (stessa semantica di `kw in text`).
+    Il costo dipende dalla lunghezza del testo, non dal numero di keyword.
+    """
+    
+    def __init__(self, keyword_classes: Dict[str, Iterable[str]]):
+        self.class_names = list(keyword_classes)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[int] = [0]
+        
+        for bit, class_name in enumerate(self.class_names):
+            for keyword in keyword_classes[class_name]:
+                node = 0
+                for char in keyword.lower():
+                    next_node = self._goto[node].get(char)
+                    if next_node is None:
+                        next_node = len(self._goto)
+                        self._goto[node][char] = next_node
+                        self._goto.append({})
+                        self._output.append(0)
+                    node = next_node
+                self._output[node] |= 1 << bit
+        
+        # Failure links in BFS: ogni nodo eredita le classi dei suoi suffissi
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] |= self._output[self._fail[child]]
+        
+        self._full_mask = (1 << len(self.class_names)) - 1
+        self._mask_to_classes: Dict[int, FrozenSet[str]] = {}
+    
+    def match(self, text: str) -> FrozenSet[str]:
+        """Restituisce le classi di keyword presenti nel testo (case-insensitive)."""
+        if not text:
+            return frozenset()
+        goto, fail, output = self._goto, self._fail, self._output
+        node = 0
+        mask = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                mask |= output[node]
+                if mask == self._full_mask:
+                    break
+        
+        classes = self._mask_to_classes.get(mask)
+        if classes is None:
+            classes = frozenset(name for bit, name in enumerate(self.class_names) if mask & (1 << bit))
+            self._mask_to_classes[mask] = classes
+        return classes
+
+
+# Matcher unico per il filtraggio contestuale delle descrizioni dei candidati
+DESCRIPTION_KEYWORD_MATCHER = KeywordClassMatcher({
+    'manufacturer_reject': MANUFACTURER_REJECT_KEYWORDS,
+    'manufacturer_boost': MANUFACTURER_BOOST_KEYWORDS,
+    'vehicle': VEHICLE_DESCRIPTION_KEYWORDS,
+})
+
 _PREDICATE_CONTEXT_MAP = {
     'P176': 'manufacturer',
     'P1716': 'manufacturer',
@@ -187,13 +273,96 @@ CONTEXT_PRIORITY_WEIGHTS: Dict[str, Dict[str, float]] = {
     },
 }
 
+# Tipi P31 usati da _validate_ontology (compilati una volta nel piano di validazione)
+BRAND_GEOGRAPHIC_REJECT_TYPES = frozenset([
+    'Q515', 'Q484170', 'Q15220960', 'Q1549591', 'Q3957', 'Q532', 'Q486972', 'Q5119', 'Q6256',
+])
+BRAND_VALID_TYPES = frozenset([
+    'Q786820', 'Q936518', 'Q783794', 'Q891723', 'Q1420', 'Q752870', 'Q3231690', 'Q5152161', 'Q848403',
+])
+COUNTRY_VALID_TYPES = frozenset(['Q6256', 'Q3024240', 'Q3336843', 'Q7275'])
+
+_PREDICATE_ID_RE = re.compile(r'/([PQ]\d+)')
+
+# Pattern precompilati per normalize_technical_value / normalize_technical_values.
+# Le varianti più specifiche usate in origine ("155 CV a 5200 giri", "1500 cc", "120 km/h")
+# sono casi particolari di questi pattern e non cambiano mai il risultato.
+_POWER_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(HP|hp|cv|CV|bhp|BHP|kw|KW|ps|PS)(?:\s+a\s+(\d+(?:\.\d+)?)\s*(giri|rpm|giri/min|RPM))?',
+    re.IGNORECASE)
+_DISPLACEMENT_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(cc|CC|cm³|cm3|litri|l|L)', re.IGNORECASE)
+_SPEED_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*(km/h|kmh|KMH|mph|MPH)', re.IGNORECASE)
+
+# Canonicalizzazione delle chiavi di cache: "Citroën" / "Citroen", "Alfa-Romeo" / "Alfa Romeo",
+# apostrofi tipografici e spazi doppi devono condividere la stessa voce di cache
+_TYPOGRAPHIC_QUOTES = str.maketrans({
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'", '\u2032': "'", '`': "'", '\u00b4': "'",
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u00ab': '"', '\u00bb': '"',
+})
+_CACHE_KEY_PUNCTUATION_RE = re.compile(r"[^\w\s']+")
+_WHITESPACE_RE = re.compile(r'\s+')
+VEHICLE_CACHE_PREFIX = 'vehicle:'
+
+
+def canonicalize_cache_key(value: str) -> str:
+    """
+    Restituisce la forma canonica di un valore da usare come chiave di cache.
+    
+    Applica folding degli accenti (NFKD), normalizzazione degli apici tipografici,
+    sostituzione della punteggiatura con spazi e compattazione degli spazi.
+    La forma originale del valore non viene toccata (resta usata per le label).
+    """
+    text = unicodedata.normalize('NFKD', value.translate(_TYPOGRAPHIC_QUOTES))
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = _CACHE_KEY_PUNCTUATION_RE.sub(' ', text)
+    return _WHITESPACE_RE.sub(' ', text).strip().casefold()
+
+
+def legacy_cache_key(value: str) -> str:
+    """Chiave di cache con la vecchia normalizzazione (solo lower + strip)."""
+    return value.lower().strip()
+
+
+def rekey_entity_cache(entity_cache: Dict[str, Dict]) -> Dict[str, Dict]:
+    """
+    Ricalcola le chiavi di una cache entità (JSON dell'enricher) in forma canonica.
+    
+    Le voci veicolo mantengono il prefisso VEHICLE_CACHE_PREFIX; in caso di
+    collisione viene mantenuta la prima voce incontrata.
+    """
+    rekeyed = {}
+    for key, entry in entity_cache.items():
+        if key.startswith(VEHICLE_CACHE_PREFIX):
+            new_key = VEHICLE_CACHE_PREFIX + canonicalize_cache_key(key[len(VEHICLE_CACHE_PREFIX):])
+        else:
+            new_key = canonicalize_cache_key(key)
+        rekeyed.setdefault(new_key, entry)
+    return rekeyed
+
+# Codici motivo dell'ultimo lookup fallito (WikidataEntityLinker.last_miss_reason)
+MISS_NO_CANDIDATES = 'no_candidates'        # nessun candidato restituito dalla ricerca
+MISS_WHITELIST_REJECT = 'whitelist_reject'  # tutti i candidati rifiutati dalla validazione P31
+MISS_BELOW_THRESHOLD = 'below_threshold'    # candidati validi ma sotto soglia di confidenza
+MISS_UNKNOWN = 'unknown'                    # miss letto dalla cache, motivo non noto
+MISS_DEADLINE = 'deadline'                  # ricerca interrotta per scadenza (non salvata in cache)
+MISS_ERROR = 'error'                        # errori di rete/HTTP durante la ricerca (non salvata in cache)
+
+# HTTP 429: tentativi ripetuti dopo un'attesa (Retry-After o backoff esponenziale da RATE_LIMIT_BACKOFF s)
+RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF = 1.0
+
+# Colonne del DataFrame restituito da normalize_technical_values
+TECHNICAL_VALUE_COLUMNS = ['type', 'property', 'original_value', 'normalized_value',
+                           'normalized_unit', 'rpm', 'iri', 'rdf_type']
+
 
 class WikidataEntityLinker:
     """
     Sistema robusto di entity linking verso Wikidata utilizzando l'API ufficiale.
     """
     
-    def __init__(self, cache_file="wikidata_cache.pkl", ontology_config_file="data/wikidata_ontology_config.json", rate_limit_delay=0.1):
+    def __init__(self, cache_file="wikidata_cache.pkl", ontology_config_file="data/wikidata_ontology_config.json", rate_limit_delay=0.1,
+                 response_cache: Optional[Dict] = None):
         """
         Inizializza il linker con cache locale e rate limiting.
         
@@ -201,6 +370,8 @@ class WikidataEntityLinker:
             cache_file: File per il caching locale
             ontology_config_file: File JSON con configurazione ontologia Wikidata
             rate_limit_delay: Delay tra richieste API in secondi
+            response_cache: Risposte API (ricerche e dettagli) in memoria; passando lo stesso
+                dizionario a più linker le richieste uguali vengono fatte una sola volta
         """
         self.cache_file = cache_file
         self.ontology_config_file = ontology_config_file
@@ -213,6 +384,29 @@ class WikidataEntityLinker:
         # Carica cache esistente
         self.cache = self._load_cache()
         
+        # Risposte API della sessione, indipendenti da soglie e predicati: la cache sopra
+        # memorizza il risultato finale di find_best_entity, che dipende da entrambi
+        self.response_cache = response_cache if response_cache is not None else {}
+        
+        # Chiavi già note con la vecchia normalizzazione: un hit sulla chiave canonica
+        # per una forma superficiale non presente qui è un lookup risparmiato
+        self._legacy_cache_keys = set(self.cache)
+        self.canonical_cache_hits = 0
+        
+        # Motivo dell'ultimo find_best_entity senza risultato (MISS_*), None se trovato.
+        # Per thread: il prewarm dell'enricher chiama find_best_entity in parallelo.
+        self._thread_state = threading.local()
+        self._save_lock = threading.Lock()
+        
+        # Pausa condivisa tra i thread dopo un HTTP 429 (time.monotonic() di fine attesa)
+        self._backoff_until = 0.0
+        self._backoff_lock = threading.Lock()
+        self.rate_limit_waits = 0
+        self.last_miss_reason = None
+        
+        # Piani di validazione compilati per predicate_context (vedi _get_validation_plan)
+        self._validation_plans: Dict[Optional[str], Dict[str, Any]] = {}
+        
         # Carica configurazione ontologia da file esterno
         self._load_ontology_config()
     
@@ -257,6 +451,113 @@ class WikidataEntityLinker:
             self.label_weight = 0.8
             self.description_weight = 0.2
             self.historical_translations = {}
+        
+        # La configurazione cambia i tipi accettati: invalida i piani già compilati
+        self._validation_plans = {}
+        
+        # Indice invertito parola → traduzioni storiche che la contengono
+        self._build_translation_index()
+    
+    def _build_translation_index(self):
+        """
+        Costruisce l'indice invertito delle traduzioni storiche.
+        
+        Ogni termine italiano viene indicizzato sotto ciascuna delle sue parole,
+        insieme alla posizione nel file di configurazione: così
+        _generate_alternative_queries trova i termini candidati intersecando le
+        parole della query con l'indice, preservando la priorità del primo
+        termine in ordine di configurazione.
+        """
+        self._translation_word_index: Dict[str, List[Tuple[int, frozenset, str]]] = {}
+        self._translation_exact_index: Dict[str, int] = {}
+        for position, italian_term in enumerate(self.historical_translations):
+            self._translation_exact_index.setdefault(italian_term, position)
+            italian_words = frozenset(italian_term.split())
+            for word in italian_words:
+                self._translation_word_index.setdefault(word, []).append((position, italian_words, italian_term))
+    
+    def _find_historical_translation(self, query_lower: str) -> Optional[str]:
+        """
+        Restituisce il termine italiano da tradurre per la query (o None).
+        
+        Un termine corrisponde se coincide con la query o se tutte le sue parole
+        sono parole della query (evita substring come "italia" in "cisitalia");
+        a parità vince il primo termine della configurazione.
+        """
+        best_position = self._translation_exact_index.get(query_lower)
+        best_term = query_lower if best_position is not None else None
+        
+        query_words = set(query_lower.split())
+        for word in query_words:
+            for position, italian_words, italian_term in self._translation_word_index.get(word, ()):
+                if best_position is not None and position >= best_position:
+                    break
+                if italian_words <= query_words:
+                    best_position = position
+                    best_term = italian_term
+                    break
+        return best_term
+    
+    @property
+    def last_miss_reason(self) -> Optional[str]:
+        """Motivo (MISS_*) dell'ultimo find_best_entity senza risultato nel thread corrente."""
+        return getattr(self._thread_state, 'last_miss_reason', None)
+    
+    @last_miss_reason.setter
+    def last_miss_reason(self, reason: Optional[str]):
+        self._thread_state.last_miss_reason = reason
+    
+    def _compile_validation_plan(self, predicate_context: Optional[str]) -> Dict[str, Any]:
+        """
+        Compila il piano di validazione per un predicate_context.
+        
+        Tutto ciò che dipende solo dal predicato (tipo di validazione, set di tipi
+        accettati/rifiutati, whitelist P31, pesi di priorità, soglia minima) viene
+        calcolato qui una sola volta, così la validazione di ogni candidato si
+        riduce a poche intersezioni tra set.
+        """
+        validation_kind = None
+        check_country = False
+        check_person = False
+        if predicate_context:
+            ctx_lower = predicate_context.lower()
+            if ('P176' in predicate_context or 'P1716' in predicate_context or
+                    'brand' in ctx_lower or 'Marca' in predicate_context):
+                validation_kind = 'brand'
+            else:
+                check_country = 'P495' in predicate_context or 'country' in ctx_lower
+                check_person = 'P287' in predicate_context or 'Person' in predicate_context
+                if check_country:
+                    validation_kind = 'country'
+                elif check_person:
+                    validation_kind = 'person'
+        
+        # Mappa predicate_context URI → nome contesto (manufacturer, model, ...)
+        context = None
+        if predicate_context:
+            m = _PREDICATE_ID_RE.search(predicate_context)
+            if m:
+                context = _PREDICATE_CONTEXT_MAP.get(m.group(1))
+        
+        return {
+            'validation_kind': validation_kind,
+            'check_country': check_country,
+            'check_person': check_person,
+            'context': context,
+            'reject_types': BRAND_GEOGRAPHIC_REJECT_TYPES if validation_kind == 'brand' else frozenset(),
+            'accept_types': (BRAND_VALID_TYPES | frozenset(self.vehicle_types)) if validation_kind == 'brand' else frozenset(),
+            'whitelist': CONTEXT_P31_WHITELIST.get(context),
+            'priority_weights': CONTEXT_PRIORITY_WEIGHTS.get(context),
+            'min_confidence': CONTEXT_MIN_CONFIDENCE.get(context),
+        }
+    
+    def _get_validation_plan(self, predicate_context: Optional[str]) -> Dict[str, Any]:
+        """Restituisce il piano di validazione per il predicato (compilato alla prima richiesta)."""
+        plan = self._validation_plans.get(predicate_context)
+        if plan is None:
+            plan = self._compile_validation_plan(predicate_context)
+            self._validation_plans[predicate_context] = plan
+        return plan
     
     def _validate_ontology(self, entity_id: str, instance_of_ids: List[str], predicate_context: str = None, label: str = "") -> bool:
         """
@@ -271,41 +572,32 @@ class WikidataEntityLinker:
         Returns:
             True se l'entità è compatibile, False altrimenti
         """
+        plan = self._get_validation_plan(predicate_context)
+        
         # Step 1: Validazione BRAND (priorità massima)
-        if predicate_context:
-            # Brand/Manufacturer - DEVE OBBLIGATORIAMENTE avere tipo automotive
-            if 'P176' in predicate_context or 'P1716' in predicate_context or 'brand' in predicate_context.lower() or 'Marca' in predicate_context:
-                # Rifiuta esplicitamente entità geografiche
-                geographic_types = {'Q515', 'Q484170', 'Q15220960', 'Q1549591', 'Q3957', 'Q532', 'Q486972', 'Q5119', 'Q6256'}
-                if any(t in geographic_types for t in instance_of_ids):
-                    return False
-                
-                # OBBLIGATORIO: deve avere tipo automotive/manufacturer
-                valid_brand_types = {'Q786820', 'Q936518', 'Q783794', 'Q891723', 'Q1420', 'Q752870', 'Q3231690', 'Q5152161', 'Q848403'}
-                has_automotive_type = any(t in valid_brand_types or t in self.vehicle_types for t in instance_of_ids)
-                
-                if not has_automotive_type:
-                    return False
-                
-                # Se ha tipo automotive, PASSA anche se ha business/altri tipi
-                return True
-            
-            # Country - deve essere un paese
-            if 'P495' in predicate_context or 'country' in predicate_context.lower():
-                valid_country_types = {'Q6256', 'Q3024240', 'Q3336843', 'Q7275'}
-                if instance_of_ids and not any(t in valid_country_types for t in instance_of_ids):
-                    return False
+        if plan['validation_kind'] == 'brand':
+            # Rifiuta esplicitamente entità geografiche
+            if not plan['reject_types'].isdisjoint(instance_of_ids):
+                return False
             
-            # Person - deve essere umano (Q5)
-            if 'P287' in predicate_context or 'Person' in predicate_context:
-                if 'Q5' not in instance_of_ids:
-                    return False
+            # OBBLIGATORIO: deve avere tipo automotive/manufacturer.
+            # Se ha tipo automotive, PASSA anche se ha business/altri tipi
+            return not plan['accept_types'].isdisjoint(instance_of_ids)
         
-        # Step 2: Rifiuta entità con tipi incompatibili (solo per NON-brand)
-        for instance_id in instance_of_ids:
-            if instance_id in self.incompatible_types:
+        # Country - deve essere un paese
+        if plan['check_country']:
+            if instance_of_ids and COUNTRY_VALID_TYPES.isdisjoint(instance_of_ids):
+                return False
+        
+        # Person - deve essere umano (Q5)
+        if plan['check_person']:
+            if 'Q5' not in instance_of_ids:
                 return False
         
+        # Step 2: Rifiuta entità con tipi incompatibili (solo per NON-brand)
+        if not self.incompatible_types.isdisjoint(instance_of_ids):
+            return False
+        
         # Step 3: Per acronimi brevi (<= 3 caratteri), richiedi tipo automotive esplicito
         if len(label.strip()) <= 3:
             # Deve avere almeno un tipo automotive
@@ -333,29 +625,51 @@ class WikidataEntityLinker:
             if cache_dir and not os.path.exists(cache_dir):
                 os.makedirs(cache_dir, exist_ok=True)
             
-            with open(self.cache_file, 'wb') as f:
-                pickle.dump(self.cache, f)
+            # Snapshot della cache: altri thread possono aggiungere voci durante il salvataggio
+            with self._save_lock, open(self.cache_file, 'wb') as f:
+                pickle.dump(dict(self.cache), f)
         except Exception as e:
             print(f"Errore salvataggio cache: {e}")
     
     def _get_cache_key(self, query: str, entity_type: str = "item", predicate_context: str = None) -> str:
-        """Genera chiave per la cache, includendo il predicato se specificato."""
+        """Genera chiave per la cache (forma canonica), includendo il predicato se specificato."""
         context_part = f":{predicate_context.lower()}" if predicate_context else ""
-        return f"{query.lower().strip()}:{entity_type}{context_part}"
+        return f"{canonicalize_cache_key(query)}:{entity_type}{context_part}"
+    
+    def _get_legacy_cache_key(self, query: str, entity_type: str = "item", predicate_context: str = None) -> str:
+        """Chiave di cache con la normalizzazione precedente (per cache già salvate su disco)."""
+        context_part = f":{predicate_context.lower()}" if predicate_context else ""
+        return f"{legacy_cache_key(query)}:{entity_type}{context_part}"
+    
+    def forget_miss(self, query: str, predicate_context: str = None):
+        """
+        Rimuove dalla cache un risultato negativo (None) per la query, così la
+        prossima chiamata a find_best_entity ripete la ricerca completa.
+        """
+        for key in (self._get_cache_key(query, predicate_context=predicate_context),
+                    self._get_legacy_cache_key(query, predicate_context=predicate_context)):
+            if key in self.cache and self.cache[key] is None:
+                del self.cache[key]
     
-    def _calculate_similarity_score(self, query: str, label: str, description: str = "", predicate_context: str = None) -> float:
+    def _calculate_similarity_score(self, query: str, label: str, description: str = "", predicate_context: str = None,
+                                    description_classes: Optional[FrozenSet[str]] = None) -> float:
         """
         Calcola punteggio di similarità tra query e label/description.
         Con filtraggio contestuale sulla descrizione per il predicato manufacturer.
+        
+        description_classes: classi di keyword della descrizione già calcolate con
+        DESCRIPTION_KEYWORD_MATCHER (evita un secondo passaggio sulla descrizione).
         """
         query_clean = self._clean_text(query)
         label_clean = self._clean_text(label)
         desc_clean = self._clean_text(description)
         
+        if description_classes is None:
+            description_classes = DESCRIPTION_KEYWORD_MATCHER.match(description)
+        
         # Context-aware description filtering per manufacturer
         if predicate_context == 'manufacturer' and description:
-            desc_lower = description.lower()
-            if any(kw in desc_lower for kw in MANUFACTURER_REJECT_KEYWORDS):
+            if 'manufacturer_reject' in description_classes:
                 return 0.0  # Hard reject
         
         # Score basato su label (peso maggiore)
@@ -382,8 +696,7 @@ class WikidataEntityLinker:
         
         # Boost se descrizione conferma produttore automotive
         if predicate_context == 'manufacturer' and description:
-            desc_lower = description.lower()
-            if any(kw in desc_lower for kw in MANUFACTURER_BOOST_KEYWORDS):
+            if 'manufacturer_boost' in description_classes:
                 combined_score = min(combined_score * 1.15, 1.0)
         
         return min(combined_score, 1.0)
@@ -456,23 +769,13 @@ class WikidataEntityLinker:
         query_lower = query.lower()
         translation_found = False
         
-        
-        for italian_term, english_terms in self.historical_translations.items():
-            # Match diretto completo (parola intera)
-            if query_lower == italian_term:
-                translated_queries.extend(english_terms)
-                alternatives.extend(english_terms)
-                translation_found = True
-                break
-            # Match di parole intere separate (evita substring come "italia" in "cisitalia")
-            query_words = set(query_lower.split())
-            italian_words = set(italian_term.split())
-            # Match solo se tutte le parole del termine italiano sono nel query
-            if italian_words.issubset(query_words) and len(italian_words) > 0:
-                translated_queries.extend(english_terms)
-                alternatives.extend(english_terms)
-                translation_found = True
-                break
+        # Lookup sull'indice invertito: costo proporzionale alle parole della query
+        italian_term = self._find_historical_translation(query_lower)
+        if italian_term is not None:
+            english_terms = self.historical_translations[italian_term]
+            translated_queries.extend(english_terms)
+            alternatives.extend(english_terms)
+            translation_found = True
         
         # AGGIUNGI LA QUERY ORIGINALE SOLO DOPO LE TRADUZIONI
         alternatives.append(query)
@@ -510,7 +813,7 @@ class WikidataEntityLinker:
         seen_qids = set()
         
         # Cerca in italiano
-        it_candidates = self._search_wikidata_entities(query, limit=limit, language="it")
+        it_candidates = self._cached_search(query, limit, "it")
         for candidate in it_candidates:
             qid = candidate.get('id')
             if qid and qid not in seen_qids:
@@ -519,7 +822,7 @@ class WikidataEntityLinker:
         
         # Cerca in inglese (solo se non abbiamo già abbastanza risultati)
         if len(all_candidates) < limit:
-            en_candidates = self._search_wikidata_entities(query, limit=limit, language="en")
+            en_candidates = self._cached_search(query, limit, "en")
             for candidate in en_candidates:
                 qid = candidate.get('id')
                 if qid and qid not in seen_qids:
@@ -528,6 +831,63 @@ class WikidataEntityLinker:
         
         return all_candidates[:limit]
     
+    def _cached_search(self, query: str, limit: int, language: str) -> List[Dict]:
+        """_search_wikidata_entities passando da response_cache (solo risposte non vuote)."""
+        key = ('search', query, limit, language)
+        if key not in self.response_cache:
+            candidates = self._search_wikidata_entities(query, limit=limit, language=language)
+            if not candidates:
+                return candidates  # nessun risultato o errore di rete: si ritenta
+            self.response_cache[key] = candidates
+        return self.response_cache[key]
+    
+    def _cached_entity_details(self, entity_id: str) -> Optional[Dict]:
+        """_get_entity_details passando da response_cache (solo risposte valide)."""
+        key = ('details', entity_id)
+        if key not in self.response_cache:
+            details = self._get_entity_details(entity_id)
+            if details is None:
+                return None
+            self.response_cache[key] = details
+        return self.response_cache[key]
+    
+    def _wait_rate_limit_backoff(self):
+        """Attende la fine della pausa impostata dall'ultimo HTTP 429 (anche di un altro thread)."""
+        remaining = self._backoff_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    def _api_get(self, url: str, params: Dict) -> Dict:
+        """
+        GET all'API di Wikidata con rate limiting. Su HTTP 429 tutti i thread si
+        fermano per il Retry-After indicato (o un backoff esponenziale) e la
+        richiesta viene ripetuta; esauriti i tentativi solleva l'errore HTTP.
+        
+        Raises:
+            requests.exceptions.RequestException, ValueError: errori di rete/HTTP o risposta di errore MediaWiki
+        """
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self._wait_rate_limit_backoff()
+            time.sleep(self.rate_limit_delay)
+            response = self.session.get(url, params=params, timeout=10)
+            if response.status_code != 429 or attempt == RATE_LIMIT_RETRIES:
+                break
+            try:
+                delay = float(response.headers.get('Retry-After', ''))
+            except ValueError:
+                delay = RATE_LIMIT_BACKOFF * 2 ** attempt
+            with self._backoff_lock:
+                self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+                self.rate_limit_waits += 1
+            print(f"  [HTTP 429] Wikidata limita le richieste: attesa {delay:.1f}s "
+                  f"(tentativo {attempt + 1}/{RATE_LIMIT_RETRIES})")
+        response.raise_for_status()
+        
+        data = response.json()
+        if 'error' in data:
+            raise ValueError(data['error'].get('info', data['error']))
+        return data
+    
     def _search_wikidata_entities(self, query: str, limit: int = 10, language: str = "it") -> List[Dict]:
         """
         Cerca entità su Wikidata usando wbsearchentities.
@@ -551,15 +911,12 @@ class WikidataEntityLinker:
         }
         
         try:
-            time.sleep(self.rate_limit_delay)
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._api_get(url, params)
             return data.get('search', [])
             
         except Exception as e:
             print(f"Errore ricerca Wikidata per '{query}': {e}")
+            self._thread_state.transport_error = True
             return []
     
     def _get_entity_details(self, entity_id: str) -> Optional[Dict]:
@@ -577,11 +934,7 @@ class WikidataEntityLinker:
         }
         
         try:
-            time.sleep(self.rate_limit_delay)
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self._api_get(url, params)
             entity = data.get('entities', {}).get(entity_id, {})
             
             if entity:
@@ -594,6 +947,7 @@ class WikidataEntityLinker:
                 
         except Exception as e:
             print(f"Errore recupero dettagli per {entity_id}: {e}")
+            self._thread_state.transport_error = True
             
         return None
     
@@ -618,18 +972,21 @@ class WikidataEntityLinker:
                 
         return instance_of_ids
     
-    def _calculate_vehicle_priority_score(self, instance_of_ids: List[str], context: str = None) -> float:
+    def _calculate_vehicle_priority_score(self, instance_of_ids: List[str], context: str = None,
+                                          weights: Optional[Dict[str, float]] = None) -> float:
         """
         Calcola punteggio di priorità basato sui tipi P31.
 
-        Con context specificato usa CONTEXT_PRIORITY_WEIGHTS:
+        Con context specificato usa CONTEXT_PRIORITY_WEIGHTS (o la tabella
+        `weights` già risolta dal piano di validazione):
         - valore positivo (0-100) → normalizzato a 0.0-1.0
         - valore -1 → hard reject, ritorna -1.0
 
         Senza context, usa self.vehicle_types (pesi veicolo generici).
         """
-        if context and context in CONTEXT_PRIORITY_WEIGHTS:
-            weights = CONTEXT_PRIORITY_WEIGHTS[context]
+        if weights is None and context:
+            weights = CONTEXT_PRIORITY_WEIGHTS.get(context)
+        if weights is not None:
             max_priority = 0.0
             for qid in instance_of_ids:
                 w = weights.get(qid)
@@ -648,7 +1005,8 @@ class WikidataEntityLinker:
             return max_priority
     
     def _calculate_total_score(self, query: str, candidate: Dict, similarity_score: float,
-                             priority_score: float, context: str = None) -> float:
+                             priority_score: float, context: str = None,
+                             description_classes: Optional[FrozenSet[str]] = None) -> float:
         """
         Calcola punteggio totale combinando similarità e priorità con pesi adattivi.
         Con contesto definito, il peso P31 aumenta per prediligere il tipo corretto.
@@ -669,9 +1027,9 @@ class WikidataEntityLinker:
         # Bonus per entità con descrizioni rilevanti
         description = candidate.get('description', '')
         if description:
-            desc_lower = description.lower()
-            vehicle_keywords = ['auto', 'car', 'vehicle', 'veicolo', 'automobile', 'marca', 'brand']
-            if any(keyword in desc_lower for keyword in vehicle_keywords):
+            if description_classes is None:
+                description_classes = DESCRIPTION_KEYWORD_MATCHER.match(description)
+            if 'vehicle' in description_classes:
                 total_score += 0.05  # Bonus ridotto per non dominare
         
         # Penalità per match troppo generici con bassa similarità
@@ -680,25 +1038,51 @@ class WikidataEntityLinker:
         
         return min(total_score, 1.0)
     
-    def find_best_entity(self, query: str, min_confidence: float = 0.25, predicate_context: str = None) -> Optional[Dict]:
+    def find_best_entity(self, query: str, min_confidence: float = 0.25, predicate_context: str = None,
+                         deadline: Optional[float] = None) -> Optional[Dict]:
         """
         Trova la migliore entità Wikidata per una query con sistema robusto.
         
         Args:
             query: Termine di ricerca
             min_confidence: Confidenza minima richiesta
+            deadline: Istante limite (time.monotonic()) oltre il quale la ricerca viene
+                interrotta: restituisce None con last_miss_reason = MISS_DEADLINE e
+                non salva nulla in cache, così la query può essere ripetuta per intero
             
         Returns:
             Dizionario con informazioni dell'entità migliore o None
         """
         # Riabilita cache per performance (incluimi il context nel cache key)
         cache_key = self._get_cache_key(query, predicate_context=predicate_context)
+        legacy_key = self._get_legacy_cache_key(query, predicate_context=predicate_context)
+        if cache_key not in self.cache and legacy_key in self.cache:
+            # Voce salvata con la vecchia normalizzazione: migra alla chiave canonica
+            self.cache[cache_key] = self.cache[legacy_key]
         if cache_key in self.cache:
+            if legacy_key not in self._legacy_cache_keys:
+                self.canonical_cache_hits += 1
+                self._legacy_cache_keys.add(legacy_key)
+            self.last_miss_reason = None if self.cache[cache_key] else MISS_UNKNOWN
             return self.cache[cache_key]
         
         best_entity = None
         best_score = 0.0
         
+        # Errori di rete/HTTP in questa ricerca: un miss non sarebbe affidabile
+        self._thread_state.transport_error = False
+        
+        # Statistiche per il codice motivo in caso di nessun match
+        candidates_seen = 0
+        candidates_rejected = 0
+        
+        # Piano di validazione compilato una volta per predicato e riusato per ogni candidato
+        plan = self._get_validation_plan(predicate_context)
+        _pred_ctx = plan['context']
+        whitelist = plan['whitelist']
+        # Applica soglia minima per contesto (evita false similarità numeriche)
+        effective_threshold = max(min_confidence, plan['min_confidence'] or min_confidence)
+        
         # Genera query alternative (include traduzioni e varianti storiche)
         query_alternatives, translated_queries = self._generate_alternative_queries(query)
         
@@ -732,6 +1116,9 @@ class WikidataEntityLinker:
             if not variation.strip():
                 continue
             
+            if deadline is not None and time.monotonic() >= deadline:
+                return self._deadline_expired(query, i, len(all_variations))
+            
             # Usa ricerca multilingue per massimizzare i risultati
             candidates = self._search_wikidata_entities_multilang(variation, limit=5)  # Ridotto per debug
             
@@ -740,10 +1127,14 @@ class WikidataEntityLinker:
                 if not entity_id:
                     continue
                 
+                if deadline is not None and time.monotonic() >= deadline:
+                    return self._deadline_expired(query, i, len(all_variations))
+                
                 # Recupera dettagli completi
-                entity_details = self._get_entity_details(entity_id)
+                entity_details = self._cached_entity_details(entity_id)
                 if not entity_details:
                     continue
+                candidates_seen += 1
                 
                 # Ottieni label e description prima della validazione
                 label = candidate.get('label', '')
@@ -755,33 +1146,25 @@ class WikidataEntityLinker:
                 
                 # Valida compatibilità ontologica PRIMA di calcolare score
                 if not self._validate_ontology(entity_id, instance_of_ids, predicate_context=predicate_context, label=label):
+                    candidates_rejected += 1
                     continue
                 
                 # Whitelist P31: se ha P31 ma nessuno è in whitelist contesto → rifiuta
-                _pred_ctx_for_wl = None
-                if predicate_context:
-                    m_wl = re.search(r'/([PQ]\d+)', predicate_context)
-                    if m_wl:
-                        _pred_ctx_for_wl = _PREDICATE_CONTEXT_MAP.get(m_wl.group(1))
-                if (instance_of_ids and _pred_ctx_for_wl and
-                        _pred_ctx_for_wl in CONTEXT_P31_WHITELIST and
-                        not (set(instance_of_ids) & CONTEXT_P31_WHITELIST[_pred_ctx_for_wl])):
-                    print(f"  [REJECTED WHITELIST ctx={_pred_ctx_for_wl}] {entity_id} ({label}) P31={instance_of_ids}")
+                if instance_of_ids and whitelist is not None and whitelist.isdisjoint(instance_of_ids):
+                    print(f"  [REJECTED WHITELIST ctx={_pred_ctx}] {entity_id} ({label}) P31={instance_of_ids}")
+                    candidates_rejected += 1
                     continue
                 
                 # Calcola similarity score - USA LA VARIANTE CORRENTE per traduzioni!
                 is_translated_query = variation in translated_queries
                 
-                # Mappa predicate_context URI → nome contesto
-                _pred_ctx = None
-                if predicate_context:
-                    m = re.search(r'/([PQ]\d+)', predicate_context)
-                    if m:
-                        _pred_ctx = _PREDICATE_CONTEXT_MAP.get(m.group(1))
+                # Classi di keyword della descrizione: un solo passaggio per candidato
+                description_classes = DESCRIPTION_KEYWORD_MATCHER.match(description)
                 
                 # CRUCIALE: se è una traduzione, usa la variante tradotta per similarity
                 comparison_query = variation if is_translated_query else query
-                similarity_score = self._calculate_similarity_score(comparison_query, label, description, predicate_context=_pred_ctx)
+                similarity_score = self._calculate_similarity_score(comparison_query, label, description, predicate_context=_pred_ctx,
+                                                                    description_classes=description_classes)
                 
                 if is_translated_query:
                     # no-op branch: preserved for clarity when a translated-query-specific
@@ -789,11 +1172,13 @@ class WikidataEntityLinker:
                     pass
 
                 # Calcola priority score basato su P31
-                priority_score = self._calculate_vehicle_priority_score(instance_of_ids, context=_pred_ctx)
+                priority_score = self._calculate_vehicle_priority_score(instance_of_ids, context=_pred_ctx,
+                                                                        weights=plan['priority_weights'])
                 
                 # Hard reject: tipo P31 incompatibile con il contesto
                 if priority_score < 0:
                     print(f"  [REJECTED P31 ctx={_pred_ctx}] {entity_id} ({label}) - tipo incompatibile")
+                    candidates_rejected += 1
                     continue
                 
                 # PENALITA' PER VARIANTI MOLTO DIVERSE: Se la variante testata è molto diversa 
@@ -820,10 +1205,9 @@ class WikidataEntityLinker:
                     print(f"    [PENALTA MODERATA: variante '{variation}' è {variation_original_similarity:.2f} simile a '{query}' - priority {original_priority_score:.1f} -> {priority_score:.1f}]")
                 
                 # Calcola score totale con priority_score corretto
-                total_score = self._calculate_total_score(query, candidate, similarity_score, priority_score, context=_pred_ctx)
+                total_score = self._calculate_total_score(query, candidate, similarity_score, priority_score, context=_pred_ctx,
+                                                          description_classes=description_classes)
                 
-                # Applica soglia minima per contesto (evita false similarità numeriche)
-                effective_threshold = max(min_confidence, CONTEXT_MIN_CONFIDENCE.get(_pred_ctx, min_confidence))
                 if similarity_score < effective_threshold:
                     print(f"  [REJECTED THRESHOLD ctx={_pred_ctx}] {entity_id} ({label}) sim={similarity_score:.2f} < {effective_threshold:.2f}")
                     continue
@@ -897,14 +1281,33 @@ class WikidataEntityLinker:
             print(f"\\n=== MIGLIOR RISULTATO FINALE ===")
             print(f"QID: {best_entity['qid']} con score {best_score:.3f}")
             print(f"Query vincente: '{best_entity['query_variation']}'")
+            self.last_miss_reason = None
+        elif self._thread_state.transport_error:
+            # Miss dovuto a errori di rete: non va in cache, la query verrà ripetuta
+            print(f"  [ERRORE RETE] '{query}' non risolta per errori di comunicazione con Wikidata")
+            self.last_miss_reason = MISS_ERROR
+            return None
+        elif candidates_seen == 0:
+            self.last_miss_reason = MISS_NO_CANDIDATES
+        elif candidates_rejected == candidates_seen:
+            self.last_miss_reason = MISS_WHITELIST_REJECT
+        else:
+            self.last_miss_reason = MISS_BELOW_THRESHOLD
         
         # Salva risultato in cache
         self.cache[cache_key] = best_entity
+        self._legacy_cache_keys.add(legacy_key)
         if len(self.cache) % 10 == 0:
             self._save_cache()
         
         return best_entity
     
+    def _deadline_expired(self, query: str, variations_done: int, variations_total: int) -> None:
+        """Ricerca interrotta per scadenza: nessun risultato e nessuna voce in cache."""
+        print(f"  [DEADLINE] '{query}' interrotta dopo {variations_done}/{variations_total} varianti")
+        self.last_miss_reason = MISS_DEADLINE
+        return None
+    
     def normalize_technical_value(self, value: str) -> Optional[Dict]:
         """
         Normalizza valori tecnici come potenza (P2109), cilindrata, velocità in formato strutturato.
@@ -919,105 +1322,164 @@ class WikidataEntityLinker:
         value_clean = value.strip()
         
         # Pattern per potenza (P2109 e varianti)
-        power_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(HP|hp|cv|CV|bhp|BHP|kw|KW|ps|PS)(?:\s+a\s+(\d+(?:\.\d+)?)\s*(giri|rpm|giri/min|RPM))?',
-            r'(\d+(?:\.\d+)?)\s*(CV|cv|HP|hp)\s+a\s+(\d+(?:\.\d+)?)\s*(giri|rpm)',
-            r'(\d+(?:\.\d+)?)\s*(CV|cv|HP|hp)',
-        ]
-        
-        for pattern in power_patterns:
-            match = re.search(pattern, value_clean, re.IGNORECASE)
-            if match:
-                power_value = float(match.group(1))
-                power_unit = match.group(2).upper()
-                rpm_value = match.group(3) if len(match.groups()) >= 3 and match.group(3) else None
-                
-                # Normalizza unità di potenza a CV (standard europeo)
-                normalized_power = power_value
-                if power_unit in ['HP', 'BHP']:
-                    normalized_power = power_value * 1.0139  # HP to CV conversion
-                elif power_unit in ['KW', 'KW']:
-                    normalized_power = power_value * 1.36   # kW to CV conversion
-                elif power_unit == 'PS':
-                    normalized_power = power_value  # PS ≈ CV
-                
-                # Crea IRI strutturato
-                iri_suffix = f"power_{int(normalized_power)}cv"
-                if rpm_value:
-                    iri_suffix += f"_at_{rpm_value}rpm"
-                
-                return {
-                    'type': 'power',
-                    'property': 'P2109',
-                    'original_value': value_clean,
-                    'normalized_value': normalized_power,
-                    'normalized_unit': 'CV',
-                    'rpm': rpm_value,
-                    'iri': EX[iri_suffix],
-                    'rdf_type': EX['PowerMeasurement'],
-                    'has_rpm': bool(rpm_value)
-                }
+        match = _POWER_PATTERN.search(value_clean)
+        if match:
+            power_value = float(match.group(1))
+            power_unit = match.group(2).upper()
+            rpm_value = match.group(3) if match.group(3) else None
+            
+            # Normalizza unità di potenza a CV (standard europeo)
+            normalized_power = power_value
+            if power_unit in ['HP', 'BHP']:
+                normalized_power = power_value * 1.0139  # HP to CV conversion
+            elif power_unit == 'KW':
+                normalized_power = power_value * 1.36   # kW to CV conversion
+            elif power_unit == 'PS':
+                normalized_power = power_value  # PS ≈ CV
+            
+            # Crea IRI strutturato
+            iri_suffix = f"power_{int(normalized_power)}cv"
+            if rpm_value:
+                iri_suffix += f"_at_{rpm_value}rpm"
+            
+            return {
+                'type': 'power',
+                'property': 'P2109',
+                'original_value': value_clean,
+                'normalized_value': normalized_power,
+                'normalized_unit': 'CV',
+                'rpm': rpm_value,
+                'iri': EX[iri_suffix],
+                'rdf_type': EX['PowerMeasurement'],
+                'has_rpm': bool(rpm_value)
+            }
         
         # Pattern per cilindrata
-        displacement_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(cc|CC|cm³|cm3|litri|l|L)',
-            r'(\d+(?:\.\d+)?)\s*(cc|CC)',
-        ]
-        
-        for pattern in displacement_patterns:
-            match = re.search(pattern, value_clean, re.IGNORECASE)
-            if match:
-                displacement_value = float(match.group(1))
-                displacement_unit = match.group(2).lower()
-                
-                # Normalizza a cc
-                normalized_displacement = displacement_value
-                if displacement_unit in ['l', 'litri']:
-                    normalized_displacement = displacement_value * 1000
-                
-                iri_suffix = f"displacement_{int(normalized_displacement)}cc"
-                
-                return {
-                    'type': 'displacement',
-                    'property': 'P8628', 
-                    'original_value': value_clean,
-                    'normalized_value': normalized_displacement,
-                    'normalized_unit': 'cc',
-                    'iri': EX[iri_suffix],
-                    'rdf_type': EX['DisplacementMeasurement']
-                }
+        match = _DISPLACEMENT_PATTERN.search(value_clean)
+        if match:
+            displacement_value = float(match.group(1))
+            displacement_unit = match.group(2).lower()
+            
+            # Normalizza a cc
+            normalized_displacement = displacement_value
+            if displacement_unit in ['l', 'litri']:
+                normalized_displacement = displacement_value * 1000
+            
+            iri_suffix = f"displacement_{int(normalized_displacement)}cc"
+            
+            return {
+                'type': 'displacement',
+                'property': 'P8628', 
+                'original_value': value_clean,
+                'normalized_value': normalized_displacement,
+                'normalized_unit': 'cc',
+                'iri': EX[iri_suffix],
+                'rdf_type': EX['DisplacementMeasurement']
+            }
         
         # Pattern per velocità
-        speed_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(km/h|kmh|KMH|mph|MPH)',
-            r'(\d+(?:\.\d+)?)\s*(km/h|kmh)',
-        ]
-        
-        for pattern in speed_patterns:
-            match = re.search(pattern, value_clean, re.IGNORECASE)
-            if match:
-                speed_value = float(match.group(1))
-                speed_unit = match.group(2).lower()
-                
-                # Normalizza a km/h
-                normalized_speed = speed_value
-                if speed_unit in ['mph']:
-                    normalized_speed = speed_value * 1.60934  # mph to km/h
-                
-                iri_suffix = f"speed_{int(normalized_speed)}kmh"
-                
-                return {
-                    'type': 'speed',
-                    'property': 'P2052',
-                    'original_value': value_clean,
-                    'normalized_value': normalized_speed,
-                    'normalized_unit': 'km/h',
-                    'iri': EX[iri_suffix],
-                    'rdf_type': EX['SpeedMeasurement']
-                }
+        match = _SPEED_PATTERN.search(value_clean)
+        if match:
+            speed_value = float(match.group(1))
+            speed_unit = match.group(2).lower()
+            
+            # Normalizza a km/h
+            normalized_speed = speed_value
+            if speed_unit in ['mph']:
+                normalized_speed = speed_value * 1.60934  # mph to km/h
+            
+            iri_suffix = f"speed_{int(normalized_speed)}kmh"
+            
+            return {
+                'type': 'speed',
+                'property': 'P2052',
+                'original_value': value_clean,
+                'normalized_value': normalized_speed,
+                'normalized_unit': 'km/h',
+                'iri': EX[iri_suffix],
+                'rdf_type': EX['SpeedMeasurement']
+            }
         
         return None
     
+    def normalize_technical_values(self, values: pd.Series) -> pd.DataFrame:
+        """
+        Versione vettoriale di normalize_technical_value per un'intera colonna.
+        
+        Ogni stringa distinta viene analizzata una sola volta (i duplicati, molto
+        frequenti nei cataloghi, riusano il risultato) con pattern precompilati e
+        `str.extract`; le righe non riconosciute o non stringa restano NaN.
+        
+        Returns:
+            DataFrame con lo stesso indice di `values` e colonne TECHNICAL_VALUE_COLUMNS
+        """
+        codes, uniques = pd.factorize(values)
+        uniques = pd.Series(uniques, dtype=object)
+        is_str = uniques.map(lambda v: isinstance(v, str)).astype(bool)
+        
+        unique_frame = pd.DataFrame(index=uniques.index, columns=TECHNICAL_VALUE_COLUMNS, dtype=object)
+        text = uniques[is_str].str.strip()
+        
+        if not text.empty:
+            power = text.str.extract(_POWER_PATTERN)
+            displacement = text.str.extract(_DISPLACEMENT_PATTERN)
+            speed = text.str.extract(_SPEED_PATTERN)
+            
+            # Stessa precedenza del percorso per-cella: potenza, cilindrata, velocità
+            is_power = power[0].notna()
+            is_displacement = ~is_power & displacement[0].notna()
+            is_speed = ~is_power & ~is_displacement & speed[0].notna()
+            
+            if is_power.any():
+                raw = power.loc[is_power, 0].astype(float)
+                unit = power.loc[is_power, 1].str.upper()
+                normalized = raw * np.select([unit.isin(['HP', 'BHP']), unit == 'KW'], [1.0139, 1.36], 1.0)
+                rpm = power.loc[is_power, 2]
+                suffix = 'power_' + np.floor(normalized).astype('int64').astype(str) + 'cv'
+                suffix = suffix.where(rpm.isna(), suffix + '_at_' + rpm.fillna('') + 'rpm')
+                self._fill_technical_rows(unique_frame, text, is_power, 'power', 'P2109', normalized,
+                                          'CV', suffix, 'PowerMeasurement', rpm=rpm)
+            
+            if is_displacement.any():
+                raw = displacement.loc[is_displacement, 0].astype(float)
+                unit = displacement.loc[is_displacement, 1].str.lower()
+                normalized = raw.where(~unit.isin(['l', 'litri']), raw * 1000)
+                suffix = 'displacement_' + np.floor(normalized).astype('int64').astype(str) + 'cc'
+                self._fill_technical_rows(unique_frame, text, is_displacement, 'displacement', 'P8628', normalized,
+                                          'cc', suffix, 'DisplacementMeasurement')
+            
+            if is_speed.any():
+                raw = speed.loc[is_speed, 0].astype(float)
+                unit = speed.loc[is_speed, 1].str.lower()
+                normalized = raw.where(unit != 'mph', raw * 1.60934)
+                suffix = 'speed_' + np.floor(normalized).astype('int64').astype(str) + 'kmh'
+                self._fill_technical_rows(unique_frame, text, is_speed, 'speed', 'P2052', normalized,
+                                          'km/h', suffix, 'SpeedMeasurement')
+        
+        # Riga vuota in coda per i valori mancanti (codice -1 di factorize)
+        empty_row = pd.DataFrame([[None] * len(TECHNICAL_VALUE_COLUMNS)], columns=TECHNICAL_VALUE_COLUMNS, dtype=object)
+        unique_frame = pd.concat([unique_frame, empty_row], ignore_index=True)
+        codes = np.where(codes < 0, len(unique_frame) - 1, codes)
+        
+        result = unique_frame.iloc[codes].reset_index(drop=True)
+        result.index = values.index
+        return result
+    
+    def _fill_technical_rows(self, frame: pd.DataFrame, text: pd.Series, mask: pd.Series, value_type: str,
+                             property_id: str, normalized: pd.Series, unit: str, iri_suffix: pd.Series,
+                             rdf_type: str, rpm: Optional[pd.Series] = None):
+        """Scrive in `frame` le righe riconosciute di un tipo di valore tecnico."""
+        rows = mask[mask].index
+        frame.loc[rows, 'type'] = value_type
+        frame.loc[rows, 'property'] = property_id
+        frame.loc[rows, 'original_value'] = text[rows]
+        frame.loc[rows, 'normalized_value'] = normalized
+        frame.loc[rows, 'normalized_unit'] = unit
+        frame.loc[rows, 'iri'] = [EX[suffix] for suffix in iri_suffix]
+        frame.loc[rows, 'rdf_type'] = EX[rdf_type]
+        if rpm is not None:
+            frame.loc[rows, 'rpm'] = rpm.where(rpm.notna(), None)
+    
     def link_entities_batch(self, queries: List[str], min_confidence: float = 0.3) -> Dict[str, Optional[Dict]]:
         """
         Esegue entity linking per una lista di queries.
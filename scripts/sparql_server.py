@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Endpoint SPARQL HTTP locale, in sola lettura, sul grafo generato.
+
+Il grafo viene caricato una volta in memoria (lo store di rdflib è indicizzato
+SPO/POS/OSP) e le risposte sono tenute in una cache LRU con chiave la query
+normalizzata. A ogni richiesta il server controlla dimensione e data di modifica
+del file: quando la pipeline scrive una nuova versione dell'output il grafo viene
+ricaricato e la cache svuotata.
+
+Protocollo (sottoinsieme di SPARQL 1.1 Protocol):
+    GET  /sparql?query=...                     SELECT/ASK -> JSON, CONSTRUCT/DESCRIBE -> N-Triples
+    POST /sparql  (application/sparql-query o form con query=...)
+
+Uso:
+    python scripts/sparql_server.py [--graph output/output_automatic_enriched_v2.nt] [--port 8890]
+"""
+
+import argparse
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from rdflib import Graph
+from rdflib.plugins.sparql import prepareQuery
+
+from triple_store import QUERY_PREFIXES
+
+DEFAULT_PORT = 8890
+RESULT_CACHE_SIZE = 1024
+
+# Spazi e commenti fuori dai literal e dagli IRI: la normalizzazione non deve toccare '...' "..." <...>
+QUERY_TOKEN_PATTERN = re.compile(r'"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|<[^<>\s]*>|(?P<gap>(?:\s|#[^\r\n]*)+)')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Forma canonica della query per la cache: commenti '#' rimossi e spazi compattati
+    fuori da literal e IRI. I commenti vanno tolti prima di unire le righe, altrimenti
+    "LIMIT 1" a capo dopo un '#' e "# LIMIT 1" (commentato) avrebbero la stessa chiave.
+    """
+    return QUERY_TOKEN_PATTERN.sub(lambda m: ' ' if m.group('gap') else m.group(0), query).strip()
+
+
+class SPARQLEndpoint:
+    """Grafo in memoria con cache LRU delle risposte, ricaricato quando il file cambia."""
+
+    def __init__(self, graph_file: str, cache_size: int = RESULT_CACHE_SIZE):
+        self.graph_file = graph_file
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[str, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._version = None
+        self.graph = Graph()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._check_version()
+        # Il parser SPARQL di rdflib si inizializza alla prima query: meglio all'avvio che sulla prima pagina
+        prepareQuery("ASK { ?s ?p ?o }")
+
+    def _file_version(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.graph_file)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+
+    def _check_version(self):
+        """Ricarica il grafo (e svuota la cache) se il file di output è cambiato."""
+        version = self._file_version()
+        if version == self._version or version is None:
+            return
+        with self._reload_lock:
+            if version == self._version:
+                return  # ricaricato da un'altra richiesta nel frattempo
+            start = time.perf_counter()
+            graph = Graph()
+            try:
+                graph.parse(self.graph_file, format='nt')
+            except Exception as e:
+                # File in scrittura dalla pipeline: si continua con la versione precedente
+                print(f"Warning: Impossibile ricaricare {self.graph_file}: {e}")
+                return
+            for prefix, namespace in QUERY_PREFIXES.items():
+                graph.bind(prefix, namespace)
+            with self._lock:
+                self.graph = graph
+                self._cache.clear()
+                self._version = version
+            print(f"Grafo caricato: {len(graph)} triple da {self.graph_file} in {time.perf_counter() - start:.2f}s")
+
+    def execute(self, query: str) -> Tuple[str, bytes]:
+        """Esegue la query e restituisce (content type, corpo della risposta)."""
+        self._check_version()
+        key = normalize_query(query)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached
+            self.cache_misses += 1
+            graph = self.graph
+
+        result = graph.query(query, initNs=QUERY_PREFIXES)
+        if result.type in ('CONSTRUCT', 'DESCRIBE'):
+            response = ('application/n-triples; charset=utf-8', result.graph.serialize(format='nt', encoding='utf-8'))
+        else:
+            response = ('application/sparql-results+json', result.serialize(format='json'))
+
+        with self._lock:
+            if graph is self.graph:  # non mettere in cache risposte di una versione superata
+                self._cache[key] = response
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return response
+
+
+class SPARQLRequestHandler(BaseHTTPRequestHandler):
+    endpoint: SPARQLEndpoint = None
+
+    def _respond(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, query: Optional[str]):
+        if not query:
+            self._respond(400, 'text/plain; charset=utf-8', "Parametro 'query' mancante".encode('utf-8'))
+            return
+        try:
+            content_type, body = self.endpoint.execute(query)
+        except Exception as e:
+            # Query malformate o update (non ammessi: l'endpoint è in sola lettura)
+            self._respond(400, 'text/plain; charset=utf-8', f"Query non valida: {e}".encode('utf-8'))
+            return
+        self._respond(200, content_type, body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != '/sparql':
+            self._respond(404, 'text/plain; charset=utf-8', b"Endpoint: /sparql")
+            return
+        self._handle(parse_qs(url.query).get('query', [None])[0])
+
+    def do_POST(self):
+        if urlparse(self.path).path != '/sparql':
+            self._respond(404, 'text/plain; charset=utf-8', b"Endpoint: /sparql")
+            return
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+        if self.headers.get('Content-Type', '').startswith('application/sparql-query'):
+            self._handle(body)
+        else:
+            self._handle(parse_qs(body).get('query', [None])[0])
+
+    def log_message(self, format, *args):
+        pass  # niente log per richiesta: le pagine del sito interrogano a ogni visualizzazione
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Endpoint SPARQL locale in sola lettura sul grafo generato")
+    parser.add_argument('--graph', default=os.path.join(root, "output", "output_automatic_enriched_v2.nt"),
+                        help="file N-Triples da servire (ricaricato quando cambia)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-size', type=int, default=RESULT_CACHE_SIZE,
+                        help=f"risposte tenute nella cache LRU (default {RESULT_CACHE_SIZE})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.graph):
+        print(f"Errore: File {args.graph} non trovato!")
+        return
+
+    SPARQLRequestHandler.endpoint = SPARQLEndpoint(args.graph, cache_size=args.cache_size)
+    server = ThreadingHTTPServer((args.host, args.port), SPARQLRequestHandler)
+    print(f"Endpoint SPARQL su http://{args.host}:{args.port}/sparql (Ctrl+C per terminare)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        endpoint = SPARQLRequestHandler.endpoint
+        print(f"\nRisposte dalla cache: {endpoint.cache_hits}, query eseguite: {endpoint.cache_misses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Triple store su disco (SQLite) per interrogare il grafo RDF senza riparsare l'N-Triples.
+
+SQLiteTripleStore è uno Store rdflib: una tabella di triple con i termini in
+forma N3 e tre indici (SPO come chiave primaria, POS, OSP), così ogni pattern
+con almeno un termine fissato diventa una ricerca su indice. Aperto dentro un
+rdflib.Graph supporta sia i pattern di triple sia SPARQL (il motore di rdflib
+valuta i basic graph pattern chiamando triples()).
+
+Uso:
+    python scripts/triple_store.py load output/grafo.sqlite output/output_automatic_enriched.nt
+    python scripts/triple_store.py query output/grafo.sqlite "SELECT ?v WHERE { ?v wdt:P176 wd:Q27597 }"
+    python scripts/triple_store.py pattern output/grafo.sqlite "?" "wdt:P176" "wd:Q27597"
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+from rdflib import Graph, Namespace, URIRef
+from rdflib.namespace import RDF, RDFS, XSD
+from rdflib.store import Store, VALID_STORE, NO_STORE
+from rdflib.util import from_n3
+
+# Prefissi disponibili nelle query (oltre a quelli salvati nello store)
+QUERY_PREFIXES = {
+    'ex': Namespace("http://example.org/"),
+    'schema': Namespace("https://schema.org/"),
+    'wd': Namespace("http://www.wikidata.org/entity/"),
+    'wdt': Namespace("http://www.wikidata.org/prop/direct/"),
+    'rdf': RDF,
+    'rdfs': RDFS,
+    'xsd': XSD,
+}
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS triples (
+    s TEXT NOT NULL,
+    p TEXT NOT NULL,
+    o TEXT NOT NULL,
+    PRIMARY KEY (s, p, o)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS triples_pos ON triples (p, o, s);
+CREATE INDEX IF NOT EXISTS triples_osp ON triples (o, s, p);
+CREATE TABLE IF NOT EXISTS namespaces (
+    prefix TEXT PRIMARY KEY,
+    uri TEXT NOT NULL
+);
+"""
+
+# Batch di inserimenti per transazione durante il caricamento
+LOAD_BATCH_SIZE = 10000
+
+
+class SQLiteTripleStore(Store):
+    """
+    Store rdflib persistente su SQLite, senza contesti (un grafo per file).
+
+    Le scritture restano nella transazione corrente fino a commit() o close().
+    """
+
+    context_aware = False
+    formula_aware = False
+    transaction_aware = False
+    graph_aware = False
+
+    def __init__(self, configuration: Optional[str] = None, identifier=None):
+        self.identifier = identifier
+        self._conn: Optional[sqlite3.Connection] = None
+        super().__init__(configuration)
+
+    def open(self, configuration: str, create: bool = True) -> int:
+        if not create and not os.path.exists(configuration):
+            return NO_STORE
+        store_dir = os.path.dirname(configuration)
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+        self._conn = sqlite3.connect(configuration)
+        self._conn.executescript(SCHEMA_SQL)
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction: bool = True):
+        if self._conn is None:
+            return
+        if commit_pending_transaction:
+            self._conn.commit()
+        self._conn.close()
+        self._conn = None
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def add(self, triple, context=None, quoted: bool = False):
+        Store.add(self, triple, context, quoted)
+        self._conn.execute("INSERT OR IGNORE INTO triples VALUES (?, ?, ?)", tuple(term.n3() for term in triple))
+
+    def addN(self, quads: Iterable):
+        self._conn.executemany("INSERT OR IGNORE INTO triples VALUES (?, ?, ?)",
+                               ((s.n3(), p.n3(), o.n3()) for s, p, o, _ in quads))
+
+    def _where(self, triple_pattern) -> Tuple[str, list]:
+        clauses, params = [], []
+        for column, term in zip(('s', 'p', 'o'), triple_pattern):
+            if term is not None:
+                clauses.append(f"{column} = ?")
+                params.append(term.n3())
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def remove(self, triple_pattern, context=None):
+        where, params = self._where(triple_pattern)
+        self._conn.execute("DELETE FROM triples" + where, params)
+
+    def triples(self, triple_pattern, context=None) -> Iterator:
+        s, p, o = triple_pattern
+        where, params = self._where(triple_pattern)
+        # Solo le colonne non fissate vanno decodificate
+        for row in self._conn.execute("SELECT s, p, o FROM triples" + where, params):
+            yield (s if s is not None else from_n3(row[0]),
+                   p if p is not None else from_n3(row[1]),
+                   o if o is not None else from_n3(row[2])), iter(())
+
+    def __len__(self, context=None) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM triples").fetchone()[0]
+
+    def contexts(self, triple=None):
+        return iter(())
+
+    def bind(self, prefix: str, namespace: URIRef, override: bool = True):
+        if not override and (self.namespace(prefix) is not None or self.prefix(namespace) is not None):
+            return
+        self._conn.execute("DELETE FROM namespaces WHERE uri = ?", (str(namespace),))
+        self._conn.execute("INSERT OR REPLACE INTO namespaces VALUES (?, ?)", (prefix, str(namespace)))
+
+    def namespace(self, prefix: str) -> Optional[URIRef]:
+        row = self._conn.execute("SELECT uri FROM namespaces WHERE prefix = ?", (prefix,)).fetchone()
+        return URIRef(row[0]) if row else None
+
+    def prefix(self, namespace: URIRef) -> Optional[str]:
+        row = self._conn.execute("SELECT prefix FROM namespaces WHERE uri = ?", (str(namespace),)).fetchone()
+        return row[0] if row else None
+
+    def namespaces(self) -> Iterator[Tuple[str, URIRef]]:
+        for prefix, uri in self._conn.execute("SELECT prefix, uri FROM namespaces").fetchall():
+            yield prefix, URIRef(uri)
+
+
+def open_store(store_file: str, create: bool = False) -> Graph:
+    """Apre lo store come rdflib.Graph (create=True lo crea se non esiste)."""
+    graph = Graph(store=SQLiteTripleStore())
+    if graph.open(store_file, create=create) != VALID_STORE:
+        raise FileNotFoundError(f"Store {store_file} non trovato")
+    return graph
+
+
+def export_graph(graph: Graph, store_file: str) -> int:
+    """
+    Scrive un grafo in memoria nello store su disco, sostituendone il contenuto.
+
+    Returns:
+        Numero di triple nello store
+    """
+    if os.path.exists(store_file):
+        os.remove(store_file)
+    store_graph = open_store(store_file, create=True)
+    try:
+        for prefix, namespace in graph.namespaces():
+            store_graph.store.bind(prefix, namespace)
+        store_graph.store.addN((s, p, o, store_graph) for s, p, o in graph)
+        store_graph.store.commit()
+        return len(store_graph)
+    finally:
+        store_graph.close()
+
+
+def load_ntriples(nt_file: str, store_file: str) -> int:
+    """Carica un file N-Triples nello store (in aggiunta alle triple già presenti)."""
+    store_graph = open_store(store_file, create=True)
+    try:
+        batch = Graph()
+        with open(nt_file, 'r', encoding='utf-8') as f:
+            lines = []
+            for line in f:
+                lines.append(line)
+                if len(lines) >= LOAD_BATCH_SIZE:
+                    batch.parse(data=''.join(lines), format='nt')
+                    store_graph.store.addN((s, p, o, store_graph) for s, p, o in batch)
+                    store_graph.store.commit()
+                    batch = Graph()
+                    lines = []
+            if lines:
+                batch.parse(data=''.join(lines), format='nt')
+                store_graph.store.addN((s, p, o, store_graph) for s, p, o in batch)
+        store_graph.store.commit()
+        return len(store_graph)
+    finally:
+        store_graph.close()
+
+
+def _pattern_term(text: str):
+    """Termine di un pattern da riga di comando: '?' o '?x' = variabile, altrimenti N3 o prefisso:nome."""
+    if text.startswith('?'):
+        return None
+    prefix, sep, local = text.partition(':')
+    if sep and prefix in QUERY_PREFIXES and not text.startswith('<'):
+        return QUERY_PREFIXES[prefix][local]
+    return from_n3(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Triple store SQLite indicizzato per il grafo RDF")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    load_parser = subparsers.add_parser('load', help="carica uno o più file N-Triples nello store")
+    load_parser.add_argument('store')
+    load_parser.add_argument('nt_files', nargs='+')
+    query_parser = subparsers.add_parser('query', help="esegue una query SPARQL")
+    query_parser.add_argument('store')
+    query_parser.add_argument('sparql')
+    pattern_parser = subparsers.add_parser('pattern', help="cerca un pattern di triple (? = qualsiasi)")
+    pattern_parser.add_argument('store')
+    pattern_parser.add_argument('subject')
+    pattern_parser.add_argument('predicate')
+    pattern_parser.add_argument('object')
+    args = parser.parse_args()
+
+    if args.command == 'load':
+        for nt_file in args.nt_files:
+            start = time.perf_counter()
+            total = load_ntriples(nt_file, args.store)
+            print(f"Caricato {nt_file} in {time.perf_counter() - start:.2f}s ({total} triple nello store)")
+        return
+
+    graph = open_store(args.store)
+    try:
+        start = time.perf_counter()
+        if args.command == 'query':
+            rows = list(graph.query(args.sparql, initNs=QUERY_PREFIXES))
+        else:
+            pattern = tuple(_pattern_term(t) for t in (args.subject, args.predicate, args.object))
+            rows = list(graph.triples(pattern))
+        elapsed = time.perf_counter() - start
+        for row in rows:
+            print("\t".join(term.n3(graph.namespace_manager) if term is not None else '' for term in row))
+        print(f"\n{len(rows)} risultati in {elapsed * 1000:.1f} ms", file=sys.stderr)
+    finally:
+        graph.close()
+
+
+if __name__ == "__main__":
+    main()
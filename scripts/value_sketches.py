@@ -0,0 +1,188 @@
+"""
+Riassunti a memoria costante dei valori di una proprietà (sketch).
+
+Per statistiche su grafi molto grandi non si tengono tutti i valori osservati:
+- ReservoirSample: campione casuale uniforme di k valori (algoritmo R)
+- HyperLogLog: stima del numero di valori distinti con 2^p registri da un byte
+- SpaceSaving: i valori più frequenti (heavy hitters) con al massimo capacity contatori
+
+Tutti gli sketch sono combinabili con merge(), quindi i riassunti calcolati in
+processi diversi (parti di file, più file) si sommano senza rileggere i dati.
+"""
+
+import hashlib
+import heapq
+import math
+import random
+from typing import Dict, Hashable, List, Optional, Tuple
+
+# Parametri di default per ValueSummary
+SAMPLE_SIZE = 10
+HLL_PRECISION = 12          # 4096 registri: errore standard ~1.6%
+TOPK_CAPACITY = 64          # contatori tenuti da SpaceSaving
+SKETCH_SEED = 0             # campioni riproducibili tra esecuzioni
+
+
+def _hash64(value: bytes) -> int:
+    """Hash a 64 bit stabile tra processi (hash() di Python è randomizzato per bytes/str)."""
+    return int.from_bytes(hashlib.blake2b(value, digest_size=8).digest(), 'big')
+
+
+class ReservoirSample:
+    """Campione uniforme di al massimo k elementi da uno stream di lunghezza ignota."""
+
+    def __init__(self, k: int = SAMPLE_SIZE, seed: Optional[int] = SKETCH_SEED):
+        self.k = k
+        self.seen = 0
+        self.items: List = []
+        self._random = random.Random(seed)
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.k:
+            self.items.append(item)
+        else:
+            slot = self._random.randrange(self.seen)
+            if slot < self.k:
+                self.items[slot] = item
+
+    def merge(self, other: 'ReservoirSample'):
+        """Campione dell'unione: ogni posto viene dall'uno o dall'altro in proporzione agli elementi visti."""
+        total = self.seen + other.seen
+        if total <= self.k or not other.seen:
+            self.items = (self.items + other.items)[:self.k]
+            self.seen = total
+            return
+        mine, theirs = list(self.items), list(other.items)
+        self._random.shuffle(mine)
+        self._random.shuffle(theirs)
+        remaining_mine, remaining_theirs = self.seen, other.seen
+        merged = []
+        while len(merged) < self.k and (mine or theirs):
+            if theirs and (not mine or self._random.randrange(remaining_mine + remaining_theirs) >= remaining_mine):
+                merged.append(theirs.pop())
+                remaining_theirs -= 1
+            else:
+                merged.append(mine.pop())
+                remaining_mine -= 1
+        self.items = merged
+        self.seen = total
+
+
+class HyperLogLog:
+    """Stima della cardinalità con 2^precision registri (Flajolet et al., correzione per piccoli insiemi)."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: bytes):
+        hashed = _hash64(value)
+        index = hashed >> (64 - self.precision)
+        rest = hashed & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog con precisione diversa non combinabili")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # linear counting
+        return int(round(estimate))
+
+
+class SpaceSaving:
+    """
+    Valori più frequenti con al massimo capacity contatori (Metwally et al.).
+
+    Ogni conteggio è una stima per eccesso: il valore vero è compreso tra
+    count - error e count.
+    """
+
+    def __init__(self, capacity: int = TOPK_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[Hashable, int] = {}
+        self.errors: Dict[Hashable, int] = {}
+        # Heap (conteggio, valore) aggiornato in modo pigro: gli incrementi non lo toccano,
+        # le voci superate vengono corrette solo quando arrivano in cima
+        self._heap: List[Tuple[int, Hashable]] = []
+
+    def add(self, item: Hashable):
+        counts = self.counts
+        if item in counts:
+            counts[item] += 1
+        elif len(counts) < self.capacity:
+            counts[item] = 1
+            self.errors[item] = 0
+            heapq.heappush(self._heap, (1, item))
+        else:
+            # Il nuovo valore prende il posto del meno frequente ereditandone il conteggio
+            heap = self._heap
+            while heap[0][0] != counts[heap[0][1]]:
+                heapq.heapreplace(heap, (counts[heap[0][1]], heap[0][1]))
+            floor, victim = heap[0]
+            del counts[victim]
+            del self.errors[victim]
+            counts[item] = floor + 1
+            self.errors[item] = floor
+            heapq.heapreplace(heap, (floor + 1, item))
+
+    def _floor(self) -> int:
+        return min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+
+    def merge(self, other: 'SpaceSaving'):
+        """Unione dei riassunti: ai valori assenti in uno dei due si somma il suo conteggio minimo."""
+        floor_mine, floor_theirs = self._floor(), other._floor()
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, floor_mine) + other.counts.get(item, floor_theirs)
+            errors[item] = self.errors.get(item, floor_mine) + other.errors.get(item, floor_theirs)
+        kept = sorted(counts, key=counts.get, reverse=True)[:self.capacity]
+        self.counts = {item: counts[item] for item in kept}
+        self.errors = {item: errors[item] for item in kept}
+        self._heap = [(count, item) for item, count in self.counts.items()]
+        heapq.heapify(self._heap)
+
+    def top(self, k: int) -> List[Tuple[Hashable, int, int]]:
+        """I k valori più frequenti come (valore, conteggio, errore massimo)."""
+        ranked = sorted(self.counts.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(item, count, self.errors[item]) for item, count in ranked]
+
+
+class ValueSummary:
+    """Campione, valori distinti stimati e valori più frequenti di una proprietà."""
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE, precision: int = HLL_PRECISION,
+                 capacity: int = TOPK_CAPACITY):
+        self.count = 0
+        self.sample = ReservoirSample(sample_size)
+        self.distinct = HyperLogLog(precision)
+        self.top_values = SpaceSaving(capacity)
+
+    def add(self, value: bytes):
+        self.count += 1
+        self.sample.add(value)
+        self.distinct.add(value)
+        self.top_values.add(value)
+
+    def merge(self, other: 'ValueSummary'):
+        self.count += other.count
+        self.sample.merge(other.sample)
+        self.distinct.merge(other.distinct)
+        self.top_values.merge(other.top_values)
+
+    def examples(self, k: int) -> List:
+        """Primi k valori distinti del campione."""
+        return list(dict.fromkeys(self.sample.items))[:k]
+
+    def distinct_count(self) -> int:
+        # La stima non può superare le occorrenze osservate
+        return min(self.distinct.count(), self.count)